@@ -1,19 +1,23 @@
+import base64
+import binascii
 import copy
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 load_dotenv()
 import json
 import logging
+import multiprocessing
 import queue
 import threading
 import traceback
 import uuid
-import random
 from pathlib import Path
 from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 from flask_socketio import SocketIO
+from werkzeug.serving import is_running_from_reloader
 import collab
+import live_inference
 
 # flask-socketio tries ctx.session = ... but Flask 3.x removed the setter.
 # Add it back so the assignment just sets the internal _session attribute.
@@ -22,17 +26,40 @@ if not hasattr(_RC.session, 'fset') or _RC.session.fset is None:
     _RC.session = property(_RC.session.fget, lambda self, v: setattr(self, '_session', v))
 
 import torch
-from torch import nn
 from controllers.model_controller import model_bp
 from controllers.chat_controller import chat_bp
-from services.model_service import (
-    build_model,
-    prepare_dataloaders,
-    configure_optimizer,
-    tensor_from_pixels,
+from services.inference_batcher import inference_batcher
+from services.inference_backends import (
+    DEFAULT_INFERENCE_BACKEND,
+    EXPORT_BACKENDS,
+    INFERENCE_BACKENDS,
+    backend_artifact_path,
+    backend_loader,
+    export_backends,
 )
+from services.inference_cache import inference_cache
+from services.prediction_cache import pixel_digest, prediction_cache
+from services.model_compiler import compiled_model_cache_stats
+from services.model_service import tensor_from_image_buffer, tensor_from_pixels
+from services.quantization import (
+    DEFAULT_CALIBRATION_SAMPLES,
+    load_quantized_model,
+    quantize_trained_model,
+    quantized_path_for,
+)
+from services.training_service import execute_training_job
+from services.sweep_service import expand_sweep_trials, run_sweep_job
+from services.training_scheduler import QueueFullError, scheduler
+from services.warm_pool import warm_pool
 from store import store
-from utils.validation import validate_architecture, validate_hyperparams, EMNIST_CLASS_LABELS
+from utils.validation import (
+    validate_architecture,
+    validate_hyperparams,
+    validate_inference_target,
+    validate_sweep,
+    EMNIST_CLASS_LABELS,
+    MNIST_CLASS_LABELS,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -40,13 +67,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-_active_training_lock = threading.Lock()
-_active_training = {
-    "run_id": None,
-    "thread": None,
-    "cancel_event": None,
-}
-
 """
 Expected request payload:
 {
@@ -89,11 +109,19 @@ MODEL_SAVE_DIR.mkdir(parents=True, exist_ok=True)
 MNIST_DATA_ROOT = BACKEND_DIR / "data" / "mnist"
 MNIST_DATA_ROOT.mkdir(parents=True, exist_ok=True)
 
+MAX_BATCH_INFER_IMAGES = 4096
+MAX_CALIBRATION_SAMPLES = 4096
+INFERENCE_VARIANTS = ("fp32", "int8")
+
 
 def _model_file_path(model_id: str) -> Path:
     return MODEL_SAVE_DIR / f"model_{model_id}.pkl"
 
 
+def _checkpoint_file_path(run_id: str) -> Path:
+    return MODEL_SAVE_DIR / f"checkpoint_{run_id}.pt"
+
+
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
 socketio = SocketIO(
@@ -121,177 +149,10 @@ def _generate_id(prefix: str) -> str:
     return f"{prefix}_{uuid.uuid4().hex}"
 
 
-def _train_with_torch(
-    model,
-    train_loader,
-    val_loader,
-    hyperparams,
-    on_checkpoint=None,
-    cancel_event=None,
-):
-    import time
-
-    device = torch.device("cpu")
-    model.to(device)
-
-    if hyperparams["seed"] is not None:
-        torch.manual_seed(hyperparams["seed"])
-        random.seed(hyperparams["seed"])
-
-    criterion = nn.CrossEntropyLoss()
-    optimizer = configure_optimizer(hyperparams["optimizer"], model.parameters())
-
-    epochs = hyperparams["epochs"]
-    metrics = []
-
-    training_start_time = time.time()
-
-    def should_cancel():
-        return cancel_event is not None and cancel_event.is_set()
-
-    if should_cancel():
-        return metrics, 0.0, True
-
-    for epoch in range(1, epochs + 1):
-        if should_cancel():
-            return metrics, 0.0, True
-
-        epoch_start_time = time.time()
-        model.train()
-        train_loss = 0.0
-        train_correct = 0
-        train_total = 0
-
-        for inputs, targets in train_loader:
-            if should_cancel():
-                return metrics, 0.0, True
-
-            inputs = inputs.to(device)
-            targets = targets.to(device)
-
-            optimizer.zero_grad()
-            outputs = model(inputs)
-            loss = criterion(outputs, targets)
-            loss.backward()
-            optimizer.step()
-
-            train_loss += loss.item() * inputs.size(0)
-            _, predicted = outputs.max(1)
-            train_correct += predicted.eq(targets).sum().item()
-            train_total += inputs.size(0)
-
-        avg_train_loss = train_loss / max(1, train_total)
-        train_accuracy = train_correct / max(1, train_total)
-
-        model.eval()
-        val_loss = 0.0
-        val_correct = 0
-        val_total = 0
-        with torch.no_grad():
-            for inputs, targets in val_loader:
-                if should_cancel():
-                    return metrics, 0.0, True
-
-                inputs = inputs.to(device)
-                targets = targets.to(device)
-                outputs = model(inputs)
-                loss = criterion(outputs, targets)
-                val_loss += loss.item() * inputs.size(0)
-                _, predicted = outputs.max(1)
-                val_correct += predicted.eq(targets).sum().item()
-                val_total += inputs.size(0)
-
-        avg_val_loss = val_loss / max(1, val_total)
-        val_accuracy = val_correct / max(1, val_total)
-
-        # Calculate timing and progress metrics
-        epoch_time = time.time() - epoch_start_time
-        elapsed_time = time.time() - training_start_time
-        avg_epoch_time = elapsed_time / epoch
-        eta_seconds = avg_epoch_time * (epochs - epoch)
-        progress = epoch / epochs
-
-        # Get learning rate
-        current_lr = optimizer.param_groups[0]["lr"]
-
-        metric_entry = {
-            "epoch": epoch,
-            "train_loss": round(avg_train_loss, 4),
-            "val_loss": round(avg_val_loss, 4),
-            "train_accuracy": round(train_accuracy, 4),
-            "val_accuracy": round(val_accuracy, 4),
-            "learning_rate": round(current_lr, 6),
-            "epoch_time": round(epoch_time, 2),
-            "samples_per_sec": round(train_total / epoch_time, 1)
-            if epoch_time > 0
-            else 0,
-            "progress": round(progress, 4),
-            "eta_seconds": round(eta_seconds, 1),
-        }
-        metrics.append(metric_entry)
-        if on_checkpoint is not None:
-            on_checkpoint(metric_entry)
-
-    test_accuracy = metrics[-1]["val_accuracy"] if metrics else 0.0
-    return metrics, test_accuracy, False
-
-
 def _format_sse(event_name, data):
     return f"event: {event_name}\ndata: {json.dumps(data)}\n\n"
 
 
-def _persist_model_weights(model_id: str, model: nn.Module) -> Path:
-    MODEL_SAVE_DIR.mkdir(parents=True, exist_ok=True)
-    model_cpu = model.to("cpu")
-    output_path = _model_file_path(model_id)
-    torch.save(model_cpu.state_dict(), output_path)
-    return output_path
-
-
-def _collect_sample_predictions(model: nn.Module, data_loader, limit: int = 8):
-    samples = []
-    try:
-        device = next(model.parameters()).device
-    except StopIteration:
-        device = torch.device("cpu")
-
-    model.eval()
-
-    total_collected = 0
-    with torch.no_grad():
-        for inputs, targets in data_loader:
-            inputs = inputs.to(device)
-            targets = targets.to(device)
-            outputs = model(inputs)
-            probabilities = torch.softmax(outputs, dim=1)
-            predictions = probabilities.argmax(dim=1)
-
-            batch_size = inputs.size(0)
-            for idx in range(batch_size):
-                image_tensor = inputs[idx].detach().cpu()
-                if image_tensor.dim() == 3 and image_tensor.size(0) == 1:
-                    image_tensor = image_tensor.squeeze(0)
-                grid = image_tensor.mul(255).clamp(0, 255).to(torch.uint8).tolist()
-                confidence = float(
-                    probabilities[idx, predictions[idx]].detach().cpu().item()
-                )
-                samples.append(
-                    {
-                        "grid": grid,
-                        "label": int(targets[idx].detach().cpu().item()),
-                        "prediction": int(predictions[idx].detach().cpu().item()),
-                        "confidence": confidence,
-                    }
-                )
-                total_collected += 1
-                if total_collected >= limit:
-                    break
-            if total_collected >= limit:
-                break
-
-    return samples
-
-
 @app.route("/api/models/save", methods=["POST"])
 def save_trained_model():
     if not request.is_json:
@@ -307,9 +168,14 @@ def save_trained_model():
 
     run_id = payload.get("run_id")
     model_name = payload.get("name")
+    inference_backend = payload.get("inference_backend")
 
     if not isinstance(run_id, str) or not run_id:
         return _error_response("`run_id` is required.", status=400)
+    if inference_backend is not None and inference_backend not in INFERENCE_BACKENDS:
+        return _error_response(
+            f"`inference_backend` must be one of {', '.join(INFERENCE_BACKENDS)}.", status=400
+        )
 
     run_entry = store.get_run(run_id)
     if run_entry is None:
@@ -335,6 +201,17 @@ def save_trained_model():
     # Rename model file from run_id to model_id
     new_model_path = _model_file_path(model_id)
     output_path.rename(new_model_path)
+    _invalidate_inference_models(run_id)
+
+    quantized = copy.deepcopy(run_entry.get("quantized"))
+    quantized_path = quantized_path_for(output_path)
+    if quantized_path.exists():
+        new_quantized_path = quantized_path_for(new_model_path)
+        quantized_path.rename(new_quantized_path)
+        if quantized:
+            quantized["path"] = str(new_quantized_path)
+    else:
+        quantized = None
 
     model_entry = {
         "model_id": model_id,
@@ -346,6 +223,9 @@ def save_trained_model():
         "trained": True,
         "saved_model_path": str(new_model_path),
         "last_trained_at": created_at,
+        "quantized": quantized,
+        "inference_backend": inference_backend,
+        "exports": {backend: {"state": "pending"} for backend in EXPORT_BACKENDS},
     }
     store.add_model(model_id, model_entry)
 
@@ -355,9 +235,17 @@ def save_trained_model():
         {
             "model_id": model_id,
             "saved_model_path": str(new_model_path),
+            "quantized": copy.deepcopy(quantized),
         },
     )
 
+    threading.Thread(
+        target=_export_saved_model,
+        args=(model_id, architecture, new_model_path),
+        name=f"export-{model_id}",
+        daemon=True,
+    ).start()
+
     response = {
         "model_id": model_id,
         "run_id": run_id,
@@ -366,12 +254,115 @@ def save_trained_model():
         "name": model_name,
         "architecture": copy.deepcopy(architecture),
         "hyperparams": copy.deepcopy(hyperparams),
+        "inference_backend": inference_backend,
+        "exports": copy.deepcopy(model_entry["exports"]),
     }
 
     return jsonify(response), 201
 
 
-def _start_training_thread(model_id, run_id, architecture, hyperparams, cancel_event):
+def _export_saved_model(model_id, architecture, model_path):
+    """Write the TorchScript and ONNX artifacts for a saved model in the
+    background; their state is reported under the model's ``exports``."""
+    try:
+        exports = export_backends(architecture, model_path)
+    except Exception as exc:
+        logger.exception(f"Exporting model {model_id} failed")
+        exports = {backend: {"state": "failed", "error": str(exc)} for backend in EXPORT_BACKENDS}
+    store.update_model(model_id, {"exports": exports})
+
+
+def _invalidate_inference_models(owner_id):
+    """Drop every cached variant/backend of a run's or model's weights."""
+    for backend in ("int8",) + EXPORT_BACKENDS:
+        inference_cache.invalidate(f"{owner_id}:{backend}")
+    inference_cache.invalidate(owner_id)
+
+
+def _inference_loader(backend):
+    return load_quantized_model if backend == "int8" else backend_loader(backend)
+
+
+@app.route("/api/quantize", methods=["POST"])
+def quantize_model():
+    """Export an int8 variant of a succeeded run's or saved model's weights.
+
+    Linear layers get dynamic int8 quantization; the conv trunk (Conv/BN/ReLU)
+    is statically quantized, calibrated on a slice of the validation split.
+    The TorchScript artifact is written next to the weights and served by
+    ``/api/infer`` with ``"variant": "int8"``.
+    """
+    if not request.is_json:
+        return _error_response("Expected JSON payload.", status=415)
+
+    try:
+        payload = request.get_json(force=True)
+    except Exception:
+        return _error_response("Malformed JSON payload.")
+
+    if not isinstance(payload, dict):
+        return _error_response("Payload must be a JSON object.")
+
+    run_id = payload.get("run_id")
+    model_id = payload.get("model_id")
+    calibration_samples = payload.get("calibration_samples", DEFAULT_CALIBRATION_SAMPLES)
+
+    if isinstance(calibration_samples, bool) or not isinstance(calibration_samples, int) or not (
+        1 <= calibration_samples <= MAX_CALIBRATION_SAMPLES
+    ):
+        return _error_response(
+            f"`calibration_samples` must be an integer between 1 and {MAX_CALIBRATION_SAMPLES}.",
+            status=400,
+        )
+
+    if isinstance(run_id, str) and run_id:
+        entry = store.get_run(run_id)
+        if entry is None:
+            return _error_response("Run does not exist.", status=404)
+        if entry.get("state") != "succeeded":
+            return _error_response("Run has not succeeded.", status=409)
+        model_id = entry.get("model_id")
+    elif isinstance(model_id, str) and model_id:
+        entry = store.get_model(model_id)
+        if entry is None:
+            return _error_response("Model does not exist.", status=404)
+    else:
+        return _error_response("`run_id` or `model_id` is required.", status=400)
+
+    saved_model_path = entry.get("saved_model_path")
+    if not saved_model_path or not Path(saved_model_path).exists():
+        return _error_response("Persisted model file not available.", status=409)
+
+    try:
+        report = quantize_trained_model(
+            entry.get("architecture", {}),
+            entry.get("hyperparams", {}),
+            saved_model_path,
+            calibration_samples=calibration_samples,
+        )
+    except Exception:
+        logger.exception(f"Quantization failed for {run_id or model_id}")
+        return _error_response("Quantization failed.", status=500)
+
+    # Every run sharing these weights serves the new artifact.
+    for run in store.list_runs(saved_model_path=saved_model_path):
+        store.update_run(run["run_id"], {"quantized": copy.deepcopy(report)})
+        inference_cache.invalidate(f"{run['run_id']}:int8")
+    if model_id and store.get_model(model_id) is not None:
+        store.update_model(model_id, {"quantized": copy.deepcopy(report)})
+        inference_cache.invalidate(f"{model_id}:int8")
+
+    return jsonify({"run_id": run_id, "model_id": model_id, **report}), 201
+
+
+def _submit_training_run(
+    model_id,
+    run_id,
+    architecture,
+    hyperparams,
+    cancel_event,
+    resume_from=None,
+):
     event_queue = queue.Queue()
     store.add_event_queue(run_id, event_queue)
 
@@ -380,95 +371,103 @@ def _start_training_thread(model_id, run_id, architecture, hyperparams, cancel_e
         payload.setdefault("run_id", run_id)
         event_queue.put({"event": event_name, "data": payload})
 
-    def worker():
-        try:
-            if cancel_event is not None and cancel_event.is_set():
-                completed_at = _utcnow_iso()
-                store.update_run(
-                    run_id,
-                    {
-                        "state": "cancelled",
-                        "completed_at": completed_at,
-                        "metrics": [],
-                        "test_accuracy": None,
-                        "sample_predictions": [],
-                    },
-                )
-                emit("state", {"state": "cancelled"})
-                return
-
-            # Build the model from the original architecture
-            model = build_model(architecture)
-
-            # Determine dataset type from hyperparams or default to emnist
-            dataset_type = hyperparams.get("dataset_type", "emnist")
-
-            train_loader, val_loader = prepare_dataloaders(
-                hyperparams["batch_size"],
-                hyperparams["train_split"],
-                hyperparams["shuffle"],
-                hyperparams["max_samples"],
-                hyperparams["seed"],
-                dataset_type
-            )
-
-            captured_metrics = []
-
-            store.update_run(run_id, {"state": "running"})
+    def on_queue_update(position, eta_seconds):
+        store.update_run(run_id, {"queue_position": position})
+        emit(
+            "state",
+            {"state": "queued", "queue_position": position, "eta_seconds": eta_seconds},
+        )
 
-            emit("state", {"state": "running"})
+    def close_events():
+        event_queue.put(None)
+        store.remove_event_queue(run_id)
 
-            def on_checkpoint(metric):
-                metric_copy = dict(metric)
-                captured_metrics.append(metric_copy)
-                emit("metric", metric_copy)
-                store.update_run(
-                    run_id,
-                    {
-                        "metrics": list(captured_metrics),
-                        "epoch": metric_copy["epoch"],
-                    },
-                )
+    def on_cancel():
+        store.update_run(
+            run_id,
+            {
+                "state": "cancelled",
+                "completed_at": _utcnow_iso(),
+                "queue_position": None,
+                "metrics": [],
+                "test_accuracy": None,
+                "sample_predictions": [],
+            },
+        )
+        emit("state", {"state": "cancelled"})
+        close_events()
 
-            metrics, test_accuracy, was_cancelled = _train_with_torch(
-                model,
-                train_loader,
-                val_loader,
+    def worker(num_threads):
+        try:
+            def on_event(event_name, data):
+                if event_name == "running":
+                    store.update_run(
+                        run_id,
+                        {
+                            "state": "running",
+                            "queue_position": None,
+                            "torch_threads": data.get("num_threads", num_threads),
+                            "autotune": data.get("autotune"),
+                        },
+                    )
+                    state_payload = {"state": "running"}
+                    if data.get("autotune"):
+                        state_payload["autotune"] = data["autotune"]
+                    emit("state", state_payload)
+                elif event_name == "metric":
+                    metric_copy = dict(data)
+                    emit("metric", metric_copy)
+                    store.append_run_metric(run_id, metric_copy, {"epoch": metric_copy["epoch"]})
+                elif event_name == "checkpoint":
+                    store.update_run(
+                        run_id,
+                        {
+                            "checkpoint_path": data["path"],
+                            "checkpoint_epoch": data["epoch"],
+                            "checkpoint_step": data["step"],
+                        },
+                    )
+                    emit("checkpoint", {"epoch": data["epoch"], "step": data["step"]})
+
+            # Save model weights to temporary location keyed by run_id
+            result = execute_training_job(
+                architecture,
                 hyperparams,
-                on_checkpoint=on_checkpoint,
-                cancel_event=cancel_event,
+                _model_file_path(run_id),
+                on_event,
+                cancel_event,
+                num_threads=num_threads,
+                max_workers=scheduler.max_workers,
+                checkpoint_path=_checkpoint_file_path(run_id),
+                resume_from=resume_from,
             )
-            if was_cancelled:
+            if result["cancelled"]:
                 completed_at = _utcnow_iso()
-                metrics_to_store = metrics if metrics else list(captured_metrics)
-                store.update_run(
-                    run_id,
-                    {
-                        "state": "cancelled",
-                        "metrics": metrics_to_store,
-                        "completed_at": completed_at,
-                        "test_accuracy": None,
-                        "sample_predictions": [],
-                    },
-                )
+                updates = {
+                    "state": "cancelled",
+                    "completed_at": completed_at,
+                    "test_accuracy": None,
+                    "sample_predictions": [],
+                }
+                if result["metrics"]:
+                    updates["metrics"] = result["metrics"]
+                store.update_run(run_id, updates)
                 emit("state", {"state": "cancelled"})
                 return
 
-            sample_predictions = _collect_sample_predictions(model, val_loader, limit=8)
-
-            # Save model weights to temporary location
-            temp_model_id = run_id  # Use run_id for temporary storage
-            output_path = _persist_model_weights(temp_model_id, model)
+            test_accuracy = result["test_accuracy"]
+            sample_predictions = result["sample_predictions"]
             completed_at = _utcnow_iso()
             store.update_run(
                 run_id,
                 {
                     "state": "succeeded",
-                    "metrics": metrics,
+                    "metrics": result["metrics"],
                     "test_accuracy": test_accuracy,
                     "completed_at": completed_at,
-                    "saved_model_path": str(output_path),
+                    "saved_model_path": result["saved_model_path"],
                     "sample_predictions": sample_predictions,
+                    "checkpoint_path": None,
                 },
             )
 
@@ -494,19 +493,13 @@ def _start_training_thread(model_id, run_id, architecture, hyperparams, cancel_e
             )
             emit("state", {"state": "failed", "error": error_message})
         finally:
-            event_queue.put(None)
-            store.remove_event_queue(run_id)
-            with _active_training_lock:
-                if _active_training["run_id"] == run_id:
-                    _active_training["run_id"] = None
-                    _active_training["thread"] = None
-                    _active_training["cancel_event"] = None
+            close_events()
 
-    # Emit initial queued state before the worker starts.
-    emit("state", {"state": "queued"})
-    thread = threading.Thread(target=worker, daemon=True)
-    thread.start()
-    return thread
+    try:
+        return scheduler.submit(run_id, worker, cancel_event, on_queue_update, on_cancel)
+    except QueueFullError:
+        store.remove_event_queue(run_id)
+        raise
 
 
 def _utcnow_iso():
@@ -541,68 +534,124 @@ def train_model():
     except ValueError as exc:
         return _error_response(str(exc))
 
+    return _enqueue_training_run(architecture, hyperparams)
+
+
+def _enqueue_training_run(architecture, hyperparams, resume_from=None, resumed_from_run=None, initial_metrics=None):
     run_id = _generate_id("r")
     created_at = _utcnow_iso()
 
     cancel_event = threading.Event()
 
-    with _active_training_lock:
-        active_run_id = _active_training["run_id"]
-        active_thread = _active_training["thread"]
-        if active_run_id is not None and (active_thread is None or active_thread.is_alive()):
-            return _error_response("Another training run is already in progress.", status=409)
-        _active_training["run_id"] = run_id
-        _active_training["cancel_event"] = cancel_event
-        _active_training["thread"] = None
-
     # Work with deep copies to avoid sharing references across threads.
     architecture = json.loads(json.dumps(architecture))
     hyperparams = json.loads(json.dumps(hyperparams))
+    initial_metrics = json.loads(json.dumps(initial_metrics or []))
+
+    store.add_run(
+        run_id,
+        {
+            "run_id": run_id,
+            "model_id": None,
+            "state": "queued",
+            "epochs_total": hyperparams["epochs"],
+            "metrics": list(initial_metrics),
+            "test_accuracy": None,
+            "created_at": created_at,
+            "events_url": f"/api/runs/{run_id}/events",
+            "hyperparams": hyperparams,
+            "architecture": architecture,
+            "saved_model_path": None,
+            "sample_predictions": [],
+            "queue_position": None,
+            "autotune": None,
+            "checkpoint_path": None,
+            "resumed_from": resumed_from_run,
+        },
+    )
 
     try:
-        store.add_run(
+        _submit_training_run(
+            None,
             run_id,
-            {
-                "run_id": run_id,
-                "model_id": None,
-                "state": "queued",
-                "epochs_total": hyperparams["epochs"],
-                "metrics": [],
-                "test_accuracy": None,
-                "created_at": created_at,
-                "events_url": f"/api/runs/{run_id}/events",
-                "hyperparams": hyperparams,
-                "architecture": architecture,
-                "saved_model_path": None,
-                "sample_predictions": [],
-            },
+            architecture,
+            hyperparams,
+            cancel_event,
+            resume_from=resume_from,
         )
+    except QueueFullError as exc:
+        store.update_run(
+            run_id,
+            {"state": "failed", "error": str(exc), "completed_at": _utcnow_iso()},
+        )
+        return _error_response(str(exc), status=503)
 
-        thread = _start_training_thread(None, run_id, architecture, hyperparams, cancel_event)
-        with _active_training_lock:
-            if _active_training["run_id"] == run_id:
-                _active_training["thread"] = thread
-    except Exception:
-        with _active_training_lock:
-            if _active_training["run_id"] == run_id:
-                _active_training["run_id"] = None
-                _active_training["thread"] = None
-                _active_training["cancel_event"] = None
-        raise
-
+    queue_info = scheduler.queue_info(run_id) or {}
     response = {
         "run_id": run_id,
         "status": "queued",
+        "queue_position": queue_info.get("queue_position"),
+        "eta_seconds": queue_info.get("eta_seconds"),
         "created_at": created_at,
         "epochs_total": hyperparams["epochs"],
-        "metrics": [],
+        "metrics": initial_metrics,
         "test_accuracy": None,
         "events_url": f"/api/runs/{run_id}/events",
+        "resumed_from": resumed_from_run,
     }
 
     return jsonify(response), 202
 
 
+@app.route("/api/train/<run_id>/resume", methods=["POST"])
+def resume_training(run_id):
+    source_run = store.get_run(run_id)
+    if source_run is None:
+        return _error_response("Unknown run_id.", status=404)
+
+    if source_run.get("state") not in {"cancelled", "failed"}:
+        return _error_response("Only cancelled or failed runs can be resumed.", status=409)
+
+    checkpoint_path = source_run.get("checkpoint_path")
+    if not checkpoint_path or not Path(checkpoint_path).exists():
+        return _error_response("No checkpoint is available for this run.", status=409)
+
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return _error_response("Payload must be a JSON object.")
+
+    overrides = payload.get("hyperparams") or {}
+    if not isinstance(overrides, dict):
+        return _error_response("`hyperparams` must be an object.")
+
+    # Keep the autotuned settings so resumed step counts line up with the checkpoint.
+    tuned = source_run.get("autotune") or {}
+    pinned = {key: tuned[key] for key in ("batch_size", "num_threads") if tuned.get(key) is not None}
+    try:
+        hyperparams = validate_hyperparams({**source_run["hyperparams"], **pinned, **overrides})
+    except ValueError as exc:
+        return _error_response(str(exc))
+
+    checkpoint_epoch = source_run.get("checkpoint_epoch") or 0
+    if hyperparams["epochs"] <= checkpoint_epoch:
+        return _error_response(
+            f"`hyperparams.epochs` must exceed the {checkpoint_epoch} epochs already trained.",
+            status=422,
+        )
+
+    prior_metrics = [
+        metric for metric in store.get_run_metrics(run_id)
+        if metric.get("epoch", 0) <= checkpoint_epoch
+    ]
+    return _enqueue_training_run(
+        source_run["architecture"],
+        hyperparams,
+        resume_from=checkpoint_path,
+        resumed_from_run=run_id,
+        initial_metrics=prior_metrics,
+    )
+
+
 @app.route("/api/train/<run_id>/cancel", methods=["POST"])
 def cancel_training(run_id):
     run_entry = store.get_run(run_id)
@@ -613,15 +662,348 @@ def cancel_training(run_id):
     if state not in {"queued", "running"}:
         return _error_response("Run is not currently active.", status=409)
 
-    with _active_training_lock:
-        if _active_training["run_id"] != run_id or _active_training["cancel_event"] is None:
-            return _error_response("Run is not currently active.", status=409)
-        cancel_event = _active_training["cancel_event"]
-        cancel_event.set()
+    if not scheduler.cancel(run_id):
+        return _error_response("Run is not currently active.", status=409)
 
     return jsonify({"run_id": run_id, "status": "cancelling"}), 202
 
 
+def _submit_sweep(sweep_id, architecture, trials, cancel_event):
+    event_queue = queue.Queue()
+    store.add_event_queue(sweep_id, event_queue)
+
+    def emit(event_name, data):
+        payload = dict(data)
+        payload.setdefault("sweep_id", sweep_id)
+        event_queue.put({"event": event_name, "data": payload})
+
+    def on_queue_update(position, eta_seconds):
+        emit(
+            "state",
+            {"state": "queued", "queue_position": position, "eta_seconds": eta_seconds},
+        )
+
+    def finish_trials(state):
+        for trial_id, _ in trials:
+            trial = store.get_run(trial_id)
+            if trial is not None and trial.get("state") in {"queued", "running"}:
+                store.update_run(trial_id, {"state": state, "completed_at": _utcnow_iso()})
+                emit("state", {"state": state, "run_id": trial_id, "trial_id": trial_id})
+
+    def close_events():
+        event_queue.put(None)
+        store.remove_event_queue(sweep_id)
+
+    def on_cancel():
+        finish_trials("cancelled")
+        store.update_sweep(sweep_id, {"state": "cancelled", "completed_at": _utcnow_iso()})
+        emit("state", {"state": "cancelled"})
+        close_events()
+
+    def worker(num_threads):
+        def on_event(event_name, data):
+            trial_id = data["run_id"]
+            if event_name == "running":
+                store.update_run(trial_id, {"state": "running"})
+                emit("state", {"state": "running", "run_id": trial_id, "trial_id": trial_id})
+            elif event_name == "metric":
+                metric = dict(data)
+                emit("metric", {**metric, "trial_id": trial_id})
+                store.append_run_metric(trial_id, metric, {"epoch": metric["epoch"]})
+            elif event_name == "trial_done":
+                store.update_run(
+                    trial_id,
+                    {
+                        "state": "succeeded",
+                        "metrics": data["metrics"],
+                        "test_accuracy": data["test_accuracy"],
+                        "completed_at": _utcnow_iso(),
+                        "saved_model_path": data["saved_model_path"],
+                        "sample_predictions": data["sample_predictions"],
+                    },
+                )
+                emit(
+                    "state",
+                    {
+                        "state": "succeeded",
+                        "run_id": trial_id,
+                        "trial_id": trial_id,
+                        "test_accuracy": data["test_accuracy"],
+                    },
+                )
+
+        try:
+            store.update_sweep(sweep_id, {"state": "running", "torch_threads": num_threads})
+            emit("state", {"state": "running"})
+            was_cancelled = run_sweep_job(
+                architecture, trials, _model_file_path, on_event, cancel_event
+            )
+
+            if was_cancelled:
+                finish_trials("cancelled")
+                store.update_sweep(sweep_id, {"state": "cancelled", "completed_at": _utcnow_iso()})
+                emit("state", {"state": "cancelled"})
+                return
+
+            results = [
+                store.get_run(trial_id) for trial_id, _ in trials
+            ]
+            best = max(results, key=lambda run: run.get("test_accuracy") or 0.0)
+            store.update_sweep(
+                sweep_id,
+                {
+                    "state": "succeeded",
+                    "completed_at": _utcnow_iso(),
+                    "best_trial_id": best["run_id"],
+                    "best_test_accuracy": best.get("test_accuracy"),
+                },
+            )
+            emit(
+                "state",
+                {
+                    "state": "succeeded",
+                    "best_trial_id": best["run_id"],
+                    "best_test_accuracy": best.get("test_accuracy"),
+                },
+            )
+        except Exception as exc:
+            error_message = str(exc)
+            logger.error(f"Sweep {sweep_id} failed: {error_message}")
+            logger.error(f"Traceback:\n{traceback.format_exc()}")
+            finish_trials("failed")
+            store.update_sweep(
+                sweep_id,
+                {"state": "failed", "error": error_message, "completed_at": _utcnow_iso()},
+            )
+            emit("state", {"state": "failed", "error": error_message})
+        finally:
+            close_events()
+
+    try:
+        return scheduler.submit(sweep_id, worker, cancel_event, on_queue_update, on_cancel)
+    except QueueFullError:
+        store.remove_event_queue(sweep_id)
+        raise
+
+
+@app.route("/api/sweeps", methods=["POST"])
+def start_sweep():
+    if not request.is_json:
+        return _error_response("Expected JSON payload.", status=415)
+
+    try:
+        payload = request.get_json(force=True)
+    except Exception:
+        return _error_response("Malformed JSON payload.")
+
+    if not isinstance(payload, dict):
+        return _error_response("Payload must be a JSON object.")
+
+    hyperparams_raw = payload.get("hyperparams") or {}
+    try:
+        dataset_type = hyperparams_raw.get("dataset_type", "mnist")
+        architecture = validate_architecture(payload.get("architecture"), dataset_type)
+        base_hyperparams = validate_hyperparams(hyperparams_raw)
+        sweep = validate_sweep(payload.get("sweep"))
+        trial_hyperparams = expand_sweep_trials(base_hyperparams, sweep)
+    except (AttributeError, ValueError) as exc:
+        return _error_response(str(exc))
+
+    sweep_id = _generate_id("s")
+    created_at = _utcnow_iso()
+    trials = []
+    for index, hyperparams in enumerate(trial_hyperparams):
+        trial_id = _generate_id("r")
+        store.add_run(
+            trial_id,
+            {
+                "run_id": trial_id,
+                "model_id": None,
+                "sweep_id": sweep_id,
+                "trial_index": index,
+                "state": "queued",
+                "epochs_total": hyperparams["epochs"],
+                "metrics": [],
+                "test_accuracy": None,
+                "created_at": created_at,
+                "events_url": f"/api/runs/{trial_id}/events",
+                "hyperparams": hyperparams,
+                "architecture": architecture,
+                "saved_model_path": None,
+                "sample_predictions": [],
+            },
+        )
+        trials.append((trial_id, hyperparams))
+
+    store.add_sweep(
+        sweep_id,
+        {
+            "sweep_id": sweep_id,
+            "state": "queued",
+            "created_at": created_at,
+            "sweep": sweep,
+            "architecture": architecture,
+            "trial_ids": [trial_id for trial_id, _ in trials],
+            "events_url": f"/api/sweeps/{sweep_id}/events",
+            "best_trial_id": None,
+            "best_test_accuracy": None,
+        },
+    )
+
+    try:
+        _submit_sweep(sweep_id, architecture, trials, threading.Event())
+    except QueueFullError as exc:
+        store.update_sweep(
+            sweep_id,
+            {"state": "failed", "error": str(exc), "completed_at": _utcnow_iso()},
+        )
+        for trial_id, _ in trials:
+            store.update_run(trial_id, {"state": "failed", "error": str(exc)})
+        return _error_response(str(exc), status=503)
+
+    response = {
+        "sweep_id": sweep_id,
+        "status": "queued",
+        "created_at": created_at,
+        "trials": [
+            {"trial_id": trial_id, "hyperparams": hyperparams} for trial_id, hyperparams in trials
+        ],
+        "events_url": f"/api/sweeps/{sweep_id}/events",
+    }
+    return jsonify(response), 202
+
+
+def _sweep_summary(sweep):
+    summary = dict(sweep)
+    summary["trials"] = []
+    for trial_id in sweep["trial_ids"]:
+        trial = store.get_run(trial_id) or {}
+        metrics = store.get_run_metrics(trial_id, start=-1)
+        summary["trials"].append(
+            {
+                "trial_id": trial_id,
+                "state": trial.get("state"),
+                "hyperparams": trial.get("hyperparams"),
+                "test_accuracy": trial.get("test_accuracy"),
+                "last_metric": metrics[-1] if metrics else None,
+            }
+        )
+    return summary
+
+
+@app.route("/api/sweeps/<sweep_id>", methods=["GET"])
+def get_sweep(sweep_id):
+    sweep = store.get_sweep(sweep_id)
+    if sweep is None:
+        return _error_response("Unknown sweep_id.", status=404)
+    return jsonify(_sweep_summary(sweep)), 200
+
+
+@app.route("/api/sweeps/<sweep_id>/cancel", methods=["POST"])
+def cancel_sweep(sweep_id):
+    sweep = store.get_sweep(sweep_id)
+    if sweep is None:
+        return _error_response("Unknown sweep_id.", status=404)
+
+    if sweep.get("state") not in {"queued", "running"} or not scheduler.cancel(sweep_id):
+        return _error_response("Sweep is not currently active.", status=409)
+
+    return jsonify({"sweep_id": sweep_id, "status": "cancelling"}), 202
+
+
+@app.route("/api/train/queue", methods=["GET"])
+def training_queue_status():
+    return jsonify(scheduler.stats()), 200
+
+
+@app.route("/api/stats", methods=["GET"])
+def runtime_stats():
+    return jsonify(
+        {
+            "compiled_models": compiled_model_cache_stats(),
+            "inference_models": inference_cache.stats(),
+            "inference_batching": inference_batcher.stats(),
+            "inference_warm_pool": warm_pool.stats(),
+            "prediction_cache": prediction_cache.stats(),
+        }
+    ), 200
+
+
+def _load_inference_model(run_id=None, variant="fp32", model_id=None):
+    """Return ``(entry, model, None)`` for a finished run or a saved model, or
+    ``(None, None, (message, status))`` when it can't serve predictions.
+
+    Pass ``model_id`` to serve a saved model straight from its model entry,
+    without its run record. A run that has been saved shares its model's
+    cache entry. ``variant="int8"`` serves the model exported by
+    ``/api/quantize``. fp32 models are served by the saved model's
+    ``inference_backend`` (or ``INFERENCE_BACKEND``), falling back to eager
+    until its artifact exists. The entry's ``"backend"`` names the one used
+    and ``"weights_path"`` the artifact it was loaded from.
+    """
+    if model_id is not None:
+        model_entry = store.get_model(model_id)
+        if model_entry is None:
+            return None, None, ("Unknown model_id.", 404)
+        entry = model_entry
+        saved_model_path = entry.get("saved_model_path")
+        if not saved_model_path:
+            return None, None, ("Model has no trained weights.", 409)
+    else:
+        entry = store.get_run(run_id)
+        if entry is None:
+            return None, None, ("Unknown run_id.", 404)
+        state = entry.get("state")
+        if state != "succeeded":
+            return None, None, ("Run is not ready for inference.", 409)
+
+        saved_model_path = entry.get("saved_model_path")
+        if not saved_model_path:
+            return None, None, ("Persisted model file not available for this run.", 409)
+        model_entry = store.get_model(entry["model_id"]) if entry.get("model_id") else None
+        if model_entry is not None and model_entry.get("saved_model_path") != saved_model_path:
+            model_entry = None
+
+    model_path = Path(saved_model_path)
+    if not model_path.exists():
+        return None, None, ("Persisted model file is missing.", 500)
+
+    if variant == "int8":
+        backend = "int8"
+        model_path = quantized_path_for(model_path)
+        if not model_path.exists():
+            return None, None, ("Model has no int8 variant; POST /api/quantize first.", 409)
+    else:
+        backend = (model_entry or {}).get("inference_backend") or DEFAULT_INFERENCE_BACKEND
+        if backend != "eager" and backend_artifact_path(model_path, backend).exists():
+            model_path = backend_artifact_path(model_path, backend)
+        else:
+            backend = "eager"
+
+    owner_id = model_entry["model_id"] if model_entry is not None else run_id
+    if backend != "eager":
+        owner_id = f"{owner_id}:{backend}"
+    try:
+        model = inference_cache.get(
+            owner_id, model_path, entry["architecture"], loader=_inference_loader(backend)
+        )
+    except Exception:
+        logger.exception(f"Loading the {backend} model {owner_id} failed")
+        return None, None, ("Failed to load persisted model.", 500)
+    if model_entry is not None:
+        warm_pool.record_use(
+            owner_id, model_entry["model_id"], model_path, entry["architecture"], backend
+        )
+    return {**entry, "backend": backend, "weights_path": str(model_path)}, model, None
+
+
+def _class_labels(dataset_type):
+    # Get the appropriate class labels based on dataset type
+    if dataset_type == "emnist":
+        return EMNIST_CLASS_LABELS
+    return MNIST_CLASS_LABELS  # Default to MNIST
+
+
 @app.route("/api/infer", methods=["POST"])
 def infer_single_pixel_map():
     if not request.is_json:
@@ -636,75 +1018,198 @@ def infer_single_pixel_map():
         return _error_response("Payload must be a JSON object.")
 
     run_id = payload.get("run_id")
+    model_id = payload.get("model_id")
     pixels = payload.get("pixels")
+    variant = payload.get("variant", "fp32")
 
-    if not isinstance(run_id, str) or not run_id:
-        return _error_response("`run_id` is required.", status=400)
+    try:
+        validate_inference_target(run_id, model_id)
+    except ValueError as exc:
+        return _error_response(str(exc), status=400)
+    if variant not in INFERENCE_VARIANTS:
+        return _error_response("`variant` must be 'fp32' or 'int8'.", status=400)
 
     try:
         input_tensor = tensor_from_pixels(pixels)
     except ValueError as exc:
         return _error_response(str(exc), status=422)
 
-    run_entry = store.get_run(run_id)
-    if run_entry is None:
-        return _error_response("Unknown run_id.", status=404)
-    state = run_entry.get("state")
-    if state != "succeeded":
-        return _error_response("Run is not ready for inference.", status=409)
-
-    saved_model_path = run_entry.get("saved_model_path")
-    if not saved_model_path:
-        return _error_response("Persisted model file not available for this run.", status=409)
-
-    model_path = Path(saved_model_path)
-    if not model_path.exists():
-        return _error_response("Persisted model file is missing.", status=500)
+    response, status = _predict_single(run_id, input_tensor, variant, model_id=model_id)
+    if status != 200:
+        return _error_response(response["error"], status=status)
+    return jsonify(response), 200
 
-    architecture = run_entry["architecture"]
-    model = build_model(architecture)
 
-    try:
-        state_dict = torch.load(model_path, map_location="cpu")
-    except Exception:
-        return _error_response("Failed to load persisted model.", status=500)
+def _predict_single(run_id, input_tensor, variant="fp32", model_id=None):
+    """Classify one ``(1, 1, 28, 28)`` image with a run's or saved model's model.
 
-    model.load_state_dict(state_dict)
-    del state_dict
-    model.eval()
+    Returns ``(response, 200)`` or ``({"error": message}, status)``; shared by
+    ``/api/infer`` and the live Socket.IO inference channel.
+    """
+    run_entry, model, error = _load_inference_model(run_id, variant, model_id=model_id)
+    if error is not None:
+        message, status = error
+        return {"error": message}, status
 
-    with torch.no_grad():
-        logits = model(input_tensor)
-        if logits.dim() == 1:
-            logits = logits.unsqueeze(0)
-        probabilities = torch.softmax(logits, dim=1).squeeze(0)
+    # Identical inputs to the same weights reuse the cached logits; the rest
+    # share a forward pass with concurrent requests for the same model.
+    cache_key = None
+    logits = None
+    if prediction_cache.enabled:
+        try:
+            cache_key = (
+                prediction_cache.weights_digest(run_entry["weights_path"]),
+                pixel_digest(input_tensor),
+            )
+        except OSError:
+            cache_key = None
+        else:
+            logits = prediction_cache.get(cache_key)
+    cached = logits is not None
+    if not cached:
+        try:
+            logits = inference_batcher.infer(f"{model_id or run_id}:{variant}", model, input_tensor)
+        except Exception:
+            logger.exception(f"Inference failed for {model_id or run_id}")
+            return {"error": "Inference failed."}, 500
+        if cache_key is not None:
+            prediction_cache.put(cache_key, logits)
+    if logits.dim() == 1:
+        logits = logits.unsqueeze(0)
+    probabilities = torch.softmax(logits, dim=1).squeeze(0)
 
     predicted_label = int(probabilities.argmax().item())
-    
+
     # Get the dataset type from the run entry to determine the correct class labels
-    run_entry = store.get_run(run_id)
     dataset_type = run_entry.get("hyperparams", {}).get("dataset_type", "mnist")
-    
-    # Get the appropriate class labels based on dataset type
-    if dataset_type == "emnist":
-        from utils.validation import EMNIST_CLASS_LABELS
-        class_labels = EMNIST_CLASS_LABELS
-    else:  # Default to MNIST
-        from utils.validation import MNIST_CLASS_LABELS
-        class_labels = MNIST_CLASS_LABELS
-    
+    class_labels = _class_labels(dataset_type)
+
     predicted_char = class_labels[predicted_label]
     response = {
         "run_id": run_id,
+        "model_id": run_entry.get("model_id"),
         "label": predicted_label,
         "prediction": predicted_char,
         "probabilities": [float(p) for p in probabilities.tolist()],
-        "dataset_type": dataset_type
+        "dataset_type": dataset_type,
+        "variant": variant,
+        "backend": run_entry["backend"],
+        "cached": cached,
     }
+    return response, 200
+
+
+@app.route("/api/infer/batch", methods=["POST"])
+def infer_batch():
+    """Classify many 28x28 images in one forward pass.
+
+    Send either a JSON body ``{"run_id", "images", "top_k", "variant"}``
+    where ``images`` is a base64 raw uint8 buffer or ``.npy`` blob, or the
+    raw buffer / ``.npy`` bytes themselves as ``application/octet-stream``
+    with ``run_id``, ``top_k`` and ``variant`` as query parameters. A saved
+    model can be addressed by ``model_id`` instead of ``run_id``.
+    """
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return _error_response("Payload must be a JSON object.")
+        run_id = payload.get("run_id")
+        model_id = payload.get("model_id")
+        top_k = payload.get("top_k", 3)
+        variant = payload.get("variant", "fp32")
+        encoded = payload.get("images")
+        if not isinstance(encoded, str) or not encoded:
+            return _error_response("`images` must be a base64 string.", status=400)
+        try:
+            data = base64.b64decode(encoded, validate=True)
+        except (binascii.Error, ValueError):
+            return _error_response("`images` is not valid base64.", status=422)
+    else:
+        run_id = request.args.get("run_id")
+        model_id = request.args.get("model_id")
+        top_k = request.args.get("top_k", 3)
+        variant = request.args.get("variant", "fp32")
+        data = request.get_data(cache=False)
+
+    try:
+        validate_inference_target(run_id, model_id)
+    except ValueError as exc:
+        return _error_response(str(exc), status=400)
+    if variant not in INFERENCE_VARIANTS:
+        return _error_response("`variant` must be 'fp32' or 'int8'.", status=400)
+    try:
+        top_k = int(top_k)
+    except (TypeError, ValueError):
+        return _error_response("`top_k` must be an integer.", status=400)
 
+    try:
+        input_tensor = tensor_from_image_buffer(data, max_images=MAX_BATCH_INFER_IMAGES)
+    except ValueError as exc:
+        return _error_response(str(exc), status=422)
+
+    run_entry, model, error = _load_inference_model(run_id, variant, model_id=model_id)
+    if error is not None:
+        return _error_response(*error)
+
+    with torch.no_grad():
+        logits = model(input_tensor)
+        if logits.dim() == 1:
+            logits = logits.unsqueeze(0)
+        probabilities = torch.softmax(logits, dim=1)
+        top_k = max(1, min(top_k, probabilities.size(1)))
+        top_probs, top_labels = probabilities.topk(top_k, dim=1)
+
+    dataset_type = run_entry.get("hyperparams", {}).get("dataset_type", "mnist")
+    class_labels = _class_labels(dataset_type)
+    predictions = []
+    for labels, probs in zip(top_labels.tolist(), top_probs.tolist()):
+        predictions.append(
+            {
+                "label": labels[0],
+                "prediction": class_labels[labels[0]],
+                "top_k": [
+                    {"label": label, "prediction": class_labels[label], "probability": prob}
+                    for label, prob in zip(labels, probs)
+                ],
+            }
+        )
+
+    response = {
+        "run_id": run_id,
+        "model_id": run_entry.get("model_id"),
+        "dataset_type": dataset_type,
+        "variant": variant,
+        "backend": run_entry["backend"],
+        "count": len(predictions),
+        "predictions": predictions,
+    }
     return jsonify(response), 200
 
 
+def _stream_event_queue(event_queue):
+    while True:
+        try:
+            item = event_queue.get(timeout=1.0)
+        except queue.Empty:
+            yield ": keep-alive\n\n"
+            continue
+        if item is None:
+            break
+        yield _format_sse(item["event"], item["data"])
+
+
+def _metric_replay_args():
+    """``?since=N`` skips the first N metrics of a replay and
+    ``?max_points=M`` thins it to M evenly spaced entries."""
+    values = {}
+    for name in ("since", "max_points"):
+        try:
+            values[name] = max(0, int(request.args.get(name, 0)))
+        except ValueError:
+            raise ValueError(f"`{name}` must be an integer.")
+    return values["since"], values["max_points"]
+
+
 @app.route("/api/runs/<run_id>/events", methods=["GET"])
 def stream_run_events(run_id):
     run = store.get_run(run_id)
@@ -712,10 +1217,14 @@ def stream_run_events(run_id):
 
     if run is None:
         return _error_response("Unknown run_id.", status=404)
+    try:
+        since, max_points = _metric_replay_args()
+    except ValueError as exc:
+        return _error_response(str(exc))
 
     def event_generator():
         if event_queue is None:
-            for metric in run.get("metrics", []):
+            for metric in store.get_run_metrics(run_id, start=since, max_points=max_points):
                 yield _format_sse("metric", {"run_id": run_id, **metric})
             yield _format_sse(
                 "state",
@@ -728,20 +1237,86 @@ def stream_run_events(run_id):
             )
             return
 
-        while True:
-            try:
-                item = event_queue.get(timeout=1.0)
-            except queue.Empty:
-                yield ": keep-alive\n\n"
-                continue
-            if item is None:
-                break
-            yield _format_sse(item["event"], item["data"])
+        yield from _stream_event_queue(event_queue)
 
     return Response(
         stream_with_context(event_generator()), mimetype="text/event-stream"
     )
 
 
+@app.route("/api/sweeps/<sweep_id>/events", methods=["GET"])
+def stream_sweep_events(sweep_id):
+    sweep = store.get_sweep(sweep_id)
+    event_queue = store.get_event_queue(sweep_id)
+
+    if sweep is None:
+        return _error_response("Unknown sweep_id.", status=404)
+    try:
+        since, max_points = _metric_replay_args()
+    except ValueError as exc:
+        return _error_response(str(exc))
+
+    def event_generator():
+        if event_queue is not None:
+            yield from _stream_event_queue(event_queue)
+            return
+
+        for trial_id in sweep["trial_ids"]:
+            trial = store.get_run(trial_id) or {}
+            for metric in store.get_run_metrics(trial_id, start=since, max_points=max_points):
+                yield _format_sse(
+                    "metric",
+                    {"sweep_id": sweep_id, "run_id": trial_id, "trial_id": trial_id, **metric},
+                )
+            yield _format_sse(
+                "state",
+                {
+                    "sweep_id": sweep_id,
+                    "run_id": trial_id,
+                    "trial_id": trial_id,
+                    "state": trial.get("state"),
+                    "test_accuracy": trial.get("test_accuracy"),
+                },
+            )
+        yield _format_sse(
+            "state",
+            {
+                "sweep_id": sweep_id,
+                "state": sweep.get("state"),
+                "best_trial_id": sweep.get("best_trial_id"),
+                "best_test_accuracy": sweep.get("best_test_accuracy"),
+                "error": sweep.get("error"),
+            },
+        )
+
+    return Response(
+        stream_with_context(event_generator()), mimetype="text/event-stream"
+    )
+
+
+# ``python api.py`` serves through the debug reloader: that process only
+# watches files and re-runs this module in a child that handles requests.
+DEV_SERVER_RELOADER = True
+
+
+def _serves_requests() -> bool:
+    """False in processes that import this module without handling requests:
+    the reloader's file-watching parent and spawned training workers, which
+    re-import ``__main__``."""
+    if multiprocessing.parent_process() is not None:
+        return False
+    return not (__name__ == "__main__" and DEV_SERVER_RELOADER and not is_running_from_reloader())
+
+
+live_inference.register_handlers(socketio, _predict_single)
+if _serves_requests():
+    interrupted = store.recover_interrupted()
+    if interrupted:
+        logger.info(f"Marked {interrupted} runs interrupted by the last shutdown as failed")
+    warm_pool.start(inference_cache, _inference_loader)
+
+
 if __name__ == "__main__":
-    socketio.run(app, debug=True, port=8080, allow_unsafe_werkzeug=True)
+    socketio.run(
+        app, debug=True, use_reloader=DEV_SERVER_RELOADER, port=8080, allow_unsafe_werkzeug=True
+    )
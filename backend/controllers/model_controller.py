@@ -7,6 +7,8 @@ from utils.response import error_response
 
 from flask import Blueprint, jsonify, request
 
+from services.evaluation import evaluation_jobs
+from services.inference_backends import INFERENCE_BACKENDS
 from store import store
 
 model_bp = Blueprint("model", __name__)
@@ -24,14 +26,17 @@ def _model_file_path(model_id: str) -> Path:
     return MODEL_SAVE_DIR / f"model_{model_id}.pkl"
 
 
-def _build_model_summary(model_entry: dict, include_runs: bool = False) -> dict:
-    model_copy = copy.deepcopy(model_entry)
-    runs = store.list_runs(model_copy["model_id"])
-    runs_copy = [copy.deepcopy(run) for run in runs]
+def _build_model_summary(model_entry: dict, include_runs: bool = False, max_points: int = 0) -> dict:
+    # Store records are read-only on both backends, nested values included;
+    # a shallow copy is enough to add the summary fields.
+    model_copy = dict(model_entry)
+    runs = store.list_runs(
+        model_copy["model_id"], with_metrics=include_runs, max_points=max_points
+    )
 
-    model_copy["runs_total"] = len(runs_copy)
+    model_copy["runs_total"] = len(runs)
 
-    succeeded_runs = [run for run in runs_copy if run.get("state") == "succeeded"]
+    succeeded_runs = [run for run in runs if run.get("state") == "succeeded"]
     if succeeded_runs:
         succeeded_runs.sort(
             key=lambda r: r.get("completed_at") or r.get("created_at") or "",
@@ -73,7 +78,7 @@ def _build_model_summary(model_entry: dict, include_runs: bool = False) -> dict:
             model_copy["saved_model_path"] = str(expected_path)
 
     if include_runs:
-        model_copy["runs"] = runs_copy
+        model_copy["runs"] = runs
 
     return model_copy
 
@@ -118,6 +123,12 @@ def create_model():
     if hyperparams is not None and not isinstance(hyperparams, dict):
         return error_response("`hyperparams` must be an object.", status=422)
 
+    inference_backend = payload.get("inference_backend")
+    if inference_backend is not None and inference_backend not in INFERENCE_BACKENDS:
+        return error_response(
+            f"`inference_backend` must be one of {', '.join(INFERENCE_BACKENDS)}.", status=422
+        )
+
     existing_model = store.get_model(model_id)
     created = existing_model is None
 
@@ -146,6 +157,7 @@ def create_model():
             "trained": trained,
             "saved_model_path": str(model_file) if trained else None,
             "last_trained_at": last_trained_at,
+            "inference_backend": inference_backend,
         }
         store.add_model(model_id, model_data)
         model_entry = model_data
@@ -160,6 +172,9 @@ def create_model():
         if hyperparams is not None:
             updates["hyperparams"] = copy.deepcopy(hyperparams)
 
+        if "inference_backend" in payload:
+            updates["inference_backend"] = inference_backend
+
         if "trained" in payload:
             updates["trained"] = bool(payload["trained"])
 
@@ -203,6 +218,44 @@ def get_model(id: str):
     model_entry = store.get_model(id)
     if model_entry is None:
         return error_response("Unknown model_id.", status=404)
+    try:
+        max_points = max(0, int(request.args.get("max_points", 0)))
+    except ValueError:
+        return error_response("`max_points` must be an integer.")
 
-    summary = _build_model_summary(model_entry, include_runs=True)
+    summary = _build_model_summary(model_entry, include_runs=True, max_points=max_points)
     return jsonify(summary), 200
+
+
+def _evaluation_target(model_id: str):
+    """Return ``(model_entry, weights_path, dataset_type, None)`` or an error response."""
+    model_entry = store.get_model(model_id)
+    if model_entry is None:
+        return None, None, None, error_response("Unknown model_id.", status=404)
+    saved_path = _build_model_summary(model_entry).get("saved_model_path")
+    if not saved_path or not Path(saved_path).exists():
+        return None, None, None, error_response("Model has no trained weights.", status=409)
+    dataset_type = (model_entry.get("hyperparams") or {}).get("dataset_type", "mnist")
+    return model_entry, Path(saved_path), dataset_type, None
+
+
+@model_bp.route("/api/models/<id>/evaluate", methods=["POST"])
+def evaluate_model(id: str):
+    """Start (or reuse) a full test-split evaluation of the model's weights."""
+    model_entry, weights_path, dataset_type, error = _evaluation_target(id)
+    if error is not None:
+        return error
+    job = evaluation_jobs.submit(model_entry.get("architecture", {}), weights_path, dataset_type)
+    status = 200 if job["state"] == "succeeded" else 202
+    return jsonify({"model_id": id, **job}), status
+
+
+@model_bp.route("/api/models/<id>/evaluation", methods=["GET"])
+def get_model_evaluation(id: str):
+    _, weights_path, dataset_type, error = _evaluation_target(id)
+    if error is not None:
+        return error
+    job = evaluation_jobs.get(weights_path, dataset_type)
+    if job is None:
+        return error_response("Model has not been evaluated; POST /api/models/<id>/evaluate.", status=404)
+    return jsonify({"model_id": id, **job}), 200
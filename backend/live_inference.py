@@ -0,0 +1,179 @@
+import base64
+import binascii
+import threading
+
+import torch
+from flask import request as flask_request
+from flask_socketio import SocketIO, emit
+
+from utils.validation import IMAGE_FLATTENED_SIZE, validate_inference_target
+
+NAMESPACE = "/infer"
+DEFAULT_DEBOUNCE_MS = 30
+MAX_DEBOUNCE_MS = 1000
+
+_clients = {}  # sid -> {run_id, model_id, canvas, version, predicted_version, debounce, timer}
+_clients_lock = threading.Lock()
+
+
+def _decode_frame(frame):
+    """Accept a 784-byte uint8 frame as binary or a base64 string."""
+    if isinstance(frame, str):
+        try:
+            frame = base64.b64decode(frame, validate=True)
+        except (binascii.Error, ValueError):
+            return None
+    if not isinstance(frame, (bytes, bytearray)) or len(frame) != IMAGE_FLATTENED_SIZE:
+        return None
+    return torch.frombuffer(bytearray(frame), dtype=torch.uint8).clone()
+
+
+def _parse_cells(cells):
+    """Parse a flat ``[index, value, index, value, ...]`` delta (values 0-255)
+    into ``(indices, values)``, or None if it is malformed."""
+    if not isinstance(cells, list) or len(cells) % 2:
+        return None
+    try:
+        delta = torch.tensor(cells, dtype=torch.int64).view(-1, 2)
+    except (TypeError, ValueError, RuntimeError):
+        return None
+    indices, values = delta[:, 0], delta[:, 1]
+    if len(delta) and (
+        indices.min() < 0 or indices.max() >= IMAGE_FLATTENED_SIZE
+        or values.min() < 0 or values.max() > 255
+    ):
+        return None
+    return indices, values.to(torch.uint8)
+
+
+def register_handlers(socketio: SocketIO, predict):
+    """Register the live inference channel on the ``/infer`` namespace.
+
+    Clients ``subscribe`` to a run or a saved model (``run_id`` or
+    ``model_id``, as for ``/api/infer``), then send ``strokes`` (a flat list of
+    ``index, value`` pairs for changed cells, or ``clear``) or whole
+    ``frame``s (784 raw uint8 bytes, binary or base64). The server keeps each
+    client's canvas and, at most once per debounce window, pushes a
+    ``prediction`` for its latest version. ``predict(run_id, tensor,
+    model_id=None)`` returns ``(payload, status)`` like ``/api/infer``.
+    """
+
+    def schedule(sid):
+        # Called with _clients_lock held.
+        client = _clients.get(sid)
+        if client is None or client["timer"] is not None:
+            return
+        client["timer"] = threading.Timer(client["debounce"], run_prediction, args=(sid,))
+        client["timer"].daemon = True
+        client["timer"].start()
+
+    def run_prediction(sid):
+        with _clients_lock:
+            client = _clients.get(sid)
+            if client is None:
+                return
+            client["timer"] = None
+            if client["version"] == client["predicted_version"]:
+                return
+            target = {"run_id": client["run_id"], "model_id": client["model_id"]}
+            version = client["version"]
+            client["predicted_version"] = version
+            inputs = client["canvas"].float().div(255).view(1, 1, 28, 28)
+
+        payload, status = predict(target["run_id"], inputs, model_id=target["model_id"])
+        if status != 200:
+            socketio.emit("inference_error", {**payload, **target}, to=sid, namespace=NAMESPACE)
+            return
+        socketio.emit("prediction", {**payload, "version": version}, to=sid, namespace=NAMESPACE)
+
+    @socketio.on("subscribe", namespace=NAMESPACE)
+    def handle_subscribe(data):
+        sid = flask_request.sid
+        data = data or {}
+        run_id = data.get("run_id")
+        model_id = data.get("model_id")
+        try:
+            validate_inference_target(run_id, model_id)
+        except ValueError as exc:
+            emit("inference_error", {"error": str(exc)})
+            return
+        target = {"run_id": run_id, "model_id": model_id}
+        try:
+            debounce_ms = float(data.get("debounce_ms", DEFAULT_DEBOUNCE_MS))
+        except (TypeError, ValueError):
+            emit("inference_error", {"error": "`debounce_ms` must be numeric."})
+            return
+        debounce_ms = min(max(debounce_ms, 0.0), MAX_DEBOUNCE_MS)
+
+        canvas = torch.zeros(IMAGE_FLATTENED_SIZE, dtype=torch.uint8)
+        # Validates the target and warms the model cache before strokes arrive.
+        payload, status = predict(run_id, canvas.float().view(1, 1, 28, 28), model_id=model_id)
+        if status != 200:
+            emit("inference_error", {**payload, **target})
+            return
+
+        with _clients_lock:
+            previous = _clients.get(sid)
+            if previous is not None and previous["timer"] is not None:
+                previous["timer"].cancel()
+            _clients[sid] = {
+                **target,
+                "canvas": canvas,
+                "version": 0,
+                "predicted_version": 0,
+                "debounce": debounce_ms / 1000,
+                "timer": None,
+            }
+        emit("subscribed", {**target, "dataset_type": payload["dataset_type"]})
+
+    @socketio.on("strokes", namespace=NAMESPACE)
+    def handle_strokes(data):
+        sid = flask_request.sid
+        data = data or {}
+        delta = _parse_cells(data.get("cells", []))
+        if delta is None:
+            emit("inference_error", {"error": "`cells` must be index/value pairs within the canvas."})
+            return
+        with _clients_lock:
+            client = _clients.get(sid)
+            if client is None:
+                emit("inference_error", {"error": "Subscribe to a run or model first."})
+                return
+            if data.get("clear"):
+                client["canvas"].zero_()
+            indices, values = delta
+            client["canvas"][indices] = values
+            client["version"] += 1
+            schedule(sid)
+
+    @socketio.on("frame", namespace=NAMESPACE)
+    def handle_frame(data):
+        sid = flask_request.sid
+        frame = data.get("frame") if isinstance(data, dict) else data
+        canvas = _decode_frame(frame)
+        with _clients_lock:
+            client = _clients.get(sid)
+            if client is None:
+                emit("inference_error", {"error": "Subscribe to a run or model first."})
+                return
+            if canvas is None:
+                emit("inference_error", {"error": f"`frame` must be {IMAGE_FLATTENED_SIZE} uint8 bytes."})
+                return
+            client["canvas"] = canvas
+            client["version"] += 1
+            schedule(sid)
+
+    @socketio.on("unsubscribe", namespace=NAMESPACE)
+    def handle_unsubscribe(data=None):
+        _drop_client(flask_request.sid)
+
+    @socketio.on("disconnect", namespace=NAMESPACE)
+    def handle_disconnect():
+        _drop_client(flask_request.sid)
+
+
+def _drop_client(sid):
+    with _clients_lock:
+        client = _clients.pop(sid, None)
+    if client is not None and client["timer"] is not None:
+        client["timer"].cancel()
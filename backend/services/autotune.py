@@ -0,0 +1,176 @@
+import logging
+import os
+import time
+
+import torch
+from torch import nn
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_CANDIDATES = (16, 32, 64, 128, 256, 512)
+# Prefer the smallest batch / fewest threads within this fraction of the best
+# throughput: benchmark noise is larger than that, and smaller batches
+# converge in fewer epochs while fewer threads leave cores for other runs.
+THROUGHPUT_TOLERANCE = 0.05
+
+
+def _memory_budget_bytes() -> int:
+    raw = os.environ.get("TRAINING_AUTOTUNE_MEMORY_MB")
+    try:
+        megabytes = int(raw) if raw else 2048
+    except ValueError:
+        megabytes = 2048
+    return max(1, megabytes) * 1024 * 1024
+
+
+def measure_train_throughput(model, criterion, inputs, targets, mixed_precision, channels_last, steps=3):
+    """Time a few forward/backward passes of ``model`` on one batch.
+
+    Returns samples/sec so different precisions, batch sizes and thread
+    counts can be compared. Buffers (e.g. BatchNorm running stats) and
+    gradients are restored afterwards; no optimizer step is taken.
+    """
+    saved_state = {key: value.detach().clone() for key, value in model.state_dict().items()}
+    model.train()
+    if channels_last:
+        model.to(memory_format=torch.channels_last)
+        if inputs.dim() == 4:
+            inputs = inputs.contiguous(memory_format=torch.channels_last)
+
+    def step():
+        model.zero_grad(set_to_none=True)
+        with torch.autocast("cpu", dtype=torch.bfloat16, enabled=mixed_precision):
+            loss = criterion(model(inputs), targets)
+        loss.backward()
+
+    step()  # warm-up
+    start = time.perf_counter()
+    for _ in range(steps):
+        step()
+    elapsed = time.perf_counter() - start
+
+    model.load_state_dict(saved_state)
+    model.zero_grad(set_to_none=True)
+    return round(inputs.size(0) * steps / elapsed, 1) if elapsed > 0 else 0
+
+
+def estimate_training_bytes(model, sample_input, batch_size: int) -> int:
+    """Rough peak memory of one training step at ``batch_size``.
+
+    Counts parameters four times (weights, gradients and up to two optimizer
+    buffers) plus every module output of a single-sample forward pass twice
+    (the saved activation and its gradient), scaled by the batch size.
+    """
+    param_bytes = sum(p.numel() * p.element_size() for p in model.parameters())
+    activation_bytes = [sample_input.numel() * sample_input.element_size()]
+
+    def record(_module, _inputs, output):
+        if isinstance(output, torch.Tensor):
+            activation_bytes.append(output.numel() * output.element_size())
+
+    hooks = [
+        module.register_forward_hook(record)
+        for module in model.modules()
+        if not list(module.children())
+    ]
+    try:
+        with torch.no_grad():
+            model(sample_input)
+    finally:
+        for hook in hooks:
+            hook.remove()
+    return param_bytes * 4 + sum(activation_bytes) * 2 * batch_size
+
+
+def _pick(results, tolerance=THROUGHPUT_TOLERANCE):
+    """Smallest setting whose throughput is within ``tolerance`` of the best."""
+    best = max(samples_per_sec for _, samples_per_sec in results)
+    return min(
+        setting for setting, samples_per_sec in results
+        if samples_per_sec >= best * (1 - tolerance)
+    )
+
+
+def _thread_candidates(max_threads: int):
+    candidates = {max_threads}
+    threads = 1
+    while threads < max_threads:
+        candidates.add(threads)
+        threads *= 2
+    return sorted(candidates)
+
+
+def autotune_training(
+    model, hyperparams, max_threads: int, input_shape=(1, 28, 28), adjust_threads: bool = True
+) -> dict:
+    """Pick ``batch_size`` and/or the torch thread count for a training run.
+
+    Only settings given as ``"auto"`` in ``hyperparams`` are tuned. Batch
+    sizes are benchmarked at ``max_threads`` first, skipping any whose
+    estimated memory exceeds ``TRAINING_AUTOTUNE_MEMORY_MB`` or that would
+    not fit twice into ``max_samples``; thread counts up to ``max_threads``
+    are then benchmarked at the chosen batch size. Returns the chosen
+    ``batch_size`` and ``num_threads`` plus the measurements behind them.
+
+    With ``adjust_threads`` False the torch thread count is never changed
+    (it is process-wide, and other runs share it): batch sizes are measured
+    at the current setting and ``num_threads`` is None.
+    """
+    mixed_precision = bool(hyperparams.get("mixed_precision", False))
+    channels_last = mixed_precision and any(isinstance(m, nn.Conv2d) for m in model.modules())
+    criterion = nn.CrossEntropyLoss()
+    generator = torch.Generator().manual_seed(0)
+    sample_input = torch.rand((1, *input_shape), generator=generator)
+    model.eval()
+    with torch.no_grad():
+        num_classes = model(sample_input).size(-1)
+
+    tune_batch = hyperparams["batch_size"] == "auto"
+    tune_threads = adjust_threads and hyperparams.get("num_threads") == "auto"
+    if isinstance(hyperparams.get("num_threads"), int):
+        max_threads = min(max_threads, hyperparams["num_threads"])
+    original_threads = torch.get_num_threads()
+    start = time.perf_counter()
+
+    def measure(batch_size, threads):
+        if adjust_threads:
+            torch.set_num_threads(threads)
+        inputs = torch.rand((batch_size, *input_shape), generator=generator)
+        targets = torch.randint(num_classes, (batch_size,), generator=generator)
+        return measure_train_throughput(
+            model, criterion, inputs, targets, mixed_precision, channels_last, steps=2
+        )
+
+    budget = _memory_budget_bytes()
+    max_samples = hyperparams.get("max_samples")
+    batch_results = []
+    if tune_batch:
+        for batch_size in BATCH_SIZE_CANDIDATES:
+            if batch_results and max_samples and batch_size * 2 > max_samples:
+                break
+            if batch_results and estimate_training_bytes(model, sample_input, batch_size) > budget:
+                break
+            batch_results.append((batch_size, measure(batch_size, max_threads)))
+        batch_size = _pick(batch_results)
+    else:
+        batch_size = hyperparams["batch_size"]
+
+    thread_results = []
+    if tune_threads:
+        for threads in _thread_candidates(max_threads):
+            thread_results.append((threads, measure(batch_size, threads)))
+        num_threads = _pick(thread_results)
+    else:
+        num_threads = max_threads if adjust_threads else None
+
+    if adjust_threads:
+        torch.set_num_threads(original_threads)
+    result = {
+        "batch_size": batch_size,
+        "num_threads": num_threads,
+        "batch_size_samples_per_sec": {str(size): rate for size, rate in batch_results},
+        "thread_samples_per_sec": {str(threads): rate for threads, rate in thread_results},
+        "tuning_time": round(time.perf_counter() - start, 2),
+    }
+    logger.info(f"Autotuned training settings: batch_size={batch_size}, num_threads={num_threads}")
+    return result
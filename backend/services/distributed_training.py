@@ -0,0 +1,199 @@
+import logging
+import multiprocessing
+import queue
+import socket
+import traceback
+
+import torch
+import torch.distributed as dist
+
+logger = logging.getLogger(__name__)
+
+
+def world_size() -> int:
+    """Number of ranks in the current process group, or 1 outside one."""
+    if dist.is_available() and dist.is_initialized():
+        return dist.get_world_size()
+    return 1
+
+
+def rank() -> int:
+    if dist.is_available() and dist.is_initialized():
+        return dist.get_rank()
+    return 0
+
+
+def all_reduce_sum(*tensors):
+    """Sum ``tensors`` in place across ranks; a no-op outside a process group."""
+    if world_size() > 1:
+        for tensor in tensors:
+            dist.all_reduce(tensor, op=dist.ReduceOp.SUM)
+    return tensors
+
+
+def broadcast_from_rank0(value):
+    """Return rank 0's ``value`` on every rank."""
+    if world_size() == 1:
+        return value
+    holder = [value]
+    dist.broadcast_object_list(holder, src=0)
+    return holder[0]
+
+
+class CollectiveCancel:
+    """Cancellation flag every rank agrees on.
+
+    Ranks call ``is_set`` at the same points of the training loop; every
+    ``interval`` calls they all-reduce their local flag so that one rank
+    seeing the cancel stops all of them at the same batch instead of leaving
+    the rest blocked in the next gradient all-reduce.
+    """
+
+    def __init__(self, event, interval: int = 8):
+        self._event = event
+        self._interval = interval
+        self._calls = 0
+        self._is_set = False
+
+    def is_set(self) -> bool:
+        if self._is_set:
+            return True
+        self._calls += 1
+        if self._calls % self._interval:
+            return False
+        local = self._event is not None and self._event.is_set()
+        flag = torch.tensor([1 if local else 0], dtype=torch.int32)
+        dist.all_reduce(flag, op=dist.ReduceOp.MAX)
+        self._is_set = bool(flag.item())
+        return self._is_set
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _rank_entry(
+    rank_index,
+    num_ranks,
+    init_method,
+    architecture,
+    hyperparams,
+    output_path,
+    num_threads,
+    events,
+    cancel_event,
+    checkpoint_path,
+    resume_from,
+):
+    from services.training_service import run_training_job
+
+    torch.set_num_threads(num_threads)
+    dist.init_process_group("gloo", init_method=init_method, rank=rank_index, world_size=num_ranks)
+    try:
+
+        def on_event(event_name, data):
+            if rank_index == 0:
+                events.put((event_name, data))
+
+        result = run_training_job(
+            architecture,
+            hyperparams,
+            output_path,
+            on_event,
+            cancel_event=CollectiveCancel(cancel_event),
+            checkpoint_path=checkpoint_path if rank_index == 0 else None,
+            resume_from=resume_from,
+        )
+        if rank_index == 0:
+            events.put(("result", result))
+    except Exception:
+        events.put(("error", {"rank": rank_index, "traceback": traceback.format_exc()}))
+    finally:
+        dist.destroy_process_group()
+
+
+def run_distributed_training_job(
+    architecture,
+    hyperparams,
+    output_path,
+    on_event,
+    cancel_event,
+    num_threads: int,
+    checkpoint_path=None,
+    resume_from=None,
+):
+    """Train one run with ``hyperparams["data_parallel_ranks"]`` local ranks.
+
+    Each rank is a spawned process joined to a gloo process group on
+    localhost; gradients are all-reduced by ``DistributedDataParallel`` and
+    every rank trains on its own shard of the split. Only rank 0 reports
+    events, writes checkpoints and persists weights, so callers see the same
+    single metric stream and result as from ``run_training_job``. The
+    ``num_threads`` budget is divided between the ranks. Blocks the calling
+    thread; a failure on any rank stops the others and is raised here.
+    """
+    num_ranks = hyperparams["data_parallel_ranks"]
+    context = multiprocessing.get_context("spawn")
+    events = context.Queue()
+    child_cancel = context.Event()
+    init_method = f"tcp://127.0.0.1:{_free_port()}"
+    threads_per_rank = max(1, num_threads // num_ranks)
+
+    processes = [
+        context.Process(
+            target=_rank_entry,
+            args=(
+                rank_index,
+                num_ranks,
+                init_method,
+                architecture,
+                hyperparams,
+                str(output_path),
+                threads_per_rank,
+                events,
+                child_cancel,
+                str(checkpoint_path) if checkpoint_path else None,
+                str(resume_from) if resume_from else None,
+            ),
+            name=f"training-rank-{rank_index}",
+            daemon=True,
+        )
+        for rank_index in range(num_ranks)
+    ]
+    for process in processes:
+        process.start()
+
+    result = None
+    error = None
+    try:
+        while result is None and error is None:
+            if cancel_event is not None and cancel_event.is_set():
+                child_cancel.set()
+            try:
+                event_name, data = events.get(timeout=0.25)
+            except queue.Empty:
+                dead = [p for p in processes if p.exitcode not in (None, 0)]
+                if dead:
+                    error = f"{dead[0].name} exited with code {dead[0].exitcode}"
+                elif all(p.exitcode == 0 for p in processes):
+                    error = "Training ranks exited without a result"
+                continue
+            if event_name == "result":
+                result = data
+            elif event_name == "error":
+                logger.error(f"Training rank {data['rank']} failed:\n{data['traceback']}")
+                error = data["traceback"].strip().splitlines()[-1]
+            else:
+                on_event(event_name, data)
+    finally:
+        for process in processes:
+            process.join(timeout=10 if error is None else 0)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+    if error is not None:
+        raise RuntimeError(f"Distributed training failed: {error}")
+    return result
@@ -0,0 +1,150 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import torch
+
+from services.graph_optimizer import build_inference_model
+from services.model_service import load_tensor_dataset
+from services.prediction_cache import prediction_cache
+from utils.validation import EMNIST_CLASS_LABELS, MNIST_CLASS_LABELS
+
+logger = logging.getLogger(__name__)
+
+EVALUATION_BATCH_SIZE = 1024
+MAX_CACHED_EVALUATIONS = 64
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name)
+    try:
+        return max(1, int(raw)) if raw else default
+    except ValueError:
+        return default
+
+
+def _utcnow_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def evaluate_on_test_split(architecture, weights_path, dataset_type, num_threads: int = 1) -> dict:
+    """Run the weights at ``weights_path`` over the full test split.
+
+    Batches of ``EVALUATION_BATCH_SIZE`` images are spread over
+    ``num_threads`` threads (forward passes release the GIL) and reduced into
+    one confusion matrix, with rows as true labels and columns as predictions.
+    """
+    model = build_inference_model(architecture, torch.load(weights_path, map_location="cpu"))
+    images, labels = load_tensor_dataset(dataset_type, train=False)
+    class_labels = EMNIST_CLASS_LABELS if dataset_type == "emnist" else MNIST_CLASS_LABELS
+    num_classes = len(class_labels)
+
+    def confusion_for(start):
+        batch = images[start:start + EVALUATION_BATCH_SIZE].float().div_(255)
+        with torch.no_grad():
+            predictions = model(batch).argmax(dim=1)
+        targets = labels[start:start + EVALUATION_BATCH_SIZE]
+        return torch.bincount(
+            targets * num_classes + predictions, minlength=num_classes * num_classes
+        )
+
+    starts = range(0, len(labels), EVALUATION_BATCH_SIZE)
+    with ThreadPoolExecutor(max_workers=num_threads, thread_name_prefix="evaluation") as pool:
+        counts = sum(
+            pool.map(confusion_for, starts),
+            torch.zeros(num_classes * num_classes, dtype=torch.int64),
+        )
+    confusion = counts.view(num_classes, num_classes)
+
+    correct = confusion.diagonal()
+    predicted = confusion.sum(dim=0)
+    support = confusion.sum(dim=1)
+    per_class = [
+        {
+            "label": index,
+            "prediction": class_labels[index],
+            "precision": round(float(correct[index]) / int(predicted[index]), 4) if predicted[index] else 0.0,
+            "recall": round(float(correct[index]) / int(support[index]), 4) if support[index] else 0.0,
+            "support": int(support[index]),
+        }
+        for index in range(num_classes)
+    ]
+    return {
+        "dataset_type": dataset_type,
+        "samples": int(support.sum()),
+        "accuracy": round(float(correct.sum()) / max(1, int(support.sum())), 4),
+        "per_class": per_class,
+        "confusion_matrix": confusion.tolist(),
+    }
+
+
+class EvaluationJobs:
+    """Background test-split evaluations, cached by weight file digest.
+
+    ``submit`` returns the finished evaluation straight from the cache when
+    the weights (by SHA-256, re-hashed only when the file's size or mtime
+    changes) and dataset were evaluated before, joins a job already running
+    for them, or queues a new one on a small worker pool.
+    """
+
+    def __init__(self, max_workers: int, threads_per_job: int, max_cached: int = MAX_CACHED_EVALUATIONS):
+        self.threads_per_job = threads_per_job
+        self.max_cached = max_cached
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="evaluation-job")
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()  # (digest, dataset_type) -> job dict
+
+    def submit(self, architecture, weights_path, dataset_type) -> dict:
+        key = (prediction_cache.weights_digest(weights_path), dataset_type)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job["state"] != "failed":
+                self._jobs.move_to_end(key)
+                return dict(job)
+            job = {
+                "weights_digest": key[0],
+                "dataset_type": dataset_type,
+                "state": "queued",
+                "created_at": _utcnow_iso(),
+                "completed_at": None,
+                "result": None,
+                "error": None,
+            }
+            self._jobs[key] = job
+            self._jobs.move_to_end(key)
+            while len(self._jobs) > self.max_cached:
+                oldest_key, oldest = next(iter(self._jobs.items()))
+                if oldest["state"] in ("queued", "running"):
+                    break
+                del self._jobs[oldest_key]
+            snapshot = dict(job)
+        self._executor.submit(self._run, key, architecture, str(weights_path))
+        return snapshot
+
+    def get(self, weights_path, dataset_type):
+        """The job for the current contents of ``weights_path``, if any."""
+        key = (prediction_cache.weights_digest(weights_path), dataset_type)
+        with self._lock:
+            job = self._jobs.get(key)
+            return dict(job) if job is not None else None
+
+    def _run(self, key, architecture, weights_path) -> None:
+        with self._lock:
+            self._jobs[key]["state"] = "running"
+        try:
+            result = evaluate_on_test_split(architecture, weights_path, key[1], self.threads_per_job)
+            updates = {"state": "succeeded", "result": result}
+        except Exception as exc:
+            logger.exception(f"Evaluating {weights_path} failed")
+            updates = {"state": "failed", "error": str(exc)}
+        with self._lock:
+            self._jobs[key].update(updates, completed_at=_utcnow_iso())
+
+
+evaluation_jobs = EvaluationJobs(
+    max_workers=_env_int("EVALUATION_MAX_WORKERS", 1),
+    threads_per_job=_env_int("EVALUATION_THREADS", max(1, (os.cpu_count() or 1) // 2)),
+)
@@ -0,0 +1,100 @@
+import copy
+import logging
+
+import torch
+from torch import nn
+from torch.nn.utils.fusion import fuse_conv_bn_eval, fuse_linear_bn_eval
+
+from services.model_service import ResidualBlock, build_model
+
+logger = logging.getLogger(__name__)
+
+EQUIVALENCE_RTOL = 1e-3
+EQUIVALENCE_ATOL = 1e-4
+EQUIVALENCE_BATCH = 4
+
+
+class FusedResidualBlock(nn.Module):
+    """Inference-only ``ResidualBlock`` with each BatchNorm folded into its conv."""
+
+    def __init__(self, block: ResidualBlock):
+        super().__init__()
+        self.conv1 = fuse_conv_bn_eval(block.conv1, block.bn1)
+        self.conv2 = fuse_conv_bn_eval(block.conv2, block.bn2)
+        self.skip = block.skip
+        self.relu = nn.ReLU()
+
+    def forward(self, x):
+        identity = self.skip(x)
+        out = self.relu(self.conv1(x))
+        out = self.conv2(out)
+        return self.relu(out + identity)
+
+
+def _fuse_layers(layers):
+    """Fold BatchNorm into the preceding Conv2d/Linear and drop Dropout."""
+    fused = []
+    for layer in layers:
+        if isinstance(layer, nn.Dropout):
+            continue
+        previous = fused[-1] if fused else None
+        if isinstance(layer, nn.BatchNorm2d) and type(previous) is nn.Conv2d:
+            fused[-1] = fuse_conv_bn_eval(previous, layer)
+        elif isinstance(layer, nn.BatchNorm1d) and type(previous) is nn.Linear:
+            fused[-1] = fuse_linear_bn_eval(previous, layer)
+        elif isinstance(layer, ResidualBlock):
+            fused.append(FusedResidualBlock(layer))
+        else:
+            fused.append(layer)
+    return fused
+
+
+def optimize_for_inference(model: nn.Sequential, example_input: torch.Tensor) -> nn.Module:
+    """Return a fused, inference-only copy of a trained ``build_model`` Sequential.
+
+    Dropout is removed, BatchNorm is folded into the Conv2d/Linear before it
+    (also inside residual blocks) and a trailing Softmax is dropped, so the
+    result returns logits; every caller softmaxes them itself. The copy is
+    checked against the original on ``example_input``; if the outputs diverge,
+    an unfused eval copy with only the trailing Softmax removed is returned
+    instead, so the result never ends in a Softmax.
+    """
+    model.eval()
+    layers = _fuse_layers(copy.deepcopy(list(model.children())))
+    softmax_elided = bool(layers) and isinstance(layers[-1], nn.Softmax)
+    if softmax_elided:
+        layers.pop()
+    optimized = nn.Sequential(*layers).eval()
+
+    with torch.no_grad():
+        expected = model(example_input)
+        actual = optimized(example_input)
+        if softmax_elided:
+            actual = torch.softmax(actual, dim=1)
+    if actual.shape != expected.shape or not torch.allclose(
+        actual, expected, rtol=EQUIVALENCE_RTOL, atol=EQUIVALENCE_ATOL
+    ):
+        logger.warning("Optimized inference graph diverged from the trained model; using it unfused")
+        layers = copy.deepcopy(list(model.children()))
+        if softmax_elided:
+            layers.pop()
+        return nn.Sequential(*layers).eval()
+    return optimized
+
+
+def example_input_for(architecture: dict, batch_size: int = EQUIVALENCE_BATCH) -> torch.Tensor:
+    generator = torch.Generator().manual_seed(0)
+    shape = (
+        batch_size,
+        architecture.get("input_channels", 1),
+        architecture.get("input_height", 28),
+        architecture.get("input_width", 28),
+    )
+    return torch.rand(shape, generator=generator)
+
+
+def build_inference_model(architecture: dict, state_dict) -> nn.Module:
+    """Build ``architecture``, load ``state_dict`` and optimize it for inference."""
+    model = build_model(architecture)
+    model.load_state_dict(state_dict)
+    return optimize_for_inference(model, example_input_for(architecture))
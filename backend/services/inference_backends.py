@@ -0,0 +1,223 @@
+import io
+import logging
+import os
+import time
+import warnings
+from pathlib import Path
+
+import torch
+
+from services.graph_optimizer import build_inference_model, example_input_for
+from services.model_compiler import jit_compile_lock
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_BACKENDS = ("eager", "torchscript", "onnx")
+EXPORT_BACKENDS = ("torchscript", "onnx")
+BACKEND_SUFFIXES = {"torchscript": ".ts.pt", "onnx": ".onnx"}
+
+
+def _env_backend(name: str, default: str) -> str:
+    raw = os.environ.get(name, "").strip().lower()
+    return raw if raw in INFERENCE_BACKENDS else default
+
+
+DEFAULT_INFERENCE_BACKEND = _env_backend("INFERENCE_BACKEND", "eager")
+
+
+def backend_artifact_path(weights_path, backend: str) -> Path:
+    """``model_<id>.pkl`` -> ``model_<id>.ts.pt`` / ``model_<id>.onnx``."""
+    weights_path = Path(weights_path)
+    return weights_path.with_name(weights_path.stem + BACKEND_SUFFIXES[backend])
+
+
+class OnnxRuntimeModel:
+    """Callable wrapper running an ONNX model on onnxruntime's CPU provider."""
+
+    def __init__(self, model):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = torch.get_num_threads()
+        self.session = onnxruntime.InferenceSession(
+            str(model) if isinstance(model, Path) else model,
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, inputs):
+        (logits,) = self.session.run(None, {self.input_name: inputs.detach().numpy()})
+        return torch.from_numpy(logits)
+
+    def eval(self):
+        return self
+
+
+def _torchscript_module(model, example_input):
+    with warnings.catch_warnings(), jit_compile_lock:
+        # torch.jit warns that it is deprecated in favour of torch.export.
+        warnings.simplefilter("ignore")
+        return torch.jit.freeze(torch.jit.trace(model, example_input).eval())
+
+
+def _onnx_bytes(model, example_input) -> bytes:
+    buffer = io.BytesIO()
+    # The TorchScript-based exporter traces the model, so it shares the lock.
+    with warnings.catch_warnings(), jit_compile_lock:
+        warnings.simplefilter("ignore")
+        torch.onnx.export(
+            model,
+            (example_input,),
+            buffer,
+            dynamo=False,
+            input_names=["input"],
+            output_names=["logits"],
+            dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        )
+    return buffer.getvalue()
+
+
+def _serialize(backend, model, example_input) -> bytes:
+    if backend == "torchscript":
+        buffer = io.BytesIO()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            torch.jit.save(_torchscript_module(model, example_input), buffer)
+        return buffer.getvalue()
+    return _onnx_bytes(model, example_input)
+
+
+def export_backends(architecture, weights_path, backends=EXPORT_BACKENDS) -> dict:
+    """Write each backend's artifact next to ``weights_path``.
+
+    Returns ``{backend: {"state": "ready", "path", "bytes"}}`` per backend, or
+    ``{"state": "failed", "error"}`` for one that could not be exported (e.g.
+    ``onnx`` not installed); the other backends are still exported.
+    """
+    model = build_inference_model(architecture, torch.load(weights_path, map_location="cpu"))
+    example_input = example_input_for(architecture, batch_size=1)
+    results = {}
+    for backend in backends:
+        output_path = backend_artifact_path(weights_path, backend)
+        try:
+            data = _serialize(backend, model, example_input)
+            tmp_path = output_path.with_suffix(".tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, output_path)
+        except Exception as exc:
+            logger.warning(f"{backend} export of {Path(weights_path).name} failed: {exc}")
+            results[backend] = {"state": "failed", "error": str(exc)}
+            continue
+        results[backend] = {"state": "ready", "path": str(output_path), "bytes": len(data)}
+    return results
+
+
+def backend_loader(backend: str):
+    """Loader for an exported artifact, for ``InferenceModelCache.get``."""
+    if backend == "torchscript":
+        def load(path):
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                return torch.jit.load(str(path), map_location="cpu").eval()
+
+        return load
+    if backend == "onnx":
+        return lambda path: OnnxRuntimeModel(Path(path))
+    return None
+
+
+def _latency_percentiles(model, inputs, iterations, warmup) -> dict:
+    timings = []
+    with torch.no_grad():
+        for _ in range(warmup):
+            model(inputs)
+        for _ in range(iterations):
+            start = time.perf_counter()
+            model(inputs)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "p50_ms": round(timings[len(timings) // 2] * 1000, 4),
+        "p99_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000, 4),
+    }
+
+
+def benchmark_backends(
+    architecture,
+    weights_path,
+    batch_size: int = 1,
+    iterations: int = 200,
+    warmup: int = 10,
+    backends=INFERENCE_BACKENDS,
+) -> dict:
+    """Compare p50/p99 forward latency of each backend on the same inputs.
+
+    Backends are built in memory from ``weights_path``, so nothing has to be
+    exported first. A backend that can't be built reports ``{"error"}``.
+    """
+    eager = build_inference_model(architecture, torch.load(weights_path, map_location="cpu"))
+    inputs = example_input_for(architecture, batch_size=batch_size)
+    reference = None
+    results = {}
+    for backend in backends:
+        try:
+            if backend == "eager":
+                model = eager
+            elif backend == "torchscript":
+                model = _torchscript_module(eager, inputs)
+            else:
+                model = OnnxRuntimeModel(_onnx_bytes(eager, inputs))
+            with torch.no_grad():
+                outputs = model(inputs)
+        except Exception as exc:
+            results[backend] = {"error": str(exc)}
+            continue
+        reference = outputs if reference is None else reference
+        results[backend] = {
+            **_latency_percentiles(model, inputs, iterations, warmup),
+            "max_abs_diff": round(float((outputs - reference).abs().max()), 6),
+        }
+    return {"batch_size": batch_size, "iterations": iterations, "backends": results}
+
+
+def main(argv=None):
+    """``python -m services.inference_backends WEIGHTS ARCHITECTURE_JSON``
+
+    ``ARCHITECTURE_JSON`` is an architecture object or a model/run record with
+    an ``architecture`` key (e.g. saved from ``GET /api/models/<id>``).
+    """
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Benchmark inference backends for saved weights.")
+    parser.add_argument("weights", help="Path to a model_<id>.pkl state dict")
+    parser.add_argument("architecture", help="JSON file with the architecture")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--backends", nargs="+", choices=INFERENCE_BACKENDS, default=list(INFERENCE_BACKENDS))
+    args = parser.parse_args(argv)
+
+    with open(args.architecture) as handle:
+        architecture = json.load(handle)
+    architecture = architecture.get("architecture", architecture)
+    report = benchmark_backends(
+        architecture,
+        args.weights,
+        batch_size=args.batch_size,
+        iterations=args.iterations,
+        backends=args.backends,
+    )
+    print(f"batch_size={report['batch_size']} iterations={report['iterations']}")
+    for backend, result in report["backends"].items():
+        if "error" in result:
+            print(f"{backend:12s} unavailable: {result['error']}")
+        else:
+            print(
+                f"{backend:12s} p50 {result['p50_ms']:8.3f} ms  p99 {result['p99_ms']:8.3f} ms"
+                f"  max|diff| {result['max_abs_diff']:.2e}"
+            )
+
+
+if __name__ == "__main__":
+    main()
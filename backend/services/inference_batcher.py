@@ -0,0 +1,132 @@
+import bisect
+import os
+import threading
+import time
+
+import torch
+
+QUEUE_WAIT_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.environ.get(name)
+    try:
+        return max(0.0, float(raw)) if raw else default
+    except ValueError:
+        return default
+
+
+class _Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+
+    def observe(self, value) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+
+    def snapshot(self) -> list:
+        """Bucket counts in order; ``le`` is the inclusive upper bound (None = overflow)."""
+        return [
+            {"le": bound, "count": count}
+            for bound, count in zip(list(self.bounds) + [None], self.counts)
+        ]
+
+
+class InferenceBatcher:
+    """Coalesces concurrent single-image forward passes on the same model.
+
+    The first request for a model opens a batch and waits up to
+    ``window_seconds`` for others to join (or until ``max_batch_size`` is
+    reached), then runs one forward pass for everyone in its own thread and
+    hands each caller its own row of logits. A zero window or a max batch
+    size of 1 disables batching.
+    """
+
+    def __init__(self, window_seconds: float, max_batch_size: int):
+        self.window_seconds = window_seconds
+        self.max_batch_size = max(1, int(max_batch_size))
+        self._lock = threading.Lock()
+        self._open = {}  # batch key -> batch collecting requests
+        self._requests = 0
+        self._batches = 0
+        self._queue_wait = _Histogram(QUEUE_WAIT_BUCKETS_MS)
+        self._batch_sizes = _Histogram(BATCH_SIZE_BUCKETS)
+
+    def infer(self, key, model, inputs):
+        """Return ``model(inputs)`` for a ``(1, ...)`` input, batched with
+        concurrent calls sharing ``key`` and ``model``."""
+        if self.window_seconds <= 0 or self.max_batch_size == 1:
+            started = time.perf_counter()
+            with torch.no_grad():
+                logits = model(inputs)
+            self._record([started], started, 1)
+            return logits
+
+        key = (key, id(model))
+        request = {"inputs": inputs, "enqueued": time.perf_counter(), "done": threading.Event()}
+        with self._lock:
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = {"model": model, "requests": [], "full": threading.Event()}
+                self._open[key] = batch
+            batch["requests"].append(request)
+            if len(batch["requests"]) >= self.max_batch_size:
+                # Closed: later requests open a new batch.
+                del self._open[key]
+                batch["full"].set()
+
+        if leader:
+            batch["full"].wait(self.window_seconds)
+            with self._lock:
+                if self._open.get(key) is batch:
+                    del self._open[key]
+            self._run(batch)
+        request["done"].wait()
+        if "error" in request:
+            raise request["error"]
+        return request["logits"]
+
+    def _run(self, batch) -> None:
+        requests = batch["requests"]
+        started = time.perf_counter()
+        try:
+            with torch.no_grad():
+                logits = batch["model"](torch.cat([request["inputs"] for request in requests]))
+            if logits.dim() == 1:
+                logits = logits.unsqueeze(0)
+            for index, request in enumerate(requests):
+                request["logits"] = logits[index:index + 1]
+        except Exception as exc:
+            for request in requests:
+                request["error"] = exc
+        finally:
+            self._record([request["enqueued"] for request in requests], started, len(requests))
+            for request in requests:
+                request["done"].set()
+
+    def _record(self, enqueued_times, started, batch_size) -> None:
+        with self._lock:
+            self._requests += batch_size
+            self._batches += 1
+            self._batch_sizes.observe(batch_size)
+            for enqueued in enqueued_times:
+                self._queue_wait.observe((started - enqueued) * 1000)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "window_ms": round(self.window_seconds * 1000, 3),
+                "max_batch_size": self.max_batch_size,
+                "requests": self._requests,
+                "batches": self._batches,
+                "queue_wait_ms": self._queue_wait.snapshot(),
+                "batch_size": self._batch_sizes.snapshot(),
+            }
+
+
+inference_batcher = InferenceBatcher(
+    window_seconds=_env_float("INFERENCE_BATCH_WINDOW_MS", 2.0) / 1000,
+    max_batch_size=int(_env_float("INFERENCE_MAX_BATCH", 32)),
+)
@@ -0,0 +1,113 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import torch
+
+from services.graph_optimizer import build_inference_model
+from services.model_compiler import architecture_hash
+
+
+def _env_megabytes(name: str, default: int) -> int:
+    raw = os.environ.get(name)
+    try:
+        return max(0, int(raw)) if raw else default
+    except ValueError:
+        return default
+
+
+def _module_bytes(model) -> int:
+    if not isinstance(model, torch.nn.Module):
+        return 0
+    return sum(
+        tensor.numel() * tensor.element_size()
+        for tensor in list(model.parameters()) + list(model.buffers())
+    )
+
+
+class InferenceModelCache:
+    """Process-wide LRU of loaded, eval-mode models for inference.
+
+    State-dict weights are loaded through ``build_inference_model``, so the
+    cached module is the fused, softmax-free graph returning logits.
+    Entries are keyed by the run or model id that owns the weights and are
+    only reused while the weight file path, its mtime and the architecture
+    hash still match, so retrained or moved weights are reloaded. Loaded
+    models are evicted least-recently-used once their parameter and buffer
+    bytes exceed ``max_bytes``; a single model larger than the budget is
+    served but not kept.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # owner id -> entry dict
+        self._bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, owner_id: str, model_path, architecture: dict, loader=None):
+        """Return the eval-mode model for ``owner_id``, loading it on a miss.
+
+        ``loader(model_path)`` builds the model for artifacts that are not a
+        plain state dict (e.g. the int8 TorchScript variant). Raises
+        ``FileNotFoundError`` if the weight file is gone and propagates load
+        errors from the loader or ``torch.load``/``load_state_dict``.
+        """
+        model_path = Path(model_path)
+        signature = (str(model_path), model_path.stat().st_mtime_ns, architecture_hash(architecture))
+
+        with self._lock:
+            entry = self._entries.get(owner_id)
+            if entry is not None and entry["signature"] == signature:
+                self._entries.move_to_end(owner_id)
+                self._stats["hits"] += 1
+                return entry["model"]
+            self._stats["misses"] += 1
+
+        if loader is not None:
+            model = loader(model_path)
+        else:
+            state_dict = torch.load(model_path, map_location="cpu")
+            model = build_inference_model(architecture, state_dict)
+            del state_dict
+        model.eval()
+
+        # Packed quantized weights, frozen TorchScript constants and ONNX
+        # sessions have no parameters; fall back to the artifact's file size.
+        size = _module_bytes(model) or model_path.stat().st_size
+        with self._lock:
+            self._discard_locked(owner_id)
+            if size <= self.max_bytes:
+                self._entries[owner_id] = {"model": model, "signature": signature, "bytes": size}
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    self._discard_locked(next(iter(self._entries)))
+                    self._stats["evictions"] += 1
+        return model
+
+    def invalidate(self, owner_id: str) -> None:
+        with self._lock:
+            if self._discard_locked(owner_id):
+                self._stats["invalidations"] += 1
+
+    def _discard_locked(self, owner_id: str) -> bool:
+        entry = self._entries.pop(owner_id, None)
+        if entry is None:
+            return False
+        self._bytes -= entry["bytes"]
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                **self._stats,
+            }
+
+
+inference_cache = InferenceModelCache(
+    max_bytes=_env_megabytes("INFERENCE_CACHE_MAX_MB", 256) * 1024 * 1024,
+)
@@ -0,0 +1,105 @@
+import math
+import threading
+from array import array
+
+MISSING_FLOAT = math.nan
+
+
+def downsample_indices(length: int, max_points: int) -> list:
+    """Evenly spaced indices into ``range(length)``, at most ``max_points`` of
+    them, always keeping the first and last entry."""
+    if max_points <= 0 or length <= max_points:
+        return list(range(length))
+    if max_points == 1:
+        return [length - 1]
+    step = (length - 1) / (max_points - 1)
+    return [round(i * step) for i in range(max_points)]
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and -(2 ** 63) <= value < 2 ** 63
+
+
+def _is_number(value) -> bool:
+    return _is_int(value) or isinstance(value, float)
+
+
+class _Column:
+    """One metric field: an ``array('q')`` of ints, promoted to ``array('d')``
+    on the first float and to a plain list on the first non-number, plus a
+    presence mask for entries that did not report the field."""
+
+    __slots__ = ("values", "present")
+
+    def __init__(self, length: int, value):
+        if _is_int(value):
+            self.values = array("q", bytes(8 * length))
+        elif isinstance(value, float):
+            self.values = array("d", [MISSING_FLOAT]) * length
+        else:
+            self.values = [None] * length
+        self.present = bytearray(length)
+
+    def append(self, value) -> None:
+        values = self.values
+        if isinstance(values, array):
+            if values.typecode == "q" and isinstance(value, float):
+                values = self.values = array("d", values)
+            elif not _is_number(value):
+                values = self.values = values.tolist()
+        values.append(value)
+        self.present.append(1)
+
+    def append_missing(self) -> None:
+        values = self.values
+        if not isinstance(values, array):
+            values.append(None)
+        else:
+            values.append(0 if values.typecode == "q" else MISSING_FLOAT)
+        self.present.append(0)
+
+
+class MetricsLog:
+    """Append-only, column-oriented log of one run's per-epoch metrics.
+
+    Each field is kept in its own typed array, so appending an epoch is O(1)
+    and does not copy earlier entries. ``rows`` rebuilds the metric dicts for
+    a slice, optionally downsampled for charting long runs.
+    """
+
+    def __init__(self, metrics=()):
+        self._lock = threading.Lock()
+        self._columns = {}  # field -> _Column, in first-seen order
+        self._length = 0
+        for metric in metrics:
+            self.append(metric)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def append(self, metric: dict) -> int:
+        """Append one entry and return its position."""
+        with self._lock:
+            for field, column in self._columns.items():
+                if field not in metric:
+                    column.append_missing()
+            for field, value in metric.items():
+                column = self._columns.get(field)
+                if column is None:
+                    column = self._columns[field] = _Column(self._length, value)
+                column.append(value)
+            self._length += 1
+            return self._length - 1
+
+    def rows(self, start: int = 0, stop=None, max_points: int = 0) -> list:
+        """Entries ``[start:stop]`` as dicts, thinned to ``max_points``."""
+        with self._lock:
+            start, stop, _ = slice(start, stop).indices(self._length)
+            positions = [start + i for i in downsample_indices(max(0, stop - start), max_points)]
+            columns = [
+                (field, column.values, column.present) for field, column in self._columns.items()
+            ]
+            return [
+                {field: values[p] for field, values, present in columns if present[p]}
+                for p in positions
+            ]
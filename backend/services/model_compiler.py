@@ -0,0 +1,105 @@
+import copy
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+import torch
+
+from services.model_service import build_model
+
+logger = logging.getLogger(__name__)
+
+# Only ``compile: true`` training builds through this cache. Inference loads
+# each saved model's own exported artifact (see inference_backends) instead.
+MAX_CACHED_ARCHITECTURES = 64
+
+_factory_cache = OrderedDict()  # architecture hash -> template ScriptModule, or None
+_factory_cache_lock = threading.Lock()
+_factory_stats = {"hits": 0, "misses": 0, "failures": 0}
+
+# torch.jit scripting/tracing is not thread-safe: concurrent traces corrupt
+# each other's graphs. Every TorchScript compile in the process takes this.
+jit_compile_lock = threading.Lock()
+
+
+def canonical_architecture(architecture: dict) -> dict:
+    """Reduce a sanitized architecture to the fields that shape the module graph."""
+    layers = []
+    for layer in architecture.get("layers", []):
+        canonical = {key: value for key, value in layer.items() if value is not None}
+        canonical["type"] = str(canonical.get("type", "")).lower()
+        layers.append(canonical)
+    return {"layers": layers}
+
+
+def architecture_hash(architecture: dict) -> str:
+    payload = json.dumps(
+        canonical_architecture(architecture), sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _script(model):
+    with jit_compile_lock:
+        return torch.jit.script(model)
+
+
+def _clone(template):
+    # Deep-copying a ScriptModule clones its parameters through autograd;
+    # detach them so the copy has leaf parameters an optimizer can step.
+    clone = copy.deepcopy(template)
+    for parameter in clone.parameters():
+        parameter.detach_().requires_grad_(True)
+    return clone
+
+
+def build_compiled_model(architecture: dict):
+    """Build a freshly initialised TorchScript module for ``architecture``.
+
+    The first build of an architecture scripts it and keeps the compiled
+    module as a template; later builds of the same canonical architecture
+    deep-copy the template and copy in new initial weights, skipping both
+    compilation and deserialization. Falls back to the eager
+    ``nn.Sequential`` if the architecture cannot be scripted.
+    """
+    key = architecture_hash(architecture)
+    model = build_model(architecture)
+
+    with _factory_cache_lock:
+        cached = key in _factory_cache
+        template = _factory_cache.get(key)
+        if cached:
+            _factory_cache.move_to_end(key)
+            _factory_stats["hits"] += 1
+        else:
+            _factory_stats["misses"] += 1
+
+    if cached:
+        if template is None:
+            return model
+        compiled = _clone(template)
+        compiled.load_state_dict(model.state_dict())
+        return compiled
+
+    try:
+        template = _script(model)
+        compiled = _clone(template)
+    except Exception as exc:
+        logger.warning(f"TorchScript compilation failed for architecture {key[:12]}: {exc}")
+        compiled, template = model, None
+        with _factory_cache_lock:
+            _factory_stats["failures"] += 1
+
+    with _factory_cache_lock:
+        _factory_cache[key] = template
+        _factory_cache.move_to_end(key)
+        while len(_factory_cache) > MAX_CACHED_ARCHITECTURES:
+            _factory_cache.popitem(last=False)
+    return compiled
+
+
+def compiled_model_cache_stats() -> dict:
+    with _factory_cache_lock:
+        return {"entries": len(_factory_cache), **_factory_stats}
@@ -1,9 +1,10 @@
+import io
+import threading
+import numpy as np
 import torch
 from torch import nn
-from torch.utils.data import DataLoader, random_split
 import math
-from torch.utils.data import Subset
-from torchvision import datasets, transforms
+from torchvision import datasets
 from pathlib import Path
 
 from utils.validation import DEFAULT_HYPERPARAMS, IMAGE_FLATTENED_SIZE
@@ -91,93 +92,146 @@ def build_model(architecture):
     return nn.Sequential(*layers)
 
 
-class EMNISTLettersDataset:
-    """Wrapper for EMNIST letters dataset to remap labels from 1-26 to 0-25 and fix orientation"""
-    def __init__(self, train=True, download=True, transform=None):
-        self.dataset = datasets.EMNIST(
-            root=str(EMNIST_DATA_ROOT),
-            split='letters',  # Contains only letters A-Z (labels 1-26)
-            train=train,
-            download=download,
-            transform=transform,
-        )
-
-    def __len__(self):
-        return len(self.dataset)
-
-    def __getitem__(self, idx):
-        image, label = self.dataset[idx]
-        # EMNIST images are rotated/transposed - fix orientation to match how users draw
-        # Transpose: swap rows and columns (rotate 90° counterclockwise then flip horizontally)
-        image = torch.transpose(image, 1, 2)
-        # Remap EMNIST labels from 1-26 to 0-25 to work with cross-entropy loss
-        adjusted_label = label - 1
-        return image, adjusted_label
+_DATASET_CACHE = {}
+_DATASET_CACHE_LOCK = threading.Lock()
 
 
-def _load_mnist_dataset(train: bool):
-    transform = transforms.Compose([transforms.ToTensor()])
+def _load_mnist_tensors(train: bool):
     try:
         dataset = datasets.MNIST(
             root=str(MNIST_DATA_ROOT),
             train=train,
             download=True,
-            transform=transform,
         )
     except Exception as exc:
         raise RuntimeError(f"Failed to load MNIST dataset: {exc}") from exc
-    return dataset
+    return dataset.data, dataset.targets
 
 
-def _load_emnist_dataset(train: bool):
-    transform = transforms.Compose([transforms.ToTensor()])
+def _load_emnist_tensors(train: bool):
     try:
-        dataset = EMNISTLettersDataset(
+        dataset = datasets.EMNIST(
+            root=str(EMNIST_DATA_ROOT),
+            split='letters',  # Contains only letters A-Z (labels 1-26)
             train=train,
             download=True,
-            transform=transform,
         )
     except Exception as exc:
         raise RuntimeError(f"Failed to load EMNIST dataset: {exc}") from exc
-    return dataset
+    # EMNIST images are rotated/transposed - fix orientation to match how users draw
+    # Transpose: swap rows and columns (rotate 90° counterclockwise then flip horizontally)
+    images = dataset.data.transpose(1, 2)
+    # Remap EMNIST labels from 1-26 to 0-25 to work with cross-entropy loss
+    labels = dataset.targets - 1
+    return images, labels
 
 
-def prepare_dataloaders(batch_size, train_split, shuffle, max_samples, seed, dataset_type="emnist"):
+def load_tensor_dataset(dataset_type: str = "emnist", train: bool = True):
+    """Return a split as ``(images, labels)`` tensors, loading it at most once per process.
+
+    ``images`` is a contiguous ``uint8`` tensor of shape ``(N, 1, 28, 28)`` and
+    ``labels`` an ``int64`` tensor of shape ``(N,)``.
+    """
+    key = (dataset_type.lower(), bool(train))
+    with _DATASET_CACHE_LOCK:
+        cached = _DATASET_CACHE.get(key)
+        if cached is None:
+            if key[0] == "mnist":
+                images, labels = _load_mnist_tensors(train)
+            else:  # Default to EMNIST
+                images, labels = _load_emnist_tensors(train)
+            cached = (
+                images.unsqueeze(1).contiguous(),
+                labels.to(torch.int64).contiguous(),
+            )
+            _DATASET_CACHE[key] = cached
+        return cached
+
+
+class TensorBatchLoader:
+    """Yields ``(inputs, targets)`` batches sliced from preloaded uint8 tensors.
+
+    Drop-in replacement for a ``DataLoader`` over the cached datasets: inputs are
+    scaled to ``[0, 1]`` float32 like ``transforms.ToTensor()``.
+    """
+
+    def __init__(self, images, labels, indices, batch_size, shuffle=False, generator=None):
+        self.images = images
+        self.labels = labels
+        self.indices = indices
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.generator = generator
+
+    def __len__(self):
+        return math.ceil(len(self.indices) / self.batch_size)
+
+    def shard(self, rank, num_ranks):
+        """Return rank ``rank``'s interleaved share of the indices.
+
+        Every rank gets the same number of samples (the remainder is dropped)
+        so data-parallel ranks run the same number of batches.
+        """
+        per_rank = len(self.indices) // num_ranks
+        indices = self.indices[rank::num_ranks][:per_rank]
+        return TensorBatchLoader(
+            self.images, self.labels, indices, self.batch_size, self.shuffle, self.generator
+        )
+
+    def subset(self, size, generator=None):
+        """Return an unshuffled loader over a fixed random ``size``-sample subset."""
+        chosen = torch.randperm(len(self.indices), generator=generator)[:size]
+        return TensorBatchLoader(self.images, self.labels, self.indices[chosen], self.batch_size)
+
+    def __iter__(self):
+        order = self.indices
+        if self.shuffle:
+            order = order[torch.randperm(len(order), generator=self.generator)]
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            yield self.images[batch].float().div_(255), self.labels[batch]
+
+
+def split_dataset(train_split, max_samples, seed, dataset_type="emnist", min_samples=2):
+    """Pick the training subset and split it into train/val index tensors.
+
+    Returns ``(images, labels, train_indices, val_indices, generator)`` where
+    ``generator`` is the seeded RNG to keep using for shuffling.
+    """
     generator = torch.Generator()
     if seed is not None:
         generator.manual_seed(seed)
 
-    if dataset_type.lower() == "mnist":
-        dataset = _load_mnist_dataset(train=True)
-    else:  # Default to EMNIST
-        dataset = _load_emnist_dataset(train=True)
-        
-    dataset_size = len(dataset)
+    images, labels = load_tensor_dataset(dataset_type, train=True)
+    dataset_size = len(labels)
 
     desired_samples = max_samples or dataset_size
-    desired_samples = max(desired_samples, batch_size * 2)
+    desired_samples = max(desired_samples, min_samples)
     desired_samples = min(desired_samples, dataset_size)
     desired_samples = max(2, desired_samples)
 
     if desired_samples < dataset_size:
         indices = torch.randperm(dataset_size, generator=generator)[:desired_samples]
-        dataset = Subset(dataset, indices.tolist())
+    else:
+        indices = torch.arange(dataset_size)
 
-    train_len = max(1, int(len(dataset) * train_split))
-    if train_len >= len(dataset):
-        train_len = len(dataset) - 1
-    val_len = max(1, len(dataset) - train_len)
+    train_len = max(1, int(len(indices) * train_split))
+    if train_len >= len(indices):
+        train_len = len(indices) - 1
 
-    train_dataset, val_dataset = random_split(
-        dataset, [train_len, val_len], generator=generator
-    )
+    indices = indices[torch.randperm(len(indices), generator=generator)]
+    return images, labels, indices[:train_len], indices[train_len:], generator
 
-    train_loader = DataLoader(
-        train_dataset, batch_size=batch_size, shuffle=shuffle, generator=generator
+
+def prepare_dataloaders(batch_size, train_split, shuffle, max_samples, seed, dataset_type="emnist"):
+    images, labels, train_indices, val_indices, generator = split_dataset(
+        train_split, max_samples, seed, dataset_type, min_samples=batch_size * 2
     )
-    val_loader = DataLoader(
-        val_dataset, batch_size=batch_size, shuffle=False, generator=generator
+
+    train_loader = TensorBatchLoader(
+        images, labels, train_indices, batch_size, shuffle=shuffle, generator=generator
     )
+    val_loader = TensorBatchLoader(images, labels, val_indices, batch_size, shuffle=False)
     return train_loader, val_loader
 
 
@@ -201,17 +255,132 @@ def configure_optimizer(optimizer_cfg, parameters):
     raise ValueError(f"Unsupported optimizer `{opt_type}`.")
 
 
+def configure_lr_scheduler(scheduler_cfg, optimizer, epochs, steps_per_epoch):
+    """Build the learning-rate scheduler described by ``scheduler_cfg``.
+
+    Returns ``(scheduler, per_batch)``; ``per_batch`` is True when the
+    scheduler must be stepped after every optimizer step rather than once per
+    epoch. ``(None, False)`` means a constant learning rate.
+    """
+    if not scheduler_cfg:
+        return None, False
+    scheduler_type = str(scheduler_cfg.get("type", "none")).lower()
+    if scheduler_type == "none":
+        return None, False
+    if scheduler_type == "step":
+        return (
+            torch.optim.lr_scheduler.StepLR(
+                optimizer,
+                step_size=int(scheduler_cfg.get("step_size", 1)),
+                gamma=float(scheduler_cfg.get("gamma", 0.1)),
+            ),
+            False,
+        )
+    if scheduler_type == "cosine":
+        return (
+            torch.optim.lr_scheduler.CosineAnnealingLR(
+                optimizer,
+                T_max=max(1, epochs),
+                eta_min=float(scheduler_cfg.get("eta_min", 0.0)),
+            ),
+            False,
+        )
+    if scheduler_type == "onecycle":
+        max_lr = scheduler_cfg.get("max_lr")
+        if max_lr is None:
+            max_lr = optimizer.param_groups[0]["lr"]
+        return (
+            torch.optim.lr_scheduler.OneCycleLR(
+                optimizer,
+                max_lr=float(max_lr),
+                total_steps=max(1, epochs * steps_per_epoch),
+                pct_start=float(scheduler_cfg.get("pct_start", 0.3)),
+                cycle_momentum=False,
+            ),
+            True,
+        )
+    raise ValueError(f"Unsupported lr scheduler `{scheduler_type}`.")
+
+
 def tensor_from_pixels(pixels):
     if not isinstance(pixels, (list, tuple)):
         raise ValueError("`pixels` must be a list of numbers.")
     if len(pixels) != IMAGE_FLATTENED_SIZE:
         raise ValueError(f"`pixels` must contain exactly {IMAGE_FLATTENED_SIZE} values.")
-    try:
-        flattened = [float(value) for value in pixels]
-    except (TypeError, ValueError) as exc:
-        raise ValueError("`pixels` must be numeric.") from exc
     side = int(round(math.sqrt(IMAGE_FLATTENED_SIZE)))
     if side * side != IMAGE_FLATTENED_SIZE:
         raise ValueError("Input size does not correspond to a square image.")
-    tensor = torch.tensor(flattened, dtype=torch.float32).view(1, 1, side, side)
-    return tensor
+    try:
+        tensor = torch.tensor(pixels, dtype=torch.float32)
+    except (TypeError, ValueError, RuntimeError):
+        # Slow path for values torch won't convert, such as numeric strings.
+        try:
+            tensor = torch.tensor([float(value) for value in pixels], dtype=torch.float32)
+        except (TypeError, ValueError) as exc:
+            raise ValueError("`pixels` must be numeric.") from exc
+    if tensor.dim() != 1:
+        raise ValueError("`pixels` must be numeric.")
+    return tensor.view(1, 1, side, side)
+
+
+NPY_MAGIC = b"\x93NUMPY"
+
+
+def _npy_header(data: bytes):
+    """Return ``(shape, dtype)`` from a ``.npy`` header without reading the array."""
+    buffer = io.BytesIO(data)
+    try:
+        version = np.lib.format.read_magic(buffer)
+        if version == (1, 0):
+            shape, _, dtype = np.lib.format.read_array_header_1_0(buffer)
+        else:
+            shape, _, dtype = np.lib.format.read_array_header_2_0(buffer)
+    except ValueError as exc:
+        raise ValueError(f"Invalid .npy payload: {exc}") from exc
+    return shape, dtype
+
+
+def tensor_from_image_buffer(data: bytes, max_images=None):
+    """Decode a batch of images from raw uint8 bytes or a ``.npy`` blob.
+
+    Raw buffers hold ``N * 784`` row-major bytes in 0-255. ``.npy`` arrays may
+    be uint8 (0-255) or floating point (0-1) with shape ``(N, 784)``,
+    ``(N, 28, 28)`` or ``(N, 1, 28, 28)``. The image count is checked against
+    ``max_images`` before the payload is decoded. Returns a float32
+    ``(N, 1, 28, 28)`` tensor in ``[0, 1]``, like ``TensorBatchLoader``.
+    """
+    side = int(round(math.sqrt(IMAGE_FLATTENED_SIZE)))
+    if data[:len(NPY_MAGIC)] == NPY_MAGIC:
+        shape, dtype = _npy_header(data)
+        if len(shape) < 2 or math.prod(shape[1:]) != IMAGE_FLATTENED_SIZE:
+            raise ValueError(f"Each image must contain exactly {IMAGE_FLATTENED_SIZE} values.")
+        count = shape[0]
+        if dtype != np.uint8 and not np.issubdtype(dtype, np.floating):
+            raise ValueError(
+                f"Unsupported .npy dtype `{dtype}`; use uint8 (0-255) or floating point (0-1)."
+            )
+    else:
+        if not data or len(data) % IMAGE_FLATTENED_SIZE:
+            raise ValueError(
+                f"Raw image buffers must be a non-empty multiple of {IMAGE_FLATTENED_SIZE} bytes."
+            )
+        count = len(data) // IMAGE_FLATTENED_SIZE
+
+    if count == 0:
+        raise ValueError("No images were provided.")
+    if max_images is not None and count > max_images:
+        raise ValueError(f"At most {max_images} images can be sent per request.")
+
+    if data[:len(NPY_MAGIC)] == NPY_MAGIC:
+        try:
+            array = np.load(io.BytesIO(data), allow_pickle=False)
+        except ValueError as exc:
+            raise ValueError(f"Invalid .npy payload: {exc}") from exc
+        array = array.reshape(-1, IMAGE_FLATTENED_SIZE)
+        if array.dtype == np.uint8:
+            tensor = torch.from_numpy(array).float().div_(255)
+        else:
+            tensor = torch.from_numpy(array.astype(np.float32))
+    else:
+        tensor = torch.frombuffer(bytearray(data), dtype=torch.uint8).float().div_(255)
+    return tensor.view(-1, 1, side, side)
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import torch
+
+PIXEL_LEVELS = 255
+QUANTIZED_LIMIT = 2 ** 30
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.environ.get(name)
+    try:
+        return max(0.0, float(raw)) if raw else default
+    except ValueError:
+        return default
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 hex digest of a file, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def pixel_digest(inputs: torch.Tensor) -> str:
+    """Hash of ``inputs`` quantized to 1/255 steps (the canvas resolution)."""
+    quantized = (
+        torch.nan_to_num(inputs.detach().float())
+        .mul(PIXEL_LEVELS)
+        .round_()
+        .clamp_(-QUANTIZED_LIMIT, QUANTIZED_LIMIT)
+        .to(torch.int32)
+    )
+    return hashlib.blake2b(quantized.numpy().tobytes(), digest_size=16).hexdigest()
+
+
+class PredictionCache:
+    """Bounded cache of model outputs keyed by (weights digest, input digest).
+
+    The weights digest is the SHA-256 of the served artifact, recomputed only
+    when its path, size or mtime changes; results for a digest are dropped as
+    soon as the file behind it changes. Entries also expire after
+    ``ttl_seconds`` and are evicted least-recently-used beyond
+    ``max_entries``. ``max_entries`` of 0 disables the cache.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max(0, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (weights digest, input digest) -> (expires_at, logits)
+        self._digests = {}  # weights path -> ((size, mtime_ns), digest)
+        self._stats = {"hits": 0, "misses": 0, "expirations": 0, "evictions": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def weights_digest(self, weights_path) -> str:
+        path = str(weights_path)
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            known = self._digests.get(path)
+        if known is not None and known[0] == signature:
+            return known[1]
+
+        digest = file_digest(Path(path))
+        with self._lock:
+            previous = self._digests.get(path)
+            self._digests[path] = (signature, digest)
+            if previous is not None and previous[1] != digest:
+                self._invalidate_locked(previous[1])
+        return digest
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            expires_at, logits = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return logits
+
+    def put(self, key, logits) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, logits.detach().clone())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _invalidate_locked(self, weights_digest: str) -> None:
+        stale = [key for key in self._entries if key[0] == weights_digest]
+        for key in stale:
+            del self._entries[key]
+        self._stats["invalidations"] += len(stale)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+
+prediction_cache = PredictionCache(
+    max_entries=int(_env_float("INFERENCE_RESULT_CACHE_MAX_ENTRIES", 4096)),
+    ttl_seconds=_env_float("INFERENCE_RESULT_CACHE_TTL_S", 300.0),
+)
@@ -0,0 +1,181 @@
+import copy
+import io
+import logging
+import os
+import time
+import warnings
+from pathlib import Path
+
+import torch
+from torch import nn
+
+from services.graph_optimizer import build_inference_model
+from services.model_compiler import jit_compile_lock
+from services.model_service import load_tensor_dataset, split_dataset
+
+logger = logging.getLogger(__name__)
+
+QUANTIZED_SUFFIX = ".int8.pt"
+DEFAULT_CALIBRATION_SAMPLES = 256
+EVAL_SAMPLES = 2000
+LATENCY_ITERATIONS = 100
+
+
+def quantized_path_for(weights_path) -> Path:
+    """``model_<id>.pkl`` -> ``model_<id>.int8.pt`` in the same directory."""
+    weights_path = Path(weights_path)
+    return weights_path.with_name(weights_path.stem + QUANTIZED_SUFFIX)
+
+
+def _make_padding_explicit(model: nn.Module) -> bool:
+    """Rewrite ``padding="same"/"valid"`` convs to numeric padding, which
+    quantized conv kernels require. Returns False if a conv can't be
+    expressed that way (even kernel with ``"same"``)."""
+    for module in model.modules():
+        if not isinstance(module, nn.Conv2d) or not isinstance(module.padding, str):
+            continue
+        if module.padding == "valid":
+            padding = (0, 0)
+        else:
+            totals = [d * (k - 1) for d, k in zip(module.dilation, module.kernel_size)]
+            if any(total % 2 for total in totals):
+                return False
+            padding = tuple(total // 2 for total in totals)
+        module.padding = padding
+        module._reversed_padding_repeated_twice = [p for p in reversed(padding) for _ in range(2)]
+    return True
+
+
+def _split_at_flatten(model: nn.Sequential):
+    """Split an inference Sequential into its conv trunk and its head."""
+    children = list(model.children())
+    for index, child in enumerate(children):
+        if isinstance(child, nn.Flatten):
+            return nn.Sequential(*children[:index]), nn.Sequential(*children[index:])
+    return None, model
+
+
+def _quantize(model: nn.Sequential, calibration_images):
+    """Static int8 for the conv trunk (Conv/BN/ReLU fused, calibrated on
+    ``calibration_images``), dynamic int8 for the Linear layers of the head.
+
+    Returns ``(quantized_model, static)`` where ``static`` tells whether the
+    conv trunk could be statically quantized.
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping, quantize_dynamic
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    model = copy.deepcopy(model).eval()
+    trunk, head = _split_at_flatten(model)
+    static = (
+        trunk is not None
+        and any(isinstance(module, nn.Conv2d) for module in trunk.modules())
+        and _make_padding_explicit(trunk)
+    )
+    with warnings.catch_warnings():
+        # torch.ao.quantization warns that it is moving to torchao.
+        warnings.simplefilter("ignore")
+        if static:
+            engine = "x86" if "x86" in torch.backends.quantized.supported_engines else "qnnpack"
+            torch.backends.quantized.engine = engine
+            prepared = prepare_fx(
+                trunk, get_default_qconfig_mapping(engine), (calibration_images[:1],)
+            )
+            with torch.no_grad():
+                for start in range(0, len(calibration_images), 64):
+                    prepared(calibration_images[start:start + 64])
+            trunk = convert_fx(prepared)
+        head = quantize_dynamic(head, {nn.Linear}, dtype=torch.qint8)
+    quantized = nn.Sequential(trunk, head) if trunk is not None else head
+    return quantized, static
+
+
+def _accuracy(model, images, labels) -> float:
+    correct = 0
+    with torch.no_grad():
+        for start in range(0, len(images), 256):
+            outputs = model(images[start:start + 256])
+            correct += int(outputs.argmax(1).eq(labels[start:start + 256]).sum())
+    return correct / max(1, len(labels))
+
+
+def _p50_latency_ms(model, sample) -> float:
+    timings = []
+    with torch.no_grad():
+        model(sample)  # warm-up
+        for _ in range(LATENCY_ITERATIONS):
+            start = time.perf_counter()
+            model(sample)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+def quantize_trained_model(
+    architecture,
+    hyperparams,
+    weights_path,
+    calibration_samples=DEFAULT_CALIBRATION_SAMPLES,
+):
+    """Write an int8 TorchScript variant of the weights at ``weights_path``.
+
+    Calibrates on the first ``calibration_samples`` images of the run's
+    validation split and compares the fp32 and int8 models on a slice of the
+    test split. Returns a report with accuracy delta, size reduction and
+    single-image latency speedup.
+    """
+    weights_path = Path(weights_path)
+    dataset_type = hyperparams.get("dataset_type", "emnist")
+    images, labels, _, val_indices, _ = split_dataset(
+        hyperparams.get("train_split", 0.9),
+        hyperparams.get("max_samples"),
+        hyperparams.get("seed"),
+        dataset_type,
+    )
+    calibration = images[val_indices[:calibration_samples]].float().div_(255)
+    test_images, test_labels = load_tensor_dataset(dataset_type, train=False)
+    eval_images = test_images[:EVAL_SAMPLES].float().div_(255)
+    eval_labels = test_labels[:EVAL_SAMPLES]
+
+    model = build_inference_model(architecture, torch.load(weights_path, map_location="cpu"))
+
+    quantized, static = _quantize(model, calibration)
+    buffer = io.BytesIO()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        with jit_compile_lock:
+            scripted = torch.jit.freeze(torch.jit.trace(quantized, calibration[:1]).eval())
+        torch.jit.save(scripted, buffer)
+    output_path = quantized_path_for(weights_path)
+    tmp_path = output_path.with_suffix(".tmp")
+    tmp_path.write_bytes(buffer.getvalue())
+    os.replace(tmp_path, output_path)
+
+    fp32_accuracy = _accuracy(model, eval_images, eval_labels)
+    int8_accuracy = _accuracy(scripted, eval_images, eval_labels)
+    fp32_bytes = weights_path.stat().st_size
+    int8_bytes = output_path.stat().st_size
+    fp32_latency = _p50_latency_ms(model, eval_images[:1])
+    int8_latency = _p50_latency_ms(scripted, eval_images[:1])
+    logger.info(f"Quantized {weights_path.name}: accuracy {fp32_accuracy:.4f} -> {int8_accuracy:.4f}")
+    return {
+        "path": str(output_path),
+        "static_conv": static,
+        "calibration_samples": len(calibration),
+        "eval_samples": len(eval_labels),
+        "fp32_accuracy": round(fp32_accuracy, 4),
+        "int8_accuracy": round(int8_accuracy, 4),
+        "accuracy_delta": round(int8_accuracy - fp32_accuracy, 4),
+        "fp32_bytes": fp32_bytes,
+        "int8_bytes": int8_bytes,
+        "size_reduction": round(1 - int8_bytes / fp32_bytes, 4) if fp32_bytes else 0.0,
+        "fp32_latency_ms": round(fp32_latency, 4),
+        "int8_latency_ms": round(int8_latency, 4),
+        "speedup": round(fp32_latency / int8_latency, 2) if int8_latency > 0 else None,
+    }
+
+
+def load_quantized_model(path):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return torch.jit.load(str(path), map_location="cpu").eval()
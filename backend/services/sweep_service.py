@@ -0,0 +1,355 @@
+import copy
+import itertools
+import math
+import random
+import time
+
+import torch
+from torch import nn
+
+from services.graph_optimizer import build_inference_model
+from services.model_service import TensorBatchLoader, build_model, split_dataset
+from services.training_service import (
+    collect_sample_predictions,
+    persist_model_weights,
+    train_with_torch,
+)
+from utils.validation import validate_hyperparams
+
+# Architectures made only of these layers have no per-model buffers that
+# change during training, so their trials can be stacked and vmapped.
+STACKABLE_LAYER_TYPES = {"linear", "flatten", "relu", "sigmoid", "tanh", "softmax", "dropout"}
+# Training options only ``train_with_torch`` implements. Trials that set any
+# of them train unstacked, so a trial's results don't depend on whether it
+# happened to share a group.
+UNSTACKABLE_HYPERPARAMS = (
+    "lr_scheduler",
+    "target_accuracy",
+    "early_stopping_patience",
+    "val_subset_size",
+    "mixed_precision",
+)
+
+
+def _apply_trial_params(base_hyperparams, params):
+    hyperparams = copy.deepcopy(base_hyperparams)
+    optimizer = dict(hyperparams["optimizer"])
+    if "optimizer" in params:
+        optimizer = {"type": params["optimizer"], "lr": optimizer.get("lr")}
+    if "lr" in params:
+        optimizer["lr"] = params["lr"]
+    if "momentum" in params:
+        optimizer["momentum"] = params["momentum"]
+    hyperparams["optimizer"] = optimizer
+    if "batch_size" in params:
+        hyperparams["batch_size"] = params["batch_size"]
+    return validate_hyperparams(hyperparams)
+
+
+def _sample_value(rng, values):
+    if isinstance(values, dict):
+        if values["log"]:
+            return math.exp(rng.uniform(math.log(values["min"]), math.log(values["max"])))
+        return rng.uniform(values["min"], values["max"])
+    return rng.choice(values)
+
+
+def expand_sweep_trials(base_hyperparams, sweep):
+    """Turn a validated sweep spec into one hyperparams dict per trial."""
+    keys = list(sweep["params"])
+    if sweep["mode"] == "grid":
+        combos = itertools.product(*(sweep["params"][key] for key in keys))
+        trial_params = [dict(zip(keys, combo)) for combo in combos]
+    else:
+        rng = random.Random(sweep["seed"])
+        trial_params = [
+            {key: _sample_value(rng, sweep["params"][key]) for key in keys}
+            for _ in range(sweep["num_trials"])
+        ]
+    trials = [_apply_trial_params(base_hyperparams, params) for params in trial_params]
+    if any(hyperparams["batch_size"] == "auto" for hyperparams in trials):
+        raise ValueError("`batch_size: \"auto\"` is not supported for sweeps; sweep over batch_size instead.")
+    return trials
+
+
+def can_stack(architecture) -> bool:
+    return all(
+        str(layer.get("type", "")).lower() in STACKABLE_LAYER_TYPES
+        for layer in architecture.get("layers", [])
+    )
+
+
+def can_stack_trial(hyperparams) -> bool:
+    return (
+        not any(hyperparams.get(key) for key in UNSTACKABLE_HYPERPARAMS)
+        and (hyperparams.get("val_every_epochs") or 1) == 1
+    )
+
+
+class StackedOptimizer:
+    """SGD or Adam over parameters stacked along dim 0, one slice per trial.
+
+    Each trial keeps its own lr/momentum (or betas/eps), so trials with
+    different optimizer settings can share one vmapped forward/backward pass.
+    Updates follow ``torch.optim.SGD`` (no dampening or nesterov) and
+    ``torch.optim.Adam`` (no weight decay).
+    """
+
+    def __init__(self, params, opt_type, optimizer_cfgs):
+        self.params = list(params)
+        self.opt_type = opt_type
+        self.step_count = 0
+
+        def per_trial(key, fallback):
+            return torch.tensor(
+                [float(cfg.get(key, fallback)) for cfg in optimizer_cfgs], dtype=torch.float32
+            )
+
+        self.lr = per_trial("lr", 0.1)
+        if opt_type == "sgd":
+            self.momentum = per_trial("momentum", 0.0)
+            self.buffers = [torch.zeros_like(p) for p in self.params]
+        else:
+            self.beta1 = per_trial("beta1", 0.9)
+            self.beta2 = per_trial("beta2", 0.999)
+            self.eps = per_trial("eps", 1e-8)
+            self.exp_avg = [torch.zeros_like(p) for p in self.params]
+            self.exp_avg_sq = [torch.zeros_like(p) for p in self.params]
+
+    @staticmethod
+    def _expand(values, like):
+        return values.view(-1, *([1] * (like.dim() - 1)))
+
+    def zero_grad(self):
+        for param in self.params:
+            param.grad = None
+
+    @torch.no_grad()
+    def step(self):
+        self.step_count += 1
+        for index, param in enumerate(self.params):
+            if param.grad is None:
+                continue
+            grad = param.grad
+            lr = self._expand(self.lr, param)
+            if self.opt_type == "sgd":
+                buf = self.buffers[index]
+                buf.mul_(self._expand(self.momentum, param)).add_(grad)
+                param.sub_(lr * buf)
+            else:
+                beta1 = self._expand(self.beta1, param)
+                beta2 = self._expand(self.beta2, param)
+                exp_avg = self.exp_avg[index]
+                exp_avg_sq = self.exp_avg_sq[index]
+                exp_avg.mul_(beta1).add_((1 - beta1) * grad)
+                exp_avg_sq.mul_(beta2).add_((1 - beta2) * grad * grad)
+                bias_correction1 = 1 - beta1 ** self.step_count
+                bias_correction2 = 1 - beta2 ** self.step_count
+                denom = (exp_avg_sq.sqrt() / bias_correction2.sqrt()).add_(
+                    self._expand(self.eps, param)
+                )
+                param.sub_(lr / bias_correction1 * exp_avg / denom)
+
+
+def _train_stacked_group(architecture, trials, train_loader, val_loader, on_event, should_cancel):
+    """Train several same-architecture MLP trials in one vmapped pass.
+
+    ``trials`` is a list of ``(trial_id, hyperparams)`` sharing batch size and
+    optimizer type. Returns ``{trial_id: (model, metrics)}``, or ``None`` if
+    cancelled.
+    """
+    from torch.func import functional_call, stack_module_state, vmap
+
+    hyperparams = trials[0][1]
+    if hyperparams["seed"] is not None:
+        torch.manual_seed(hyperparams["seed"])
+
+    models = [build_model(architecture) for _ in trials]
+    params, buffers = stack_module_state(models)
+    base = copy.deepcopy(models[0]).to("meta")
+
+    def call_single(trial_params, trial_buffers, inputs):
+        return functional_call(base, (trial_params, trial_buffers), (inputs,))
+
+    forward = vmap(call_single, in_dims=(0, 0, None), randomness="different")
+    optimizer = StackedOptimizer(
+        params.values(), hyperparams["optimizer"]["type"], [hp["optimizer"] for _, hp in trials]
+    )
+    criterion = nn.CrossEntropyLoss(reduction="none")
+    num_trials = len(trials)
+    epochs = hyperparams["epochs"]
+    metrics = [[] for _ in trials]
+    training_start_time = time.time()
+
+    def run_batch(inputs, targets):
+        outputs = forward(params, buffers, inputs)  # (trials, batch, classes)
+        losses = criterion(
+            outputs.reshape(-1, outputs.size(-1)), targets.repeat(num_trials)
+        ).view(num_trials, -1)
+        correct = outputs.argmax(-1).eq(targets.unsqueeze(0)).sum(1)
+        return losses.mean(1), correct
+
+    for epoch in range(1, epochs + 1):
+        epoch_start_time = time.time()
+        base.train()
+        train_loss_sum = torch.zeros(num_trials)
+        train_correct = torch.zeros(num_trials, dtype=torch.int64)
+        train_total = 0
+        for inputs, targets in train_loader:
+            if should_cancel():
+                return None
+            optimizer.zero_grad()
+            batch_loss, correct = run_batch(inputs, targets)
+            # Trials are independent, so the gradient of the summed loss
+            # w.r.t. each parameter slice is that trial's own gradient.
+            batch_loss.sum().backward()
+            optimizer.step()
+            train_loss_sum += batch_loss.detach() * inputs.size(0)
+            train_correct += correct
+            train_total += inputs.size(0)
+
+        base.eval()
+        val_loss_sum = torch.zeros(num_trials)
+        val_correct = torch.zeros(num_trials, dtype=torch.int64)
+        val_total = 0
+        with torch.no_grad():
+            for inputs, targets in val_loader:
+                if should_cancel():
+                    return None
+                batch_loss, correct = run_batch(inputs, targets)
+                val_loss_sum += batch_loss * inputs.size(0)
+                val_correct += correct
+                val_total += inputs.size(0)
+
+        epoch_time = time.time() - epoch_start_time
+        elapsed_time = time.time() - training_start_time
+        train_loss = (train_loss_sum / max(1, train_total)).tolist()
+        train_accuracy = (train_correct.double() / max(1, train_total)).tolist()
+        val_loss = (val_loss_sum / max(1, val_total)).tolist()
+        val_accuracy = (val_correct.double() / max(1, val_total)).tolist()
+        for index, (trial_id, trial_hyperparams) in enumerate(trials):
+            metric_entry = {
+                "epoch": epoch,
+                "train_loss": round(train_loss[index], 4),
+                "val_loss": round(val_loss[index], 4),
+                "train_accuracy": round(train_accuracy[index], 4),
+                "val_accuracy": round(val_accuracy[index], 4),
+                "learning_rate": round(trial_hyperparams["optimizer"]["lr"], 6),
+                "epoch_time": round(epoch_time, 2),
+                "samples_per_sec": round(train_total * num_trials / epoch_time, 1)
+                if epoch_time > 0
+                else 0,
+                "progress": round(epoch / epochs, 4),
+                "eta_seconds": round(elapsed_time / epoch * (epochs - epoch), 1),
+                "stacked_trials": num_trials,
+            }
+            metrics[index].append(metric_entry)
+            on_event("metric", {"run_id": trial_id, **metric_entry})
+
+    results = {}
+    for index, (trial_id, _) in enumerate(trials):
+        model = build_model(architecture)
+        state_dict = {key: value[index].detach().clone() for key, value in params.items()}
+        state_dict.update({key: value[index].clone() for key, value in buffers.items()})
+        model.load_state_dict(state_dict)
+        results[trial_id] = (model, metrics[index])
+    return results
+
+
+def run_sweep_job(architecture, trials, output_path_for, on_event, cancel_event=None):
+    """Train every trial of a sweep against one shared dataset split.
+
+    ``trials`` is a list of ``(trial_id, hyperparams)``. Trials of MLP-only
+    architectures that share batch size and optimizer type, and set none of
+    ``UNSTACKABLE_HYPERPARAMS``, are trained together as one stacked, vmapped
+    model; everything else trains one trial at a time. Events are reported through ``on_event(event_name, data)``
+    with ``data["run_id"]`` set to the trial id: ``running``, ``metric``, and
+    ``trial_done`` (carrying the trial's result). Returns True when cancelled.
+    """
+
+    def should_cancel():
+        return cancel_event is not None and cancel_event.is_set()
+
+    base = trials[0][1]
+    max_batch_size = max(hp["batch_size"] for _, hp in trials)
+    images, labels, train_indices, val_indices, _ = split_dataset(
+        base["train_split"],
+        base["max_samples"],
+        base["seed"],
+        base.get("dataset_type", "emnist"),
+        min_samples=max_batch_size * 2,
+    )
+
+    def make_loaders(hyperparams):
+        generator = torch.Generator()
+        if hyperparams["seed"] is not None:
+            generator.manual_seed(hyperparams["seed"])
+        train_loader = TensorBatchLoader(
+            images,
+            labels,
+            train_indices,
+            hyperparams["batch_size"],
+            shuffle=hyperparams["shuffle"],
+            generator=generator,
+        )
+        val_loader = TensorBatchLoader(images, labels, val_indices, hyperparams["batch_size"])
+        return train_loader, val_loader
+
+    def finish_trial(trial_id, model, metrics, val_loader):
+        saved_path = persist_model_weights(model, output_path_for(trial_id))
+        on_event(
+            "trial_done",
+            {
+                "run_id": trial_id,
+                "metrics": metrics,
+                "test_accuracy": metrics[-1]["val_accuracy"] if metrics else 0.0,
+                "sample_predictions": collect_sample_predictions(
+                    build_inference_model(architecture, model.state_dict()), val_loader, limit=8
+                ),
+                "saved_model_path": str(saved_path),
+            },
+        )
+
+    groups = {}
+    stackable = can_stack(architecture)
+    for index, (trial_id, hyperparams) in enumerate(trials):
+        if stackable and can_stack_trial(hyperparams):
+            key = (hyperparams["batch_size"], hyperparams["optimizer"]["type"])
+        else:
+            key = index
+        groups.setdefault(key, []).append((trial_id, hyperparams))
+
+    for group in groups.values():
+        if should_cancel():
+            return True
+        train_loader, val_loader = make_loaders(group[0][1])
+        for trial_id, _ in group:
+            on_event("running", {"run_id": trial_id})
+
+        if len(group) > 1:
+            results = _train_stacked_group(
+                architecture, group, train_loader, val_loader, on_event, should_cancel
+            )
+            if results is None:
+                return True
+            for trial_id, (model, metrics) in results.items():
+                finish_trial(trial_id, model, metrics, val_loader)
+            continue
+
+        trial_id, hyperparams = group[0]
+        model = build_model(architecture)
+        metrics, _, was_cancelled = train_with_torch(
+            model,
+            train_loader,
+            val_loader,
+            hyperparams,
+            on_checkpoint=lambda metric, trial_id=trial_id: on_event(
+                "metric", {"run_id": trial_id, **metric}
+            ),
+            cancel_event=cancel_event,
+        )
+        if was_cancelled:
+            return True
+        finish_trial(trial_id, model, metrics, val_loader)
+
+    return False
@@ -0,0 +1,215 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+import torch
+
+from services.training_service import EXECUTION_MODE
+
+logger = logging.getLogger(__name__)
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    raw = os.environ.get(name)
+    if not raw:
+        return default
+    try:
+        return max(1, int(raw))
+    except ValueError:
+        return default
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the training queue has no free slots."""
+
+
+class TrainingScheduler:
+    """Bounded FIFO of training jobs executed by a fixed pool of worker threads.
+
+    Each job is a callable taking the intra-op thread budget for its run. The
+    budget splits the host's cores evenly across workers so concurrent runs do
+    not oversubscribe the CPU. Torch's thread count is process-wide, so when
+    jobs train in this process (``in_process``) there is a single worker and
+    the count is set to its budget when it starts; worker processes apply
+    their own run's budget.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queued: int,
+        threads_per_run: Optional[int] = None,
+        in_process: bool = False,
+    ):
+        self.max_workers = max(1, int(max_workers))
+        if in_process and self.max_workers > 1:
+            logger.warning(
+                f"Training runs share this process's torch threads; running 1 at a time "
+                f"instead of {self.max_workers}. Set TRAINING_EXECUTION_MODE=process to "
+                "train runs concurrently."
+            )
+            self.max_workers = 1
+        self.in_process = in_process
+        self.max_queued = max(0, int(max_queued))
+        cpu_count = os.cpu_count() or 1
+        self.threads_per_run = threads_per_run or max(1, cpu_count // self.max_workers)
+
+        self._cond = threading.Condition()
+        self._pending = deque()
+        self._active = {}
+        self._durations = deque(maxlen=20)
+        self._workers = []
+
+    def _ensure_workers(self) -> None:
+        if not self._workers:
+            torch.set_num_threads(self.threads_per_run)
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"training-worker-{len(self._workers)}",
+                daemon=True,
+            )
+            self._workers.append(worker)
+            worker.start()
+
+    def submit(
+        self,
+        run_id: str,
+        fn: Callable[[int], None],
+        cancel_event: threading.Event,
+        on_queue_update: Optional[Callable[[int, Optional[float]], None]] = None,
+        on_cancel: Optional[Callable[[], None]] = None,
+    ) -> int:
+        """Enqueue a job and return its 1-based queue position. ``on_cancel``
+        is called instead of ``fn`` if the job is cancelled while queued."""
+        with self._cond:
+            if len(self._pending) >= self.max_queued:
+                raise QueueFullError("Training queue is full.")
+            self._ensure_workers()
+            job = {
+                "run_id": run_id,
+                "fn": fn,
+                "cancel_event": cancel_event,
+                "on_queue_update": on_queue_update,
+                "on_cancel": on_cancel,
+                "enqueued_at": time.time(),
+            }
+            self._pending.append(job)
+            position = len(self._pending)
+            self._publish_queue_locked()
+            self._cond.notify()
+        return position
+
+    def cancel(self, run_id: str) -> bool:
+        """Signal cancellation for a queued or running job.
+
+        Queued jobs are removed from the queue and never run; their
+        ``on_cancel`` records the cancelled state.
+        """
+        with self._cond:
+            job = self._active.get(run_id)
+            if job is not None:
+                job["cancel_event"].set()
+                return True
+            job = next((j for j in self._pending if j["run_id"] == run_id), None)
+            if job is None:
+                return False
+            job["cancel_event"].set()
+            self._pending.remove(job)
+            self._publish_queue_locked()
+        if job["on_cancel"] is not None:
+            try:
+                job["on_cancel"]()
+            except Exception:
+                logger.exception(f"Cancelling queued job {run_id} failed")
+        return True
+
+    def queue_info(self, run_id: str) -> Optional[dict]:
+        """Return the current queue position and ETA of a pending job."""
+        with self._cond:
+            for index, job in enumerate(self._pending):
+                if job["run_id"] == run_id:
+                    return {
+                        "queue_position": index + 1,
+                        "eta_seconds": self._eta_locked(index),
+                    }
+        return None
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "max_workers": self.max_workers,
+                "max_queued": self.max_queued,
+                "threads_per_run": self.threads_per_run,
+                "running": list(self._active.keys()),
+                "queued": [job["run_id"] for job in self._pending],
+                "avg_run_seconds": self._avg_duration_locked(),
+            }
+
+    def _avg_duration_locked(self) -> Optional[float]:
+        if not self._durations:
+            return None
+        return round(sum(self._durations) / len(self._durations), 1)
+
+    def _eta_locked(self, index: int) -> Optional[float]:
+        avg = self._avg_duration_locked()
+        if avg is None:
+            return None
+        now = time.time()
+        # Jobs beyond the idle workers wait for the n-th soonest busy worker to
+        # free up, plus one average run for every full round of workers ahead.
+        remaining = sorted(
+            max(0.0, avg - (now - job["started_at"])) for job in self._active.values()
+        )
+        idle = self.max_workers - len(remaining)
+        if index < idle:
+            return 0.0
+        slot = index - idle
+        first_free = remaining[slot % len(remaining)] if remaining else 0.0
+        return round(first_free + avg * (slot // self.max_workers), 1)
+
+    def _publish_queue_locked(self) -> None:
+        # Called with the lock held so a job's queued updates are always
+        # delivered before a worker can pick it up and report it running.
+        for index, job in enumerate(self._pending):
+            if job["on_queue_update"] is None:
+                continue
+            update = (index + 1, self._eta_locked(index))
+            if job.get("last_update") == update:
+                continue
+            job["last_update"] = update
+            try:
+                job["on_queue_update"](*update)
+            except Exception:
+                logger.exception(f"Queue update failed for run {job['run_id']}")
+
+    def _worker_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                job = self._pending.popleft()
+                job["started_at"] = time.time()
+                self._active[job["run_id"]] = job
+                self._publish_queue_locked()
+
+            try:
+                job["fn"](self.threads_per_run)
+            except Exception:
+                logger.exception(f"Training job {job['run_id']} crashed")
+            finally:
+                with self._cond:
+                    self._active.pop(job["run_id"], None)
+                    if not job["cancel_event"].is_set():
+                        self._durations.append(time.time() - job["started_at"])
+                    self._publish_queue_locked()
+
+
+scheduler = TrainingScheduler(
+    max_workers=_env_int("TRAINING_MAX_WORKERS", 2 if EXECUTION_MODE == "process" else 1),
+    max_queued=_env_int("TRAINING_MAX_QUEUED", 16),
+    threads_per_run=_env_int("TRAINING_THREADS_PER_RUN", None),
+    in_process=EXECUTION_MODE != "process",
+)
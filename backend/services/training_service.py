@@ -0,0 +1,847 @@
+import copy
+import logging
+import math
+import multiprocessing
+import os
+import queue
+import random
+import threading
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import torch
+from torch import nn
+from torch.nn.parallel import DistributedDataParallel
+
+from services.autotune import autotune_training, measure_train_throughput
+from services.distributed_training import (
+    all_reduce_sum,
+    broadcast_from_rank0,
+    rank,
+    run_distributed_training_job,
+    world_size,
+)
+from services.graph_optimizer import build_inference_model
+from services.model_compiler import build_compiled_model
+from services.model_service import (
+    TensorBatchLoader,
+    build_model,
+    configure_lr_scheduler,
+    configure_optimizer,
+    prepare_dataloaders,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _has_conv_layers(model: nn.Module) -> bool:
+    return any(isinstance(module, nn.Conv2d) for module in model.modules())
+
+
+def _to_memory_format(inputs, channels_last: bool):
+    if channels_last and inputs.dim() == 4:
+        return inputs.contiguous(memory_format=torch.channels_last)
+    return inputs
+
+
+def capture_training_state(
+    model, optimizer, lr_scheduler=None, copy_optimizer_state=False, loader_rng_state=None
+):
+    """Collect the model/optimizer/scheduler/RNG state a checkpoint needs.
+
+    ``copy_optimizer_state`` copies the optimizer and scheduler state so it can
+    be written later while training keeps stepping them; pass a model snapshot
+    in that case too. ``loader_rng_state`` is the training loader's shuffle
+    generator state at the start of the epoch the checkpoint resumes into.
+    """
+    state = {
+        "model": model.state_dict(),
+        "optimizer": optimizer.state_dict(),
+        "lr_scheduler": lr_scheduler.state_dict() if lr_scheduler is not None else None,
+        "rng_state": torch.get_rng_state(),
+        "loader_rng_state": loader_rng_state,
+    }
+    if copy_optimizer_state:
+        state["optimizer"] = copy.deepcopy(state["optimizer"])
+        state["lr_scheduler"] = copy.deepcopy(state["lr_scheduler"])
+    return state
+
+
+def save_training_checkpoint(path, state, epoch, step, metrics):
+    """Atomically write ``state`` (from ``capture_training_state``) as the
+    checkpoint after ``epoch`` full epochs plus ``step`` batches of the next."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    torch.save({**state, "epoch": epoch, "step": step, "metrics": list(metrics)}, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_training_checkpoint(path):
+    return torch.load(path, map_location="cpu", weights_only=False)
+
+
+def train_with_torch(
+    model,
+    train_loader,
+    val_loader,
+    hyperparams,
+    on_checkpoint=None,
+    cancel_event=None,
+    checkpoint_path=None,
+    on_checkpoint_saved=None,
+    resume_state=None,
+):
+    """Train ``model`` and return ``(metrics, test_accuracy, was_cancelled)``.
+
+    ``on_checkpoint`` receives each epoch's metric entry. When
+    ``checkpoint_path`` is given, model and optimizer state are written there
+    every ``checkpoint_every_epochs`` epochs and/or ``checkpoint_every_steps``
+    batches, and ``on_checkpoint_saved`` is told about each write.
+    ``resume_state`` (from ``load_training_checkpoint``) continues a previous
+    run from where its checkpoint left off.
+
+    Validation runs every ``val_every_epochs`` epochs (epochs in between carry
+    the last result forward with ``val_samples`` 0), on a fixed random subset
+    of ``val_subset_size`` samples when set, and always on the full split for
+    the final epoch. With ``async_validation`` it runs in a background thread
+    on a snapshot of the weights while the next epoch trains.
+
+    Inside a ``torch.distributed`` process group the model is wrapped in
+    ``DistributedDataParallel``, each rank passes loaders over its own shard,
+    and the loss/accuracy sums are all-reduced so every rank reports the same
+    metrics; ``cancel_event`` must then be a ``CollectiveCancel``.
+
+    Training stops before ``epochs`` once ``val_accuracy`` reaches
+    ``target_accuracy`` or fails to improve by ``early_stopping_min_delta``
+    for ``early_stopping_patience`` epochs; the last metric entry then
+    carries a ``stop_reason``.
+    """
+    device = torch.device("cpu")
+    model.to(device)
+
+    if hyperparams["seed"] is not None:
+        torch.manual_seed(hyperparams["seed"])
+        random.seed(hyperparams["seed"])
+
+    criterion = nn.CrossEntropyLoss()
+
+    # bfloat16 autocast on CPU, plus channels_last for conv stacks where
+    # oneDNN kernels prefer NHWC.
+    mixed_precision = bool(hyperparams.get("mixed_precision", False))
+    channels_last = mixed_precision and _has_conv_layers(model)
+    precision_info = {"precision": "bf16" if mixed_precision else "fp32"}
+    if mixed_precision:
+        try:
+            sample_inputs, sample_targets = next(iter(train_loader))
+        except StopIteration:
+            pass
+        else:
+            sample_inputs = sample_inputs.to(device)
+            sample_targets = sample_targets.to(device)
+            precision_info["channels_last"] = channels_last
+            precision_info["fp32_samples_per_sec"] = measure_train_throughput(
+                model, criterion, sample_inputs, sample_targets, False, False
+            )
+            precision_info["bf16_samples_per_sec"] = measure_train_throughput(
+                model, criterion, sample_inputs, sample_targets, True, channels_last
+            )
+    if channels_last:
+        model = model.to(memory_format=torch.channels_last)
+
+    optimizer = configure_optimizer(hyperparams["optimizer"], model.parameters())
+
+    epochs = hyperparams["epochs"]
+    lr_scheduler, schedule_per_batch = configure_lr_scheduler(
+        hyperparams.get("lr_scheduler"), optimizer, epochs, len(train_loader)
+    )
+    metrics = []
+    start_epoch = 1
+    skip_steps = 0
+    # Each epoch draws its shuffle order from this generator when it starts.
+    loader_generator = getattr(train_loader, "generator", None)
+    epoch_loader_state = None
+    if resume_state is not None:
+        model.load_state_dict(resume_state["model"])
+        optimizer.load_state_dict(resume_state["optimizer"])
+        if lr_scheduler is not None and resume_state.get("lr_scheduler"):
+            if schedule_per_batch:
+                # A resumed run may change `epochs`, and OneCycle fixes its
+                # phase boundaries when built, so keep the schedule built for
+                # the new horizon and fast-forward it to the checkpoint's step.
+                with warnings.catch_warnings():
+                    # step() warns when it runs before any optimizer.step().
+                    warnings.simplefilter("ignore")
+                    lr_scheduler.last_epoch = resume_state["lr_scheduler"]["last_epoch"] - 1
+                    lr_scheduler.step()
+            else:
+                lr_scheduler.load_state_dict(resume_state["lr_scheduler"])
+        torch.set_rng_state(resume_state["rng_state"])
+        if resume_state.get("loader_rng_state") is not None and loader_generator is not None:
+            # Redraw the interrupted epoch's shuffle order so `skip_steps`
+            # skips exactly the batches that were already trained.
+            loader_generator.set_state(resume_state["loader_rng_state"])
+        metrics = list(resume_state["metrics"])
+        start_epoch = resume_state["epoch"] + 1
+        skip_steps = resume_state["step"]
+
+    num_ranks = world_size()
+    train_model = model
+    if num_ranks > 1:
+        train_model = DistributedDataParallel(model)
+
+    target_accuracy = hyperparams.get("target_accuracy")
+    patience = hyperparams.get("early_stopping_patience") or 0
+    min_delta = hyperparams.get("early_stopping_min_delta") or 0.0
+    best_val_accuracy = None
+    epochs_without_improvement = 0
+    for previous in metrics:
+        if previous.get("val_samples") == 0:
+            continue  # carried forward, not a fresh validation
+        if best_val_accuracy is None or previous["val_accuracy"] > best_val_accuracy + min_delta:
+            best_val_accuracy = previous["val_accuracy"]
+            epochs_without_improvement = 0
+        else:
+            epochs_without_improvement += 1
+
+    checkpoint_every_epochs = hyperparams.get("checkpoint_every_epochs") or 0
+    checkpoint_every_steps = hyperparams.get("checkpoint_every_steps") or 0
+
+    val_every_epochs = max(1, hyperparams.get("val_every_epochs") or 1)
+    # Collectives can't run from a background thread alongside DDP's own.
+    async_validation = bool(hyperparams.get("async_validation", False)) and num_ranks == 1
+    subset_loader = None
+    val_subset_size = math.ceil((hyperparams.get("val_subset_size") or 0) / num_ranks)
+    if (
+        val_subset_size
+        and isinstance(val_loader, TensorBatchLoader)
+        and val_subset_size < len(val_loader.indices)
+    ):
+        subset_generator = torch.Generator()
+        if hyperparams["seed"] is not None:
+            subset_generator.manual_seed(hyperparams["seed"])
+        subset_loader = val_loader.subset(val_subset_size, subset_generator)
+
+    # At most one background validation is in flight. It records its epoch's
+    # metric entry itself; the training loop joins it before recording the
+    # next entry or writing a checkpoint, so entries stay in epoch order.
+    pending = {"thread": None, "error": None, "stop_model": None}
+
+    def wait_for_validation():
+        thread = pending["thread"]
+        if thread is not None:
+            thread.join()
+            pending["thread"] = None
+        if pending["error"] is not None:
+            error, pending["error"] = pending["error"], None
+            raise error
+
+    def loader_state_for(step):
+        """Shuffle state to resume into: the current epoch's start state
+        mid-epoch, or after a full epoch the state the next epoch starts from."""
+        if loader_generator is None:
+            return None
+        return epoch_loader_state if step else loader_generator.get_state()
+
+    def save_checkpoint(completed_epochs, step, state=None):
+        if state is None:
+            wait_for_validation()
+            state = capture_training_state(
+                model, optimizer, lr_scheduler, loader_rng_state=loader_state_for(step)
+            )
+        saved_path = save_training_checkpoint(checkpoint_path, state, completed_epochs, step, metrics)
+        if on_checkpoint_saved is not None:
+            on_checkpoint_saved(
+                {"path": str(saved_path), "epoch": completed_epochs, "step": step}
+            )
+
+    training_start_time = time.time()
+
+    def should_cancel():
+        return cancel_event is not None and cancel_event.is_set()
+
+    def cancelled():
+        wait_for_validation()
+        return metrics, 0.0, True
+
+    def evaluate(eval_model, loader):
+        """Return ``(loss, accuracy, samples, seconds)``, or None if cancelled."""
+        start = time.perf_counter()
+        eval_model.eval()
+        loss_sum = torch.zeros((), device=device)
+        correct = torch.zeros((), dtype=torch.int64, device=device)
+        total = 0
+        with torch.no_grad():
+            for inputs, targets in loader:
+                if should_cancel():
+                    return None
+
+                inputs = _to_memory_format(inputs.to(device), channels_last)
+                targets = targets.to(device)
+                with torch.autocast("cpu", dtype=torch.bfloat16, enabled=mixed_precision):
+                    outputs = eval_model(inputs)
+                    loss = criterion(outputs, targets)
+                batch_size = inputs.size(0)
+                loss_sum += loss * batch_size
+                correct += outputs.argmax(1).eq(targets).sum()
+                total += batch_size
+        total = torch.tensor(total)
+        all_reduce_sum(loss_sum, correct, total)
+        total = total.item()
+        return (
+            loss_sum.item() / max(1, total),
+            correct.item() / max(1, total),
+            total,
+            time.perf_counter() - start,
+        )
+
+    def record_epoch(epoch, train_stats, eval_model=None, full_pass=False):
+        """Validate ``eval_model`` (or carry the last validation forward when
+        it is None), append the epoch's metric entry and return it. Returns
+        None if cancelled mid-validation."""
+        nonlocal best_val_accuracy, epochs_without_improvement
+        stop_reason = None
+        if eval_model is None:
+            val_loss = metrics[-1]["val_loss"]
+            val_accuracy = metrics[-1]["val_accuracy"]
+            val_samples, val_time = 0, 0.0
+        else:
+            loader = val_loader if full_pass or subset_loader is None else subset_loader
+            result = evaluate(eval_model, loader)
+            if result is None:
+                return None
+            val_loss, val_accuracy, val_samples, val_time = result
+
+            if best_val_accuracy is None or val_accuracy > best_val_accuracy + min_delta:
+                best_val_accuracy = val_accuracy
+                epochs_without_improvement = 0
+            else:
+                epochs_without_improvement += 1
+            if target_accuracy is not None and val_accuracy >= target_accuracy:
+                stop_reason = "target_accuracy"
+            elif patience and epochs_without_improvement >= patience:
+                stop_reason = "early_stopping"
+
+            if stop_reason and loader is not val_loader:
+                # The run ends here, so report the whole validation split.
+                result = evaluate(eval_model, val_loader)
+                if result is None:
+                    return None
+                val_loss, val_accuracy, val_samples, full_time = result
+                val_time += full_time
+
+        # Calculate timing and progress metrics
+        epoch_time = train_stats["train_time"] + val_time
+        elapsed_time = time.time() - training_start_time
+        avg_epoch_time = elapsed_time / (epoch - start_epoch + 1)
+        eta_seconds = 0.0 if stop_reason else avg_epoch_time * (epochs - epoch)
+        progress = 1.0 if stop_reason else epoch / epochs
+        step_times = train_stats["step_times"]
+
+        metric_entry = {
+            "epoch": epoch,
+            "train_loss": round(train_stats["train_loss"], 4),
+            "val_loss": round(val_loss, 4),
+            "train_accuracy": round(train_stats["train_accuracy"], 4),
+            "val_accuracy": round(val_accuracy, 4),
+            "learning_rate": round(train_stats["learning_rate"], 6),
+            "epoch_time": round(epoch_time, 2),
+            "samples_per_sec": round(train_stats["train_total"] / epoch_time, 1)
+            if epoch_time > 0
+            else 0,
+            "progress": round(progress, 4),
+            "eta_seconds": round(eta_seconds, 1),
+            "data_time": round(step_times["data"], 3),
+            "forward_time": round(step_times["forward"], 3),
+            "backward_time": round(step_times["backward"], 3),
+            "optimizer_time": round(step_times["optimizer"], 3),
+            "val_time": round(val_time, 3),
+            "val_samples": val_samples,
+            **precision_info,
+        }
+        if stop_reason:
+            metric_entry["stop_reason"] = stop_reason
+        metrics.append(metric_entry)
+        if on_checkpoint is not None:
+            on_checkpoint(metric_entry)
+        return metric_entry
+
+    def validate_in_background(epoch, train_stats, snapshot, checkpoint_state):
+        try:
+            metric_entry = record_epoch(epoch, train_stats, snapshot)
+            if metric_entry is None:
+                return
+            if metric_entry.get("stop_reason"):
+                pending["stop_model"] = snapshot
+            elif checkpoint_state is not None:
+                save_checkpoint(epoch, 0, checkpoint_state)
+        except Exception as exc:
+            pending["error"] = exc
+
+    if should_cancel():
+        return metrics, 0.0, True
+
+    for epoch in range(start_epoch, epochs + 1):
+        if should_cancel():
+            return cancelled()
+        if pending["stop_model"] is not None:
+            break
+
+        epoch_start_time = time.perf_counter()
+        model.train()
+        # Loss sums and correct counts stay on-device as tensors and are read
+        # once per epoch, so the batch loop never blocks on `.item()`.
+        train_loss_sum = torch.zeros((), device=device)
+        train_correct = torch.zeros((), dtype=torch.int64, device=device)
+        train_total = 0
+        step_times = {"data": 0.0, "forward": 0.0, "backward": 0.0, "optimizer": 0.0}
+        if loader_generator is not None:
+            epoch_loader_state = loader_generator.get_state()
+
+        step_start = time.perf_counter()
+        for step, (inputs, targets) in enumerate(train_loader, start=1):
+            if should_cancel():
+                return cancelled()
+            if pending["stop_model"] is not None:
+                break
+            if skip_steps:
+                # Batches already trained before the checkpoint we resumed from.
+                skip_steps -= 1
+                step_start = time.perf_counter()
+                continue
+
+            inputs = _to_memory_format(inputs.to(device), channels_last)
+            targets = targets.to(device)
+            forward_start = time.perf_counter()
+
+            optimizer.zero_grad()
+            with torch.autocast("cpu", dtype=torch.bfloat16, enabled=mixed_precision):
+                outputs = train_model(inputs)
+                loss = criterion(outputs, targets)
+            backward_start = time.perf_counter()
+            loss.backward()
+            optimizer_start = time.perf_counter()
+            optimizer.step()
+            if schedule_per_batch:
+                lr_scheduler.step()
+            step_end = time.perf_counter()
+
+            step_times["data"] += forward_start - step_start
+            step_times["forward"] += backward_start - forward_start
+            step_times["backward"] += optimizer_start - backward_start
+            step_times["optimizer"] += step_end - optimizer_start
+
+            batch_size = inputs.size(0)
+            train_loss_sum += loss.detach() * batch_size
+            train_correct += outputs.detach().argmax(1).eq(targets).sum()
+            train_total += batch_size
+
+            if checkpoint_path and checkpoint_every_steps and step % checkpoint_every_steps == 0:
+                save_checkpoint(epoch - 1, step)
+            step_start = time.perf_counter()
+
+        train_total = torch.tensor(train_total)
+        all_reduce_sum(train_loss_sum, train_correct, train_total)
+        train_total = train_total.item()
+
+        # Get learning rate used for this epoch, then advance epoch-level schedules
+        train_stats = {
+            "train_loss": train_loss_sum.item() / max(1, train_total),
+            "train_accuracy": train_correct.item() / max(1, train_total),
+            "train_total": train_total,
+            "train_time": time.perf_counter() - epoch_start_time,
+            "learning_rate": optimizer.param_groups[0]["lr"],
+            "step_times": step_times,
+        }
+        if lr_scheduler is not None and not schedule_per_batch:
+            lr_scheduler.step()
+
+        wait_for_validation()
+        if pending["stop_model"] is not None:
+            break
+
+        final_epoch = epoch == epochs
+        validate = not metrics or epoch % val_every_epochs == 0 or final_epoch
+        wants_checkpoint = bool(
+            checkpoint_path and checkpoint_every_epochs and epoch % checkpoint_every_epochs == 0
+        )
+        if validate and async_validation and not final_epoch:
+            # Validate a snapshot of this epoch's weights while the next
+            # epoch trains; its checkpoint is written once the entry exists.
+            snapshot = copy.deepcopy(model)
+            checkpoint_state = (
+                capture_training_state(
+                    snapshot,
+                    optimizer,
+                    lr_scheduler,
+                    copy_optimizer_state=True,
+                    loader_rng_state=loader_state_for(0),
+                )
+                if wants_checkpoint
+                else None
+            )
+            pending["thread"] = threading.Thread(
+                target=validate_in_background,
+                args=(epoch, train_stats, snapshot, checkpoint_state),
+                name=f"validation-epoch-{epoch}",
+                daemon=True,
+            )
+            pending["thread"].start()
+            continue
+
+        metric_entry = record_epoch(
+            epoch, train_stats, model if validate else None, full_pass=final_epoch
+        )
+        if metric_entry is None:
+            return cancelled()
+        if metric_entry.get("stop_reason"):
+            break
+        if wants_checkpoint:
+            save_checkpoint(epoch, 0)
+
+    wait_for_validation()
+    if pending["stop_model"] is not None:
+        # Validation stopped the run while later epochs were already
+        # training; keep the weights that met the stopping criterion.
+        model.load_state_dict(pending["stop_model"].state_dict())
+
+    test_accuracy = metrics[-1]["val_accuracy"] if metrics else 0.0
+    return metrics, test_accuracy, False
+
+
+def collect_sample_predictions(model: nn.Module, data_loader, limit: int = 8):
+    samples = []
+    try:
+        device = next(model.parameters()).device
+    except StopIteration:
+        device = torch.device("cpu")
+
+    model.eval()
+
+    total_collected = 0
+    with torch.no_grad():
+        for inputs, targets in data_loader:
+            inputs = inputs.to(device)
+            targets = targets.to(device)
+            outputs = model(inputs)
+            probabilities = torch.softmax(outputs, dim=1)
+            predictions = probabilities.argmax(dim=1)
+
+            batch_size = inputs.size(0)
+            for idx in range(batch_size):
+                image_tensor = inputs[idx].detach().cpu()
+                if image_tensor.dim() == 3 and image_tensor.size(0) == 1:
+                    image_tensor = image_tensor.squeeze(0)
+                grid = image_tensor.mul(255).clamp(0, 255).to(torch.uint8).tolist()
+                confidence = float(
+                    probabilities[idx, predictions[idx]].detach().cpu().item()
+                )
+                samples.append(
+                    {
+                        "grid": grid,
+                        "label": int(targets[idx].detach().cpu().item()),
+                        "prediction": int(predictions[idx].detach().cpu().item()),
+                        "confidence": confidence,
+                    }
+                )
+                total_collected += 1
+                if total_collected >= limit:
+                    break
+            if total_collected >= limit:
+                break
+
+    return samples
+
+
+
+def persist_model_weights(model: nn.Module, output_path: Path) -> Path:
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    model_cpu = model.to("cpu")
+    torch.save(model_cpu.state_dict(), output_path)
+    return output_path
+
+
+def run_training_job(
+    architecture,
+    hyperparams,
+    output_path,
+    on_event,
+    cancel_event=None,
+    checkpoint_path=None,
+    resume_from=None,
+    num_threads=None,
+):
+    """Build, train and persist one model.
+
+    Progress is reported through ``on_event(event_name, data)`` with a
+    ``running`` event once the data is ready (carrying the ``autotune`` result
+    when ``batch_size`` or ``num_threads`` is ``"auto"``), a ``metric`` event
+    per epoch and a ``checkpoint`` event whenever training state is written to
+    ``checkpoint_path``. ``resume_from`` is the checkpoint of an earlier run
+    to continue from. ``num_threads`` is the run's thread budget when it
+    trains on a server thread; torch's thread count is process-wide, so it is
+    then left alone (validation rejects ``hyperparams.num_threads`` in that
+    mode). Otherwise the budget is the process's current thread count. Returns a
+    result dict; ``cancelled`` is True when the run was stopped early.
+    """
+    num_ranks = world_size()
+    # DistributedDataParallel needs an eager module.
+    if hyperparams.get("compile") and num_ranks == 1:
+        model = build_compiled_model(architecture)
+    else:
+        model = build_model(architecture)
+
+    resume_state = load_training_checkpoint(resume_from) if resume_from else None
+
+    # Tune within the thread budget the scheduler gave this run.
+    autotune = None
+    owns_threads = num_threads is None
+    thread_budget = torch.get_num_threads() if owns_threads else num_threads
+    if hyperparams["batch_size"] == "auto" or hyperparams.get("num_threads") == "auto":
+        autotune = broadcast_from_rank0(
+            autotune_training(model, hyperparams, thread_budget, adjust_threads=owns_threads)
+            if rank() == 0
+            else None
+        )
+        hyperparams = {**hyperparams, "batch_size": autotune["batch_size"]}
+        if owns_threads:
+            torch.set_num_threads(autotune["num_threads"])
+    elif hyperparams.get("num_threads") and owns_threads:
+        torch.set_num_threads(min(thread_budget, hyperparams["num_threads"]))
+
+    # Determine dataset type from hyperparams or default to emnist
+    dataset_type = hyperparams.get("dataset_type", "emnist")
+
+    train_loader, val_loader = prepare_dataloaders(
+        hyperparams["batch_size"],
+        hyperparams["train_split"],
+        hyperparams["shuffle"],
+        hyperparams["max_samples"],
+        hyperparams["seed"],
+        dataset_type
+    )
+    if num_ranks > 1:
+        train_loader = train_loader.shard(rank(), num_ranks)
+        val_loader = val_loader.shard(rank(), num_ranks)
+
+    on_event(
+        "running",
+        {"num_threads": torch.get_num_threads() if owns_threads else thread_budget, "autotune": autotune},
+    )
+
+    metrics, test_accuracy, was_cancelled = train_with_torch(
+        model,
+        train_loader,
+        val_loader,
+        hyperparams,
+        on_checkpoint=lambda metric: on_event("metric", metric),
+        cancel_event=cancel_event,
+        checkpoint_path=checkpoint_path,
+        on_checkpoint_saved=lambda info: on_event("checkpoint", info),
+        resume_state=resume_state,
+    )
+    if was_cancelled:
+        return {"cancelled": True, "metrics": metrics}
+    if rank() != 0:
+        # Rank 0 holds the same weights and persists them for the run.
+        return {"cancelled": False, "metrics": metrics}
+
+    sample_predictions = collect_sample_predictions(
+        build_inference_model(architecture, model.state_dict()), val_loader, limit=8
+    )
+    saved_path = persist_model_weights(model, output_path)
+    if checkpoint_path:
+        Path(checkpoint_path).unlink(missing_ok=True)
+    return {
+        "cancelled": False,
+        "metrics": metrics,
+        "test_accuracy": test_accuracy,
+        "sample_predictions": sample_predictions,
+        "saved_model_path": str(saved_path),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Out-of-process execution
+# ---------------------------------------------------------------------------
+
+EXECUTION_MODE = os.environ.get("TRAINING_EXECUTION_MODE", "thread").lower()
+
+_process_pool = None
+_process_manager = None
+_process_pool_lock = threading.Lock()
+
+
+class _PolledEvent:
+    """Caches a cross-process event so the batch loop doesn't pay an IPC
+    round-trip on every ``is_set`` check."""
+
+    def __init__(self, event, interval: float = 0.25):
+        self._event = event
+        self._interval = interval
+        self._checked_at = 0.0
+        self._is_set = False
+
+    def is_set(self) -> bool:
+        now = time.monotonic()
+        if not self._is_set and now - self._checked_at >= self._interval:
+            self._checked_at = now
+            self._is_set = self._event.is_set()
+        return self._is_set
+
+
+def _subprocess_entry(
+    architecture,
+    hyperparams,
+    output_path,
+    num_threads,
+    events,
+    cancel_event,
+    checkpoint_path,
+    resume_from,
+):
+    torch.set_num_threads(num_threads)
+    return run_training_job(
+        architecture,
+        hyperparams,
+        output_path,
+        lambda event_name, data: events.put((event_name, data)),
+        cancel_event=_PolledEvent(cancel_event),
+        checkpoint_path=checkpoint_path,
+        resume_from=resume_from,
+    )
+
+
+def _get_process_pool(max_workers: int):
+    global _process_pool, _process_manager
+    with _process_pool_lock:
+        if _process_pool is None:
+            context = multiprocessing.get_context("spawn")
+            _process_manager = context.Manager()
+            _process_pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+        return _process_pool, _process_manager
+
+
+def _discard_process_pool(broken_pool) -> None:
+    """Drop a pool whose worker died so the next run starts a fresh one."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is broken_pool:
+            _process_pool = None
+    broken_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_training_job_in_subprocess(
+    architecture,
+    hyperparams,
+    output_path,
+    on_event,
+    cancel_event,
+    num_threads: int,
+    max_workers: int,
+    checkpoint_path=None,
+    resume_from=None,
+):
+    """Run ``run_training_job`` in a pooled worker process.
+
+    Blocks the calling thread, relaying the child's events to ``on_event`` and
+    forwarding ``cancel_event`` to the child. Exceptions raised in the child
+    are re-raised here. If a worker process dies (e.g. killed for running out
+    of memory) the run fails and the pool is replaced for later runs.
+    """
+    pool, manager = _get_process_pool(max_workers)
+    events = manager.Queue()
+    child_cancel = manager.Event()
+    args = (
+        _subprocess_entry,
+        architecture,
+        hyperparams,
+        str(output_path),
+        num_threads,
+        events,
+        child_cancel,
+        str(checkpoint_path) if checkpoint_path else None,
+        str(resume_from) if resume_from else None,
+    )
+    try:
+        future = pool.submit(*args)
+    except BrokenProcessPool:
+        # A worker died after the last run finished; start over with a new pool.
+        _discard_process_pool(pool)
+        pool, manager = _get_process_pool(max_workers)
+        future = pool.submit(*args)
+
+    def drain(timeout):
+        try:
+            event_name, data = events.get(timeout=timeout)
+        except queue.Empty:
+            return False
+        on_event(event_name, data)
+        return True
+
+    while not future.done():
+        if cancel_event is not None and cancel_event.is_set() and not child_cancel.is_set():
+            child_cancel.set()
+        drain(0.25)
+    while drain(0):
+        pass
+    try:
+        return future.result()
+    except BrokenProcessPool as exc:
+        _discard_process_pool(pool)
+        raise RuntimeError(
+            "The training worker process exited unexpectedly (it may have run out of memory)."
+        ) from exc
+
+
+def execute_training_job(
+    architecture,
+    hyperparams,
+    output_path,
+    on_event,
+    cancel_event,
+    num_threads: int,
+    max_workers: int,
+    checkpoint_path=None,
+    resume_from=None,
+):
+    """Run a training job in-thread or in a worker process per ``EXECUTION_MODE``,
+    or across local data-parallel ranks when ``data_parallel_ranks`` > 1."""
+    if hyperparams.get("data_parallel_ranks", 1) > 1:
+        return run_distributed_training_job(
+            architecture,
+            hyperparams,
+            output_path,
+            on_event,
+            cancel_event,
+            num_threads,
+            checkpoint_path=checkpoint_path,
+            resume_from=resume_from,
+        )
+    if EXECUTION_MODE == "process":
+        return run_training_job_in_subprocess(
+            architecture,
+            hyperparams,
+            output_path,
+            on_event,
+            cancel_event,
+            num_threads,
+            max_workers,
+            checkpoint_path=checkpoint_path,
+            resume_from=resume_from,
+        )
+    return run_training_job(
+        architecture,
+        hyperparams,
+        output_path,
+        on_event,
+        cancel_event,
+        checkpoint_path=checkpoint_path,
+        resume_from=resume_from,
+        num_threads=num_threads,
+    )
@@ -0,0 +1,131 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+USAGE_PATH = BACKEND_DIR / "saved_models" / "inference_usage.json"
+FLUSH_INTERVAL_SECONDS = 5.0
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name)
+    try:
+        return max(0, int(raw)) if raw else default
+    except ValueError:
+        return default
+
+
+class InferenceWarmPool:
+    """Tracks how often each saved model is served and preloads the busiest.
+
+    Usage counts are kept per inference cache key together with what is
+    needed to load that model again (architecture, artifact path, backend)
+    and flushed to ``usage_path`` at most every few seconds, so they survive
+    restarts. ``preload`` loads the ``size`` most-used models whose artifacts
+    still exist into the inference cache; a size of 0 disables it.
+    """
+
+    def __init__(self, usage_path, size: int):
+        self.usage_path = Path(usage_path)
+        self.size = size
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # serializes file writes
+        self._usage = self._read_usage()
+        self._dirty = False
+        self._last_flush = 0.0
+        self._preloaded = []
+
+    def _read_usage(self) -> dict:
+        try:
+            with open(self.usage_path) as handle:
+                usage = json.load(handle)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Ignoring unreadable inference usage file {self.usage_path}: {exc}")
+            return {}
+        return usage if isinstance(usage, dict) else {}
+
+    def record_use(self, owner_id: str, model_id: str, model_path, architecture: dict, backend: str) -> None:
+        with self._lock:
+            entry = self._usage.get(owner_id)
+            if entry is None:
+                entry = self._usage[owner_id] = {"model_id": model_id, "uses": 0}
+            entry.update(
+                {
+                    "model_path": str(model_path),
+                    "architecture": architecture,
+                    "backend": backend,
+                    "uses": entry["uses"] + 1,
+                }
+            )
+            self._dirty = True
+            due = time.monotonic() - self._last_flush >= FLUSH_INTERVAL_SECONDS
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                payload = json.dumps(self._usage)
+                self._dirty = False
+                self._last_flush = time.monotonic()
+            try:
+                tmp_path = self.usage_path.with_suffix(".tmp")
+                tmp_path.write_text(payload)
+                os.replace(tmp_path, self.usage_path)
+            except OSError as exc:
+                logger.warning(f"Failed to write inference usage file: {exc}")
+
+    def most_used(self, limit: int) -> list:
+        with self._lock:
+            ranked = sorted(self._usage.items(), key=lambda item: item[1]["uses"], reverse=True)
+        return [(owner_id, dict(entry)) for owner_id, entry in ranked[:limit]]
+
+    def preload(self, cache, loader_for) -> None:
+        """Load the most-used models into ``cache``; ``loader_for(backend)``
+        gives the ``InferenceModelCache.get`` loader for a backend."""
+        loaded = []
+        for owner_id, entry in self.most_used(self.size):
+            model_path = Path(entry["model_path"])
+            if not model_path.exists():
+                continue
+            started = time.perf_counter()
+            try:
+                cache.get(owner_id, model_path, entry["architecture"], loader=loader_for(entry["backend"]))
+            except Exception as exc:
+                logger.warning(f"Preloading {owner_id} failed: {exc}")
+                continue
+            loaded.append(owner_id)
+            logger.info(f"Preloaded {owner_id} in {(time.perf_counter() - started) * 1000:.1f} ms")
+        with self._lock:
+            self._preloaded = loaded
+
+    def start(self, cache, loader_for) -> None:
+        if self.size > 0:
+            threading.Thread(
+                target=self.preload, args=(cache, loader_for), name="inference-warm-pool", daemon=True
+            ).start()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "tracked": len(self._usage),
+                "preloaded": list(self._preloaded),
+            }
+
+
+warm_pool = InferenceWarmPool(
+    usage_path=USAGE_PATH,
+    size=_env_int("INFERENCE_WARM_POOL_SIZE", 0),
+)
+atexit.register(warm_pool.flush)
@@ -1,64 +1,206 @@
+import copy
+import json
+import os
+import sqlite3
 import threading
+from pathlib import Path
 from typing import Any, Optional
 
+from services.metrics_log import MetricsLog, downsample_indices
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parent / "saved_models" / "store.db"
+INTERRUPTED_STATES = ("queued", "running")
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError("Store records are read-only; change them through the store's update_* methods.")
+
+
+class _FrozenDict(dict):
+    """A dict that refuses in-place changes. ``dict(...)``, ``copy`` and
+    pickling give ordinary, mutable dicts and lists."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return {key: copy.deepcopy(value, memo) for key, value in self.items()}
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class _FrozenList(list):
+    """A list that refuses in-place changes; see ``_FrozenDict``."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return [copy.deepcopy(value, memo) for value in self]
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+def _freeze(value):
+    """``value`` with every nested dict and list made read-only. Values that
+    are already frozen are returned as they are, so re-freezing a record
+    after an update only walks the updated fields."""
+    if isinstance(value, (_FrozenDict, _FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return _FrozenDict({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return _FrozenList(_freeze(item) for item in value)
+    if isinstance(value, tuple):
+        return tuple(_freeze(item) for item in value)
+    return value
+
 
 class Store:
-    """Thread-safe in-memory store for models, runs, and event queues."""
+    """Thread-safe in-memory store for models, runs, sweeps, and event queues.
+
+    Records are immutable snapshots: an update builds a new dict from the
+    current one and swaps it in, so readers take no lock and always see a
+    whole record, never one that is half-updated. Writers serialize on
+    ``_lock``, except that writes to an existing run take only that run's
+    lock, so concurrent runs appending metrics don't wait on each other.
+    Records are frozen on write (see ``_freeze``) and returned as they are,
+    so changing one in place, nested values included, raises ``TypeError``;
+    changes go through the ``update_*`` methods.
+
+    A run is stored as ``(record, metrics log, metrics count)``, published
+    together, so a reader sees exactly the metrics that existed when that
+    record version was written.
+    """
 
     def __init__(self):
         self._lock = threading.Lock()
         self._models = {}
-        self._runs = {}
+        self._runs = {}  # run_id -> (record, MetricsLog, metrics count)
+        self._run_locks = {}
+        self._sweeps = {}
         self._run_event_queues = {}
 
     # Model operations
     def add_model(self, model_id: str, model_data: dict) -> None:
         """Add a model to the store."""
         with self._lock:
-            self._models[model_id] = model_data
+            self._models[model_id] = _freeze(model_data)
 
     def get_model(self, model_id: str) -> Optional[dict]:
         """Get a model by ID."""
-        with self._lock:
-            return self._models.get(model_id)
+        return self._models.get(model_id)
 
     def update_model(self, model_id: str, updates: dict) -> None:
         """Update a model with new data."""
         with self._lock:
             model = self._models.get(model_id)
             if model is not None:
-                model.update(updates)
+                self._models[model_id] = _freeze({**model, **updates})
 
     def list_models(self) -> list:
         """List all models."""
-        with self._lock:
-            return list(self._models.values())
+        return list(self._models.values())
 
     # Run operations
     def add_run(self, run_id: str, run_data: dict) -> None:
         """Add a run to the store."""
+        run = _freeze({key: value for key, value in run_data.items() if key != "metrics"})
+        metrics = MetricsLog(run_data.get("metrics") or [])
         with self._lock:
-            self._runs[run_id] = run_data
+            run_lock = self._run_locks.setdefault(run_id, threading.Lock())
+            with run_lock:
+                self._runs[run_id] = (run, metrics, len(metrics))
 
     def get_run(self, run_id: str) -> Optional[dict]:
-        """Get a run by ID."""
-        with self._lock:
-            return self._runs.get(run_id)
+        """Get a run by ID, without its metrics (see ``get_run_metrics``)."""
+        entry = self._runs.get(run_id)
+        return entry[0] if entry is not None else None
 
     def update_run(self, run_id: str, updates: dict) -> None:
-        """Update a run with new data."""
+        """Update a run with new data. A ``metrics`` update replaces the log."""
+        updates = dict(updates)
+        replacement = MetricsLog(updates.pop("metrics")) if "metrics" in updates else None
+        run_lock = self._run_locks.get(run_id)
+        if run_lock is None:
+            return
+        with run_lock:
+            entry = self._runs.get(run_id)
+            if entry is None:
+                return
+            run, metrics, count = entry
+            if replacement is not None:
+                metrics, count = replacement, len(replacement)
+            self._runs[run_id] = (_freeze({**run, **updates}), metrics, count)
+
+    def append_run_metric(self, run_id: str, metric: dict, updates: Optional[dict] = None) -> None:
+        """Append one epoch's metrics to a run's log (and apply ``updates``)."""
+        run_lock = self._run_locks.get(run_id)
+        if run_lock is None:
+            return
+        with run_lock:
+            entry = self._runs.get(run_id)
+            if entry is None:
+                return
+            run, metrics, _ = entry
+            count = metrics.append(metric) + 1
+            self._runs[run_id] = (_freeze({**run, **updates}) if updates else run, metrics, count)
+
+    def get_run_metrics(
+        self, run_id: str, start: int = 0, stop: Optional[int] = None, max_points: int = 0
+    ) -> list:
+        """Metrics ``[start:stop]`` of a run, thinned to ``max_points`` evenly
+        spaced entries (first and last kept) when ``max_points`` is set."""
+        entry = self._runs.get(run_id)
+        if entry is None:
+            return []
+        _, metrics, count = entry
+        start, stop, _ = slice(start, stop).indices(count)
+        return metrics.rows(start, max(start, stop), max_points)
+
+    def list_runs(
+        self,
+        model_id: Optional[str] = None,
+        saved_model_path: Optional[str] = None,
+        with_metrics: bool = False,
+        max_points: int = 0,
+    ) -> list:
+        """List all runs, optionally filtered by model_id and/or the weights
+        file they saved. Metrics are only included with ``with_metrics``;
+        ``max_points`` then thins them as in ``get_run_metrics``."""
+        return [
+            {**run, "metrics": metrics.rows(0, count, max_points)} if with_metrics else run
+            for run, metrics, count in list(self._runs.values())
+            if (not model_id or run.get("model_id") == model_id)
+            and (not saved_model_path or run.get("saved_model_path") == saved_model_path)
+        ]
+
+    # Sweep operations
+    def add_sweep(self, sweep_id: str, sweep_data: dict) -> None:
+        """Add a hyperparameter sweep to the store."""
         with self._lock:
-            run = self._runs.get(run_id)
-            if run is not None:
-                run.update(updates)
+            self._sweeps[sweep_id] = _freeze(sweep_data)
+
+    def get_sweep(self, sweep_id: str) -> Optional[dict]:
+        """Get a sweep by ID."""
+        return self._sweeps.get(sweep_id)
 
-    def list_runs(self, model_id: Optional[str] = None) -> list:
-        """List all runs, optionally filtered by model_id."""
+    def update_sweep(self, sweep_id: str, updates: dict) -> None:
+        """Update a sweep with new data."""
         with self._lock:
-            runs = list(self._runs.values())
-            if model_id:
-                runs = [r for r in runs if r.get("model_id") == model_id]
-            return runs
+            sweep = self._sweeps.get(sweep_id)
+            if sweep is not None:
+                self._sweeps[sweep_id] = _freeze({**sweep, **updates})
 
     # Event queue operations
     def add_event_queue(self, run_id: str, queue: Any) -> None:
@@ -68,14 +210,389 @@ class Store:
 
     def get_event_queue(self, run_id: str) -> Optional[Any]:
         """Get an event queue by run ID."""
-        with self._lock:
-            return self._run_event_queues.get(run_id)
+        return self._run_event_queues.get(run_id)
 
     def remove_event_queue(self, run_id: str) -> None:
         """Remove an event queue for a run."""
         with self._lock:
             self._run_event_queues.pop(run_id, None)
 
+    def recover_interrupted(self) -> int:
+        """Nothing survives a restart in memory, so nothing is interrupted."""
+        return 0
+
+
+class SQLiteStore(Store):
+    """Durable store with the same API, backed by SQLite in WAL mode.
+
+    Models, runs and sweeps are JSON documents, with the fields they are
+    queried by (``model_id``, ``state``, ``created_at``, a run's
+    ``saved_model_path``) kept in indexed columns. Run metrics live one row per entry in ``run_metrics``, so
+    appending an epoch inserts a single row. Reads use one connection per
+    thread; writes are serialized so read-modify-write updates don't lose
+    concurrent changes. Event queues stay in memory.
+    Getters return records frozen like the in-memory store's, so changes
+    must go through the ``update_*`` methods on both backends.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS models (
+            model_id TEXT PRIMARY KEY,
+            created_at TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_models_created_at ON models (created_at);
+
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id TEXT PRIMARY KEY,
+            model_id TEXT,
+            state TEXT,
+            created_at TEXT,
+            saved_model_path TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_runs_model_id ON runs (model_id);
+        CREATE INDEX IF NOT EXISTS idx_runs_state ON runs (state);
+        CREATE INDEX IF NOT EXISTS idx_runs_created_at ON runs (created_at);
+
+        CREATE TABLE IF NOT EXISTS run_metrics (
+            run_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (run_id, position)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS sweeps (
+            sweep_id TEXT PRIMARY KEY,
+            state TEXT,
+            created_at TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_sweeps_state ON sweeps (state);
+        CREATE INDEX IF NOT EXISTS idx_sweeps_created_at ON sweeps (created_at);
+    """
+
+    def __init__(self, db_path):
+        super().__init__()
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(self.SCHEMA)
+        self._migrate(conn)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        """Bring databases created by older versions up to ``SCHEMA``."""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(runs)")}
+            if "saved_model_path" not in columns:
+                conn.execute("ALTER TABLE runs ADD COLUMN saved_model_path TEXT")
+                conn.executemany(
+                    "UPDATE runs SET saved_model_path = ? WHERE run_id = ?",
+                    [
+                        (json.loads(data).get("saved_model_path"), run_id)
+                        for run_id, data in conn.execute("SELECT run_id, data FROM runs").fetchall()
+                    ],
+                )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_runs_saved_model_path ON runs (saved_model_path)"
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _dumps(value) -> str:
+        return json.dumps(value, default=str)
+
+    @staticmethod
+    def _loads(data: str):
+        return json.loads(data, object_hook=_freeze)
+
+    def _write(self, statements) -> None:
+        """Run ``[(sql, params), ...]`` in one transaction; params may be a
+        list of tuples for ``executemany``."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for sql, params in statements:
+                if isinstance(params, list):
+                    conn.executemany(sql, params)
+                else:
+                    conn.execute(sql, params)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # Model operations
+    def add_model(self, model_id: str, model_data: dict) -> None:
+        """Add a model to the store."""
+        with self._write_lock:
+            self._write([(
+                "INSERT OR REPLACE INTO models (model_id, created_at, data) VALUES (?, ?, ?)",
+                (model_id, model_data.get("created_at"), self._dumps(model_data)),
+            )])
+
+    def get_model(self, model_id: str) -> Optional[dict]:
+        """Get a model by ID."""
+        row = self._connection().execute(
+            "SELECT data FROM models WHERE model_id = ?", (model_id,)
+        ).fetchone()
+        return self._loads(row[0]) if row else None
+
+    def update_model(self, model_id: str, updates: dict) -> None:
+        """Update a model with new data."""
+        with self._write_lock:
+            model = self.get_model(model_id)
+            if model is None:
+                return
+            model = {**model, **updates}
+            self._write([(
+                "UPDATE models SET created_at = ?, data = ? WHERE model_id = ?",
+                (model.get("created_at"), self._dumps(model), model_id),
+            )])
+
+    def list_models(self) -> list:
+        """List all models."""
+        rows = self._connection().execute(
+            "SELECT data FROM models ORDER BY created_at, rowid"
+        ).fetchall()
+        return [self._loads(data) for (data,) in rows]
+
+    # Run operations
+    def _run_statements(self, run_id: str, run_data: dict, replace_metrics: bool) -> list:
+        document = {key: value for key, value in run_data.items() if key != "metrics"}
+        statements = [(
+            "INSERT OR REPLACE INTO runs (run_id, model_id, state, created_at, saved_model_path, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                run_id,
+                run_data.get("model_id"),
+                run_data.get("state"),
+                run_data.get("created_at"),
+                run_data.get("saved_model_path"),
+                self._dumps(document),
+            ),
+        )]
+        if replace_metrics:
+            statements.append(("DELETE FROM run_metrics WHERE run_id = ?", (run_id,)))
+            statements.append((
+                "INSERT INTO run_metrics (run_id, position, data) VALUES (?, ?, ?)",
+                [
+                    (run_id, position, self._dumps(metric))
+                    for position, metric in enumerate(run_data.get("metrics") or [])
+                ],
+            ))
+        return statements
+
+    def _attach_metrics(self, rows, max_points: int = 0) -> list:
+        runs = [{**self._loads(data), "metrics": []} for _, data in rows]
+        if max_points > 0:
+            for (run_id, _), run in zip(rows, runs):
+                run["metrics"] = self.get_run_metrics(run_id, max_points=max_points)
+            return runs
+        if not runs:
+            return runs
+        by_id = {run_id: run for (run_id, _), run in zip(rows, runs)}
+        conn = self._connection()
+        run_ids = list(by_id)
+        # Stay under SQLite's bound-parameter limit.
+        for start in range(0, len(run_ids), 500):
+            chunk = run_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for run_id, data in conn.execute(
+                f"SELECT run_id, data FROM run_metrics WHERE run_id IN ({placeholders}) "
+                "ORDER BY run_id, position",
+                chunk,
+            ):
+                by_id[run_id]["metrics"].append(json.loads(data))
+        return runs
+
+    def add_run(self, run_id: str, run_data: dict) -> None:
+        """Add a run to the store."""
+        with self._write_lock:
+            self._write(self._run_statements(run_id, run_data, replace_metrics=True))
+
+    def get_run(self, run_id: str) -> Optional[dict]:
+        """Get a run by ID, without its metrics (see ``get_run_metrics``)."""
+        row = self._connection().execute(
+            "SELECT data FROM runs WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        return self._loads(row[0]) if row else None
+
+    def update_run(self, run_id: str, updates: dict) -> None:
+        """Update a run with new data."""
+        with self._write_lock:
+            row = self._connection().execute(
+                "SELECT data FROM runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+            if row is None:
+                return
+            run = json.loads(row[0])
+            run.update(updates)
+            self._write(self._run_statements(run_id, run, replace_metrics="metrics" in updates))
+
+    def append_run_metric(self, run_id: str, metric: dict, updates: Optional[dict] = None) -> None:
+        """Append one epoch's metrics to a run's log (and apply ``updates``)."""
+        with self._write_lock:
+            row = self._connection().execute(
+                "SELECT data FROM runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+            if row is None:
+                return
+            statements = [(
+                "INSERT INTO run_metrics (run_id, position, data) VALUES "
+                "(?, (SELECT COALESCE(MAX(position) + 1, 0) FROM run_metrics WHERE run_id = ?), ?)",
+                (run_id, run_id, self._dumps(metric)),
+            )]
+            if updates:
+                run = json.loads(row[0])
+                run.update(updates)
+                statements += self._run_statements(run_id, run, replace_metrics=False)
+            self._write(statements)
+
+    def get_run_metrics(
+        self, run_id: str, start: int = 0, stop: Optional[int] = None, max_points: int = 0
+    ) -> list:
+        """Metrics ``[start:stop]`` of a run, thinned to ``max_points`` evenly
+        spaced entries (first and last kept) when ``max_points`` is set."""
+        conn = self._connection()
+        (length,) = conn.execute(
+            "SELECT COUNT(*) FROM run_metrics WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        start, stop, _ = slice(start, stop).indices(length)
+        positions = [start + i for i in downsample_indices(max(0, stop - start), max_points)]
+        if len(positions) == stop - start:
+            rows = conn.execute(
+                "SELECT data FROM run_metrics WHERE run_id = ? AND position >= ? AND position < ? "
+                "ORDER BY position",
+                (run_id, start, stop),
+            ).fetchall()
+            return [json.loads(data) for (data,) in rows]
+        metrics = []
+        for offset in range(0, len(positions), 500):
+            chunk = positions[offset:offset + 500]
+            placeholders = ",".join("?" * len(chunk))
+            metrics += [
+                json.loads(data) for (data,) in conn.execute(
+                    f"SELECT data FROM run_metrics WHERE run_id = ? AND position IN ({placeholders}) "
+                    "ORDER BY position",
+                    (run_id, *chunk),
+                )
+            ]
+        return metrics
+
+    def list_runs(
+        self,
+        model_id: Optional[str] = None,
+        saved_model_path: Optional[str] = None,
+        with_metrics: bool = False,
+        max_points: int = 0,
+    ) -> list:
+        """List all runs, optionally filtered by model_id and/or the weights
+        file they saved. Metrics are only included with ``with_metrics``;
+        ``max_points`` then thins them as in ``get_run_metrics``."""
+        filters = {"model_id": model_id, "saved_model_path": saved_model_path}
+        conditions = [(f"{column} = ?", value) for column, value in filters.items() if value]
+        where = f"WHERE {' AND '.join(sql for sql, _ in conditions)} " if conditions else ""
+        rows = self._connection().execute(
+            f"SELECT run_id, data FROM runs {where}ORDER BY rowid",
+            [value for _, value in conditions],
+        ).fetchall()
+        if with_metrics:
+            return self._attach_metrics(rows, max_points)
+        return [self._loads(data) for _, data in rows]
+
+    # Sweep operations
+    def add_sweep(self, sweep_id: str, sweep_data: dict) -> None:
+        """Add a hyperparameter sweep to the store."""
+        with self._write_lock:
+            self._write([(
+                "INSERT OR REPLACE INTO sweeps (sweep_id, state, created_at, data) VALUES (?, ?, ?, ?)",
+                (sweep_id, sweep_data.get("state"), sweep_data.get("created_at"), self._dumps(sweep_data)),
+            )])
+
+    def get_sweep(self, sweep_id: str) -> Optional[dict]:
+        """Get a sweep by ID."""
+        row = self._connection().execute(
+            "SELECT data FROM sweeps WHERE sweep_id = ?", (sweep_id,)
+        ).fetchone()
+        return self._loads(row[0]) if row else None
+
+    def update_sweep(self, sweep_id: str, updates: dict) -> None:
+        """Update a sweep with new data."""
+        with self._write_lock:
+            sweep = self.get_sweep(sweep_id)
+            if sweep is None:
+                return
+            sweep = {**sweep, **updates}
+            self._write([(
+                "UPDATE sweeps SET state = ?, data = ? WHERE sweep_id = ?",
+                (sweep.get("state"), self._dumps(sweep), sweep_id),
+            )])
+
+    def _claim_database(self) -> bool:
+        """Hold an exclusive lock on ``<db>.lock`` until this process exits.
+        False if another live process already holds it."""
+        conn = sqlite3.connect(
+            f"{self.db_path}.lock", timeout=0, isolation_level=None, check_same_thread=False
+        )
+        try:
+            conn.execute("BEGIN EXCLUSIVE")
+        except sqlite3.OperationalError:
+            conn.close()
+            return False
+        self._claim = conn
+        return True
+
+    def recover_interrupted(self) -> int:
+        """Mark runs and sweeps left queued or running by a previous process
+        as failed (resumable from their checkpoint). Call at startup, before
+        any training is submitted. Only the first live process to call it
+        recovers, so a second server worker on the same database doesn't
+        fail the first one's runs. Returns how many runs were marked."""
+        if not self._claim_database():
+            return 0
+        placeholders = ",".join("?" * len(INTERRUPTED_STATES))
+        conn = self._connection()
+        run_ids = [
+            run_id for (run_id,) in conn.execute(
+                f"SELECT run_id FROM runs WHERE state IN ({placeholders})", INTERRUPTED_STATES
+            )
+        ]
+        sweep_ids = [
+            sweep_id for (sweep_id,) in conn.execute(
+                f"SELECT sweep_id FROM sweeps WHERE state IN ({placeholders})", INTERRUPTED_STATES
+            )
+        ]
+        interrupted = {"state": "failed", "error": "Interrupted by a server restart.", "queue_position": None}
+        for run_id in run_ids:
+            self.update_run(run_id, interrupted)
+        for sweep_id in sweep_ids:
+            self.update_sweep(sweep_id, {"state": "failed", "error": interrupted["error"]})
+        return len(run_ids)
+
+
+def create_store() -> Store:
+    """``STORE_BACKEND=memory`` keeps everything in process memory; the
+    default ``sqlite`` persists to ``STORE_DB_PATH``."""
+    if os.environ.get("STORE_BACKEND", "sqlite").strip().lower() == "memory":
+        return Store()
+    return SQLiteStore(os.environ.get("STORE_DB_PATH") or DEFAULT_DB_PATH)
+
 
 # Global singleton instance
-store = Store()
+store = create_store()
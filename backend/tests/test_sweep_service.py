@@ -0,0 +1,74 @@
+import pytest
+import torch
+
+from services import model_service
+from services.sweep_service import run_sweep_job
+from utils.validation import validate_hyperparams
+
+MLP = {
+    "input_size": 784,
+    "layers": [
+        {"type": "flatten"},
+        {"type": "linear", "in": 784, "out": 16},
+        {"type": "relu"},
+        {"type": "linear", "in": 16, "out": 10},
+    ],
+}
+
+
+@pytest.fixture(autouse=True)
+def synthetic_dataset(monkeypatch):
+    generator = torch.Generator().manual_seed(0)
+    images = torch.randint(0, 256, (256, 1, 28, 28), dtype=torch.uint8, generator=generator)
+    labels = torch.randint(0, 10, (256,), generator=generator)
+    monkeypatch.setattr(model_service, "load_tensor_dataset", lambda *args, **kwargs: (images, labels))
+
+
+def _hyperparams(**overrides):
+    return validate_hyperparams({
+        "epochs": 3,
+        "batch_size": 32,
+        "optimizer": {"type": "sgd", "lr": 0.05, "momentum": 0.9},
+        "seed": 1,
+        "max_samples": 256,
+        **overrides,
+    })
+
+
+def _run_sweep(trials, tmp_path):
+    metrics = {trial_id: [] for trial_id, _ in trials}
+
+    def on_event(event_name, data):
+        if event_name == "metric":
+            metrics[data["run_id"]].append(data)
+
+    cancelled = run_sweep_job(MLP, trials, lambda trial_id: tmp_path / f"{trial_id}.pt", on_event)
+    assert not cancelled
+    return metrics
+
+
+def _reported(metrics):
+    return [(metric.get("stop_reason"), metric["learning_rate"]) for metric in metrics]
+
+
+def test_plain_trials_stack_and_match_unstacked(tmp_path):
+    trial = _hyperparams()
+    stacked = _run_sweep([("a", trial), ("b", _hyperparams(optimizer={"type": "sgd", "lr": 0.01}))], tmp_path)
+    alone = _run_sweep([("a", trial)], tmp_path)
+
+    assert all(metric["stacked_trials"] == 2 for metric in stacked["a"])
+    assert "stacked_trials" not in alone["a"][0]
+    assert _reported(stacked["a"]) == _reported(alone["a"])
+
+
+def test_trials_with_training_options_match_unstacked(tmp_path):
+    trial = _hyperparams(
+        lr_scheduler={"type": "step", "step_size": 1, "gamma": 0.5},
+        target_accuracy=0.01,
+    )
+    grouped = _run_sweep([("a", trial), ("b", _hyperparams(lr_scheduler="cosine"))], tmp_path)
+    alone = _run_sweep([("a", trial)], tmp_path)
+
+    assert all("stacked_trials" not in metric for metric in grouped["a"] + grouped["b"])
+    assert grouped["a"][-1]["stop_reason"] == "target_accuracy"
+    assert _reported(grouped["a"]) == _reported(alone["a"])
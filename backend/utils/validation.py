@@ -1,7 +1,11 @@
 import json
 import math
+import os
 
 IMAGE_FLATTENED_SIZE = 28 * 28
+# Mirrors services.training_service.EXECUTION_MODE; only worker processes
+# can give a run its own torch thread count.
+TRAINING_EXECUTION_MODE = os.environ.get("TRAINING_EXECUTION_MODE", "thread").lower()
 
 MNIST_CLASS_LABELS = ['0', '1', '2', '3', '4', '5', '6', '7', '8', '9']
 EMNIST_CLASS_LABELS = [
@@ -29,9 +33,26 @@ DEFAULT_HYPERPARAMS = {
     "train_split": 0.9,
     "shuffle": True,
     "max_samples": 4096,
-    "dataset_type": "mnist"  # Default to MNIST
+    "dataset_type": "mnist",  # Default to MNIST
+    "mixed_precision": False,  # bfloat16 autocast (+ channels_last for conv models) on CPU
+    "compile": False,  # TorchScript, cached per canonical architecture
+    "checkpoint_every_epochs": 0,  # 0 disables epoch checkpoints
+    "checkpoint_every_steps": 0,  # 0 disables step checkpoints
+    "lr_scheduler": None,  # {"type": "step" | "cosine" | "onecycle", ...}
+    "target_accuracy": None,  # stop once val_accuracy reaches this
+    "early_stopping_patience": 0,  # epochs without val_accuracy improvement; 0 disables
+    "early_stopping_min_delta": 0.0,
+    "val_every_epochs": 1,
+    "val_subset_size": 0,  # 0 validates on the full split every time
+    "async_validation": False,
+    "data_parallel_ranks": 1,  # >1 trains with DistributedDataParallel over local processes
+    "num_threads": None,  # None uses the scheduler's per-run budget; "auto" tunes within it (process mode only)
 }
 
+MAX_DATA_PARALLEL_RANKS = 32
+
+LR_SCHEDULER_TYPES = {"none", "step", "cosine", "onecycle"}
+
 
 def _infer_image_shape_from_size(size: int):
     side = int(round(math.sqrt(size)))
@@ -366,6 +387,40 @@ def validate_architecture(payload, dataset_type="mnist"):
     return result
 
 
+def _validate_lr_scheduler(payload):
+    if payload is None:
+        return None
+    if isinstance(payload, str):
+        payload = {"type": payload}
+    if not isinstance(payload, dict):
+        raise ValueError("`hyperparams.lr_scheduler` must be an object, string or null.")
+
+    scheduler_type = str(payload.get("type", "none")).lower()
+    if scheduler_type not in LR_SCHEDULER_TYPES:
+        raise ValueError(f"`hyperparams.lr_scheduler.type` must be one of {sorted(LR_SCHEDULER_TYPES)}.")
+    if scheduler_type == "none":
+        return None
+
+    result = {"type": scheduler_type}
+    numeric_fields = {
+        "step": {"step_size": int, "gamma": float},
+        "cosine": {"eta_min": float},
+        "onecycle": {"max_lr": float, "pct_start": float},
+    }[scheduler_type]
+    for key, cast in numeric_fields.items():
+        if payload.get(key) is None:
+            continue
+        try:
+            result[key] = cast(payload[key])
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"`hyperparams.lr_scheduler.{key}` must be numeric.") from exc
+        if result[key] < 0 or (key == "step_size" and result[key] == 0):
+            raise ValueError(f"`hyperparams.lr_scheduler.{key}` is out of range.")
+    if "pct_start" in result and not (0 < result["pct_start"] < 1):
+        raise ValueError("`hyperparams.lr_scheduler.pct_start` must be between 0 and 1.")
+    return result
+
+
 def validate_hyperparams(payload):
     if payload is None:
         payload = {}
@@ -381,10 +436,29 @@ def validate_hyperparams(payload):
             raise ValueError("`hyperparams.epochs` must be an integer.") from exc
 
     if "batch_size" in payload:
-        try:
-            result["batch_size"] = int(payload["batch_size"])
-        except (TypeError, ValueError) as exc:
-            raise ValueError("`hyperparams.batch_size` must be an integer.") from exc
+        if payload["batch_size"] == "auto":
+            result["batch_size"] = "auto"
+        else:
+            try:
+                result["batch_size"] = int(payload["batch_size"])
+            except (TypeError, ValueError) as exc:
+                raise ValueError("`hyperparams.batch_size` must be an integer or \"auto\".") from exc
+
+    if "num_threads" in payload:
+        num_threads = payload["num_threads"]
+        if num_threads is not None and num_threads != "auto":
+            try:
+                num_threads = int(num_threads)
+            except (TypeError, ValueError) as exc:
+                raise ValueError("`hyperparams.num_threads` must be an integer, \"auto\" or null.") from exc
+            if num_threads < 1:
+                raise ValueError("`hyperparams.num_threads` must be at least 1.")
+        if num_threads is not None and TRAINING_EXECUTION_MODE != "process":
+            raise ValueError(
+                "`hyperparams.num_threads` requires TRAINING_EXECUTION_MODE=process; "
+                "in-process runs share the server's torch thread pool."
+            )
+        result["num_threads"] = num_threads
 
     if "train_split" in payload:
         try:
@@ -395,6 +469,84 @@ def validate_hyperparams(payload):
     if "shuffle" in payload:
         result["shuffle"] = bool(payload["shuffle"])
 
+    if "mixed_precision" in payload:
+        result["mixed_precision"] = bool(payload["mixed_precision"])
+
+    if "compile" in payload:
+        result["compile"] = bool(payload["compile"])
+
+    for key in ("checkpoint_every_epochs", "checkpoint_every_steps"):
+        if key in payload:
+            value = payload[key]
+            try:
+                value = int(value) if value is not None else 0
+            except (TypeError, ValueError) as exc:
+                raise ValueError(f"`hyperparams.{key}` must be an integer.") from exc
+            if value < 0:
+                raise ValueError(f"`hyperparams.{key}` cannot be negative.")
+            result[key] = value
+
+    if "lr_scheduler" in payload:
+        result["lr_scheduler"] = _validate_lr_scheduler(payload["lr_scheduler"])
+
+    if "target_accuracy" in payload:
+        target = payload["target_accuracy"]
+        if target is not None:
+            try:
+                target = float(target)
+            except (TypeError, ValueError) as exc:
+                raise ValueError("`hyperparams.target_accuracy` must be numeric or null.") from exc
+            if not (0 < target <= 1):
+                raise ValueError("`hyperparams.target_accuracy` must be in (0, 1].")
+        result["target_accuracy"] = target
+
+    if "early_stopping_patience" in payload:
+        try:
+            patience = int(payload["early_stopping_patience"] or 0)
+        except (TypeError, ValueError) as exc:
+            raise ValueError("`hyperparams.early_stopping_patience` must be an integer.") from exc
+        if patience < 0:
+            raise ValueError("`hyperparams.early_stopping_patience` cannot be negative.")
+        result["early_stopping_patience"] = patience
+
+    if "early_stopping_min_delta" in payload:
+        try:
+            result["early_stopping_min_delta"] = max(0.0, float(payload["early_stopping_min_delta"] or 0.0))
+        except (TypeError, ValueError) as exc:
+            raise ValueError("`hyperparams.early_stopping_min_delta` must be numeric.") from exc
+
+    if "val_every_epochs" in payload:
+        try:
+            val_every = int(payload["val_every_epochs"] or 1)
+        except (TypeError, ValueError) as exc:
+            raise ValueError("`hyperparams.val_every_epochs` must be an integer.") from exc
+        if val_every < 1:
+            raise ValueError("`hyperparams.val_every_epochs` must be at least 1.")
+        result["val_every_epochs"] = val_every
+
+    if "val_subset_size" in payload:
+        try:
+            subset_size = int(payload["val_subset_size"] or 0)
+        except (TypeError, ValueError) as exc:
+            raise ValueError("`hyperparams.val_subset_size` must be an integer.") from exc
+        if subset_size < 0:
+            raise ValueError("`hyperparams.val_subset_size` cannot be negative.")
+        result["val_subset_size"] = subset_size
+
+    if "data_parallel_ranks" in payload:
+        try:
+            ranks = int(payload["data_parallel_ranks"] or 1)
+        except (TypeError, ValueError) as exc:
+            raise ValueError("`hyperparams.data_parallel_ranks` must be an integer.") from exc
+        if not (1 <= ranks <= MAX_DATA_PARALLEL_RANKS):
+            raise ValueError(
+                f"`hyperparams.data_parallel_ranks` must be between 1 and {MAX_DATA_PARALLEL_RANKS}."
+            )
+        result["data_parallel_ranks"] = ranks
+
+    if "async_validation" in payload:
+        result["async_validation"] = bool(payload["async_validation"])
+
     if "loss" in payload:
         result["loss"] = str(payload["loss"])
 
@@ -453,3 +605,100 @@ def validate_hyperparams(payload):
                     opt_cfg[key] = float(fallback)
 
     return result
+
+
+SWEEP_PARAM_KEYS = ("lr", "momentum", "batch_size", "optimizer")
+MAX_SWEEP_TRIALS = 32
+
+
+def _validate_sweep_values(key, values, mode):
+    if isinstance(values, dict):
+        if mode != "random" or key not in {"lr", "momentum"}:
+            raise ValueError(f"`sweep.params.{key}` must be a list of values.")
+        try:
+            low = float(values["min"])
+            high = float(values["max"])
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ValueError(f"`sweep.params.{key}` range needs numeric `min` and `max`.") from exc
+        if low > high:
+            raise ValueError(f"`sweep.params.{key}.min` cannot exceed `max`.")
+        log = bool(values.get("log", False))
+        if log and low <= 0:
+            raise ValueError(f"`sweep.params.{key}` log range must be positive.")
+        return {"min": low, "max": high, "log": log}
+
+    if not isinstance(values, list) or not values:
+        raise ValueError(f"`sweep.params.{key}` must be a non-empty list.")
+    try:
+        if key == "batch_size":
+            values = [int(value) for value in values]
+            if any(value <= 0 for value in values):
+                raise ValueError
+        elif key == "optimizer":
+            values = [str(value).lower() for value in values]
+            if any(value not in {"sgd", "adam"} for value in values):
+                raise ValueError
+        else:
+            values = [float(value) for value in values]
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"`sweep.params.{key}` contains invalid values.") from exc
+    return values
+
+
+def validate_sweep(payload):
+    if not isinstance(payload, dict):
+        raise ValueError("`sweep` must be an object.")
+
+    mode = str(payload.get("mode", "grid")).lower()
+    if mode not in {"grid", "random"}:
+        raise ValueError("`sweep.mode` must be 'grid' or 'random'.")
+
+    params = payload.get("params")
+    if not isinstance(params, dict) or not params:
+        raise ValueError("`sweep.params` must be a non-empty object.")
+    unknown = set(params) - set(SWEEP_PARAM_KEYS)
+    if unknown:
+        raise ValueError(f"Unsupported sweep parameters: {sorted(unknown)}. Supported: {list(SWEEP_PARAM_KEYS)}.")
+
+    result = {
+        "mode": mode,
+        "params": {key: _validate_sweep_values(key, value, mode) for key, value in params.items()},
+        "num_trials": None,
+        "seed": payload.get("seed"),
+    }
+
+    if mode == "grid":
+        total = 1
+        for values in result["params"].values():
+            total *= len(values)
+    else:
+        try:
+            total = int(payload.get("num_trials", 8))
+        except (TypeError, ValueError) as exc:
+            raise ValueError("`sweep.num_trials` must be an integer.") from exc
+        if total <= 0:
+            raise ValueError("`sweep.num_trials` must be positive.")
+        result["num_trials"] = total
+
+    if total > MAX_SWEEP_TRIALS:
+        raise ValueError(f"A sweep can contain at most {MAX_SWEEP_TRIALS} trials ({total} requested).")
+
+    if result["seed"] is not None:
+        try:
+            result["seed"] = int(result["seed"])
+        except (TypeError, ValueError) as exc:
+            raise ValueError("`sweep.seed` must be integer or null.") from exc
+
+    return result
+
+
+def validate_inference_target(run_id, model_id):
+    """Inference is addressed by exactly one of ``run_id`` or ``model_id``."""
+    if model_id is not None:
+        if run_id is not None:
+            raise ValueError("Pass either `run_id` or `model_id`, not both.")
+        if not isinstance(model_id, str) or not model_id:
+            raise ValueError("`model_id` must be a non-empty string.")
+        return
+    if not isinstance(run_id, str) or not run_id:
+        raise ValueError("`run_id` or `model_id` is required.")
@@ -9,6 +9,17 @@ export interface MetricData {
   samples_per_sec?: number
   progress?: number
   eta_seconds?: number
+  data_time?: number
+  forward_time?: number
+  backward_time?: number
+  optimizer_time?: number
+  val_time?: number
+  precision?: 'fp32' | 'bf16'
+  channels_last?: boolean
+  fp32_samples_per_sec?: number
+  bf16_samples_per_sec?: number
+  val_samples?: number
+  stop_reason?: 'target_accuracy' | 'early_stopping'
 }
 
 export interface EmnistSample {
@@ -23,6 +34,17 @@ export interface TrainingState {
   error?: string
   test_accuracy?: number
   sample_predictions?: EmnistSample[]
+  queue_position?: number
+  eta_seconds?: number | null
+  autotune?: AutotuneResult
+}
+
+export interface AutotuneResult {
+  batch_size: number
+  num_threads: number | null
+  batch_size_samples_per_sec: Record<string, number>
+  thread_samples_per_sec: Record<string, number>
+  tuning_time: number
 }
 
 export interface TrainingRequest {
@@ -38,7 +60,7 @@ export interface TrainingRequest {
   }
   hyperparams: {
     epochs: number
-    batch_size: number
+    batch_size: number | 'auto'
     optimizer: {
       type: string
       lr: number
@@ -49,15 +71,103 @@ export interface TrainingRequest {
     train_split: number
     shuffle: boolean
     dataset_type?: 'mnist' | 'emnist' | 'audio' | 'text'
+    mixed_precision?: boolean
+    compile?: boolean
+    checkpoint_every_epochs?: number
+    checkpoint_every_steps?: number
+    lr_scheduler?: {
+      type: 'step' | 'cosine' | 'onecycle'
+      step_size?: number
+      gamma?: number
+      eta_min?: number
+      max_lr?: number
+      pct_start?: number
+    } | null
+    target_accuracy?: number | null
+    early_stopping_patience?: number
+    early_stopping_min_delta?: number
+    val_every_epochs?: number
+    val_subset_size?: number
+    async_validation?: boolean
+    num_threads?: number | 'auto' | null
+    data_parallel_ranks?: number
   }
 }
 
 export interface TrainingResponse {
   run_id: string
   events_url: string
+  queue_position?: number | null
+  eta_seconds?: number | null
+  resumed_from?: string | null
 }
 
 export interface TrainingEvent {
   type: 'metric' | 'state'
   data: MetricData | TrainingState
 }
+
+export type InferenceBackend = 'eager' | 'torchscript' | 'onnx'
+
+export interface BackendExport {
+  state: 'pending' | 'ready' | 'failed'
+  path?: string
+  bytes?: number
+  error?: string
+}
+
+export interface QuantizationReport {
+  run_id: string | null
+  model_id: string | null
+  path: string
+  static_conv: boolean
+  calibration_samples: number
+  eval_samples: number
+  fp32_accuracy: number
+  int8_accuracy: number
+  accuracy_delta: number
+  fp32_bytes: number
+  int8_bytes: number
+  size_reduction: number
+  fp32_latency_ms: number
+  int8_latency_ms: number
+  speedup: number | null
+}
+
+export interface ClassMetrics {
+  label: number
+  prediction: string
+  precision: number
+  recall: number
+  support: number
+}
+
+export interface ModelEvaluation {
+  model_id: string
+  weights_digest: string
+  dataset_type: string
+  state: 'queued' | 'running' | 'succeeded' | 'failed'
+  created_at: string
+  completed_at: string | null
+  error: string | null
+  result: {
+    dataset_type: string
+    samples: number
+    accuracy: number
+    per_class: ClassMetrics[]
+    confusion_matrix: number[][]
+  } | null
+}
+
+export interface LivePrediction {
+  run_id: string
+  model_id: string | null
+  label: number
+  prediction: string
+  probabilities: number[]
+  dataset_type: string
+  variant: 'fp32' | 'int8'
+  backend: InferenceBackend | 'int8'
+  cached: boolean
+  version: number
+}
@@ -1,7 +1,7 @@
 import { useQuery } from "@tanstack/react-query";
 import { useMutation } from "@tanstack/react-query";
 import axios from "axios";
-import type { MetricData, EmnistSample } from "@/api/types";
+import type { MetricData, EmnistSample, InferenceBackend, BackendExport } from "@/api/types";
 
 export type StoredLayer = {
   type: string
@@ -40,6 +40,8 @@ export type StoredModel = {
   trained?: boolean
   last_trained_at?: string
   highest_accuracy?: number
+  inference_backend?: InferenceBackend | null
+  exports?: Partial<Record<Exclude<InferenceBackend, 'eager'>, BackendExport>>
 }
 
 export function SaveModel() {